@@ -0,0 +1,102 @@
+"""Mide el coste por URL de ``downloader.download`` frente a una sesión.
+
+Uso::
+
+    python benchmarks/bench_session.py                 # servidor HTTP local, sin red
+    python benchmarks/bench_session.py URL [URL ...]   # descargas reales (red y ffmpeg)
+
+Cada URL se descarga una vez con :meth:`SoundCloudDownloader.download`, que
+crea un ``YoutubeDL`` por llamada, y otra con ``downloader.session()``,
+que lo reutiliza. Sin URLs se sirven archivos pequeños desde un servidor
+local y se desactiva el postprocesado, así que la diferencia es el coste
+de crear y preparar la instancia en cada descarga.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from conversor_rekordbox.api.soundcloud import SoundCloudDownloader  # noqa: E402
+
+ROUNDS = 20
+PAYLOAD = b"\xff\xfb\x90\x00" * 4096
+
+
+class _AudioHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self) -> None:  # noqa: N802 - API de http.server
+        self._headers()
+
+    def do_GET(self) -> None:  # noqa: N802 - API de http.server
+        self._headers()
+        self.wfile.write(PAYLOAD)
+
+    def _headers(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def _without_postprocessing(options: dict[str, Any]) -> Any:
+    from yt_dlp import YoutubeDL
+
+    return YoutubeDL({**options, "postprocessors": [], "quiet": True, "noprogress": True})
+
+
+def bench(downloader: SoundCloudDownloader, output_dir: Path, urls: list[str]) -> None:
+    # Cada descarga va a una carpeta nueva para que yt-dlp no la dé por hecha.
+    fresh = _timed(urls, output_dir / "nueva", downloader.download)
+    with downloader.session() as session:
+        warm = _timed(urls, output_dir / "sesion", session.download)
+        print(f"instancias creadas por la sesión: {session.stats.created}")
+    _report("descarga por URL", fresh, warm)
+
+
+def _timed(urls: list[str], output_dir: Path, download: Callable[[str, Path], Any]) -> list[float]:
+    times: list[float] = []
+    for index, url in enumerate(urls):
+        start = time.perf_counter()
+        download(url, output_dir / str(index))
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _report(label: str, fresh: list[float], warm: list[float]) -> None:
+    fresh_ms = statistics.median(fresh) * 1000
+    warm_ms = statistics.median(warm) * 1000
+    print(f"{label}: download {fresh_ms:.1f} ms, sesión {warm_ms:.1f} ms, "
+          f"ahorro {fresh_ms - warm_ms:.1f} ms por URL")
+
+
+def main(argv: list[str]) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        if argv:
+            bench(SoundCloudDownloader(), Path(tmp), argv)
+            return 0
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _AudioHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            urls = [f"{base}/pista-{index}.mp3" for index in range(ROUNDS)]
+            bench(SoundCloudDownloader(ydl_factory=_without_postprocessing), Path(tmp), urls)
+        finally:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
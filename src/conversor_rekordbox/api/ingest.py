@@ -0,0 +1,69 @@
+"""Convierte las descargas de SoundCloud en pistas de biblioteca."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..converter import Format, FormatName, append_library, detect_format
+from ..models import Track
+
+DownloadEntry = tuple[Path, dict[str, Any]]
+
+
+def track_from_info(path: Path, info: dict[str, Any], as_uri: bool = True) -> Track:
+    """Construye un :class:`Track` a partir del ``info_dict`` de yt-dlp.
+
+    ``as_uri`` controla si la ubicación se guarda como ``file://`` (Rekordbox,
+    Engine DJ) o como ruta simple (playlists M3U de Serato).
+    """
+
+    resolved = path.resolve()
+    return Track(
+        title=info.get("track") or info.get("title") or path.stem,
+        artist=_first(info, "artists", "artist") or info.get("uploader") or "",
+        album=info.get("album") or info.get("playlist_title"),
+        genre=_first(info, "genres", "genre"),
+        duration=info.get("duration"),
+        comment=info.get("description") or None,
+        location=resolved.as_uri() if as_uri else str(resolved),
+        year=_year(info),
+    )
+
+
+def tracks_from_downloads(entries: Iterable[DownloadEntry], as_uri: bool = True) -> list[Track]:
+    return [track_from_info(path, info, as_uri=as_uri) for path, info in entries]
+
+
+def ingest_downloads(
+    entries: Iterable[DownloadEntry],
+    library_path: str | Path,
+    library_format: FormatName | None = None,
+) -> list[Track]:
+    """Añade las pistas descargadas al final de una biblioteca existente.
+
+    ``entries`` es la salida de :meth:`SoundCloudDownloader.download_entries`.
+    """
+
+    library_path = Path(library_path)
+    detected = library_format or detect_format(library_path)
+    tracks = tracks_from_downloads(entries, as_uri=detected != Format.SERATO)
+    append_library(tracks, library_path, detected)
+    return tracks
+
+
+def _first(info: dict[str, Any], plural: str, singular: str) -> str | None:
+    values = info.get(plural)
+    if isinstance(values, list) and values:
+        return str(values[0])
+    value = info.get(singular)
+    return str(value) if value else None
+
+
+def _year(info: dict[str, Any]) -> int | None:
+    if info.get("release_year"):
+        return int(info["release_year"])
+    date = info.get("upload_date")
+    if isinstance(date, str) and len(date) >= 4 and date[:4].isdigit():
+        return int(date[:4])
+    return None
@@ -0,0 +1,224 @@
+"""Eventos de progreso tipados a partir de los hooks de yt-dlp."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable
+
+PHASE_DOWNLOADING = "downloading"
+PHASE_DOWNLOADED = "downloaded"
+PHASE_POSTPROCESSING = "postprocessing"
+PHASE_FINISHED = "finished"
+PHASE_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class ProgressTotals:
+    """Acumulados de toda la descarga (pista o playlist)."""
+
+    entries_total: int | None
+    entries_done: int
+    downloaded_bytes: int
+    total_bytes: int | None
+    speed: float | None
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Estado de una entrada de la descarga en un instante."""
+
+    entry_id: str
+    title: str | None
+    phase: str
+    downloaded_bytes: int = 0
+    total_bytes: int | None = None
+    speed: float | None = None
+    eta: float | None = None
+    postprocessor: str | None = None
+    playlist_index: int | None = None
+    totals: ProgressTotals | None = None
+
+    @property
+    def fraction(self) -> float | None:
+        if not self.total_bytes:
+            return None
+        return min(1.0, self.downloaded_bytes / self.total_bytes)
+
+
+ProgressListener = Callable[[ProgressEvent], None]
+
+
+class ProgressTracker:
+    """Traduce los diccionarios de ``progress_hooks``/``postprocessor_hooks``.
+
+    Mantiene el último estado de cada entrada para calcular totales y publica
+    un :class:`ProgressEvent` por cada llamada de yt-dlp.
+    """
+
+    def __init__(self, listener: ProgressListener) -> None:
+        self.listener = listener
+        self._lock = threading.Lock()
+        self._entries: dict[str, ProgressEvent] = {}
+        self._entries_total: int | None = None
+        self._downloaded = 0
+        self._known_total = 0
+        self._unknown_sizes = 0
+        self._speed = 0.0
+        self._done = 0
+
+    def progress_hook(self, data: dict[str, Any]) -> None:
+        status = data.get("status")
+        info = data.get("info_dict") or {}
+        if status == "downloading":
+            phase = PHASE_DOWNLOADING
+        elif status == "finished":
+            phase = PHASE_DOWNLOADED
+        elif status == "error":
+            phase = PHASE_ERROR
+        else:
+            return
+
+        downloaded = int(data.get("downloaded_bytes") or 0)
+        total = data.get("total_bytes") or data.get("total_bytes_estimate")
+        if phase == PHASE_DOWNLOADED and total is None:
+            total = downloaded
+        self._publish(
+            info,
+            data.get("filename"),
+            phase=phase,
+            downloaded_bytes=downloaded,
+            total_bytes=int(total) if total else None,
+            speed=data.get("speed"),
+            eta=data.get("eta"),
+        )
+
+    def postprocessor_hook(self, data: dict[str, Any]) -> None:
+        status = data.get("status")
+        if status not in {"started", "processing", "finished"}:
+            return
+        info = data.get("info_dict") or {}
+        with self._lock:
+            previous = self._entries.get(_entry_id(info, None))
+        self._publish(
+            info,
+            None,
+            phase=PHASE_FINISHED if status == "finished" else PHASE_POSTPROCESSING,
+            downloaded_bytes=previous.downloaded_bytes if previous else 0,
+            total_bytes=previous.total_bytes if previous else None,
+            postprocessor=data.get("postprocessor"),
+        )
+
+    def totals(self) -> ProgressTotals:
+        with self._lock:
+            return self._totals_locked()
+
+    def _publish(self, info: dict[str, Any], filename: str | None, **fields: Any) -> None:
+        entry_id = _entry_id(info, filename)
+        event = ProgressEvent(
+            entry_id=entry_id,
+            title=info.get("title"),
+            playlist_index=info.get("playlist_index"),
+            **fields,
+        )
+        with self._lock:
+            count = info.get("n_entries") or info.get("playlist_count")
+            if count:
+                self._entries_total = int(count)
+            # Los totales se actualizan de forma incremental: restar la
+            # contribución anterior de la entrada y sumar la nueva mantiene
+            # cada hook en O(1) aunque la playlist tenga miles de pistas.
+            previous = self._entries.get(entry_id)
+            if previous is not None:
+                self._account(previous, -1)
+            self._account(event, 1)
+            self._entries[entry_id] = event
+            totals = self._totals_locked()
+        self.listener(replace(event, totals=totals))
+
+    def _account(self, event: ProgressEvent, sign: int) -> None:
+        self._downloaded += sign * event.downloaded_bytes
+        if event.total_bytes is None:
+            self._unknown_sizes += sign
+        else:
+            self._known_total += sign * event.total_bytes
+        if event.phase == PHASE_DOWNLOADING and event.speed:
+            self._speed += sign * event.speed
+        if event.phase in {PHASE_DOWNLOADED, PHASE_POSTPROCESSING, PHASE_FINISHED}:
+            self._done += sign
+
+    def _totals_locked(self) -> ProgressTotals:
+        return ProgressTotals(
+            entries_total=self._entries_total,
+            entries_done=self._done,
+            downloaded_bytes=self._downloaded,
+            total_bytes=None if self._unknown_sizes else self._known_total,
+            speed=self._speed if self._speed > 0 else None,
+        )
+
+
+class ProgressThrottle:
+    """Agrupa eventos y entrega como mucho ``max_rate`` lotes por segundo.
+
+    Solo se conserva el último evento de cada entrada; las fases terminales
+    nunca se pierden porque sustituyen a las intermedias de la misma entrada.
+    Lo que llega dentro del intervalo se entrega al cumplirse este desde un
+    temporizador, aunque no lleguen más eventos (p. ej. durante una
+    conversión larga). Llama a :meth:`flush` al terminar para entregar lo
+    pendiente sin esperar.
+
+    Los lotes se toman y se entregan bajo un cerrojo de entrega aparte, así
+    que el temporizador y quien llama nunca los entregan desordenados; los
+    eventos se siguen aceptando mientras se entrega un lote.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[list[ProgressEvent]], None],
+        max_rate: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.deliver = deliver
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Reentrante por si ``deliver`` vuelve a llamar al propio throttle.
+        self._delivery = threading.RLock()
+        self._pending: dict[str, ProgressEvent] = {}
+        self._last_delivery = float("-inf")
+        self._timer: threading.Timer | None = None
+
+    def __call__(self, event: ProgressEvent) -> None:
+        with self._lock:
+            self._pending[event.entry_id] = event
+            now = self.clock()
+            wait = self._last_delivery + self.interval - now
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._delivery:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = self._drain_locked(self.clock())
+            self.deliver(batch)
+
+    def _drain_locked(self, now: float) -> list[ProgressEvent]:
+        if self._timer is not None:
+            self._timer.cancel()  # sin efecto si es el propio temporizador
+            self._timer = None
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._last_delivery = now
+        return batch
+
+
+def _entry_id(info: dict[str, Any], filename: str | None) -> str:
+    return str(info.get("id") or info.get("webpage_url") or filename or "?")
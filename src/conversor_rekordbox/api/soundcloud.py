@@ -1,18 +1,30 @@
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterable
-
-from yt_dlp import YoutubeDL
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 
 from ..audio.conversion import AudioFormat
+from ..utils import metrics
 from ..utils.logger import get_logger
+from ..utils.transfer import RetryPolicy, RetryStats
+from .progress import ProgressListener, ProgressTracker
+
+if TYPE_CHECKING:
+    from yt_dlp import YoutubeDL
 
 logger = get_logger()
 
 
+def _default_ydl_factory(options: dict[str, Any]) -> YoutubeDL:
+    # yt_dlp tarda en importarse; solo se carga al crear la primera instancia.
+    from yt_dlp import YoutubeDL
+
+    return YoutubeDL(options)
+
+
 @dataclass
 class SoundCloudCredentials:
     client_id: str | None = None
@@ -48,11 +60,34 @@ class SoundCloudDownloader:
     y endpoints autenticados. Los campos se guardan y pueden reutilizarse
     para configurar cookies o cabeceras personalizadas si se requiere
     extender la integración.
+
+    Las descargas se reanudan: yt-dlp conserva los ficheros ``.part`` y pide
+    el resto con cabeceras ``Range`` según ``retry_policy``. Los reintentos
+    realizados se acumulan en ``retry_stats``.
     """
 
-    def __init__(self, credentials: SoundCloudCredentials | None = None, output_dir: Path | None = None) -> None:
+    def __init__(
+        self,
+        credentials: SoundCloudCredentials | None = None,
+        output_dir: Path | None = None,
+        retry_policy: RetryPolicy | None = None,
+        ydl_factory: Callable[[dict[str, Any]], YoutubeDL] | None = None,
+    ) -> None:
         self.credentials = credentials or SoundCloudCredentials()
         self.output_dir = output_dir
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.ydl_factory = ydl_factory or _default_ydl_factory
+
+    @staticmethod
+    def output_templates(output_dir: Path) -> dict[str, str]:
+        return {
+            "default": str(output_dir / "%(title)s.%(ext)s"),
+            "pl_video": str(
+                output_dir
+                / "%(playlist_title)s/%(playlist_index)02d - %(title)s.%(ext)s"
+            ),
+        }
 
     def build_options(self, output_dir: Path) -> dict[str, Any]:
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -61,13 +96,7 @@ class SoundCloudDownloader:
             headers["Authorization"] = f"OAuth {self.credentials.oauth_token}"
 
         return {
-            "outtmpl": {
-                "default": str(output_dir / "%(title)s.%(ext)s"),
-                "pl_video": str(
-                    output_dir
-                    / "%(playlist_title)s/%(playlist_index)02d - %(title)s.%(ext)s"
-                ),
-            },
+            "outtmpl": self.output_templates(output_dir),
             "format": "bestaudio/best",
             "addmetadata": True,  # Añade etiquetas ID3 con título/artista/álbum cuando estén disponibles
             "postprocessors": [
@@ -85,31 +114,244 @@ class SoundCloudDownloader:
             "outtmpl_na_placeholder": "desconocido",
             "http_headers": headers,
             "nocheckcertificate": True,
+            # Reanudación: mantener los .part y continuar desde el último byte.
+            "continuedl": True,
+            "nopart": False,
+            "retries": self.retry_policy.max_retries,
+            "fragment_retries": self.retry_policy.max_retries,
+            "http_chunk_size": self.retry_policy.chunk_size,
+            "socket_timeout": self.retry_policy.timeout,
+            "retry_sleep_functions": {
+                "http": self._retry_delay,
+                "fragment": self._retry_delay,
+            },
         }
 
-    def download(self, url: str, output_dir: Path, fmt: AudioFormat = "mp3") -> list[Path]:
+    def _retry_delay(self, n: int) -> float:
+        """Función de espera que se pasa a yt-dlp; además cuenta cada reintento."""
+        self.retry_stats.record_retry(f"retry {n + 1}")
+        return self.retry_policy.delay(n)
+
+    def download(
+        self,
+        url: str,
+        output_dir: Path,
+        fmt: AudioFormat = "mp3",
+        progress: ProgressListener | None = None,
+    ) -> list[Path]:
+        return [path for path, _ in self.download_entries(url, output_dir, fmt, progress)]
+
+    def download_entries(
+        self,
+        url: str,
+        output_dir: Path,
+        fmt: AudioFormat = "mp3",
+        progress: ProgressListener | None = None,
+    ) -> list[tuple[Path, dict[str, Any]]]:
+        """Igual que :meth:`download` pero conserva los metadatos de yt-dlp de cada pista.
+
+        Si se pasa ``progress`` recibe un :class:`ProgressEvent` por cada
+        llamada de los hooks de descarga y postprocesado de yt-dlp.
+        """
         if fmt != "mp3":
             raise ValueError("Solo se admite descarga directa a MP3")
 
         options = self.build_options(output_dir)
+        if progress is not None:
+            tracker = ProgressTracker(progress)
+            options["progress_hooks"] = [tracker.progress_hook]
+            options["postprocessor_hooks"] = [tracker.postprocessor_hook]
+        self.retry_stats.record_attempt()
         logger.info("Descargando audio", extra={"url": url, "output": str(output_dir)})
-        with YoutubeDL(options) as ydl:
+        with self.ydl_factory(options) as ydl:
+            return self.extract(ydl, url)
+
+    def session(self, pool_size: int = 1) -> "SoundCloudSession":
+        """Crea una sesión que reutiliza instancias de YoutubeDL entre descargas."""
+        return SoundCloudSession(self, pool_size=pool_size)
+
+    def extract(self, ydl: YoutubeDL, url: str) -> list[tuple[Path, dict[str, Any]]]:
+        with metrics.stage("soundcloud.download") as span:
             result = ydl.extract_info(url, download=True)
-            return list(self._resolve_targets(result, ydl))
+            entries = list(self._resolve_targets(result, ydl))
+            span.add(tracks=len(entries), bytes=sum(_file_size(path) for path, _ in entries))
+        return entries
 
-    def _resolve_targets(self, result: Any, ydl: YoutubeDL) -> Iterable[Path]:
+    def _resolve_targets(self, result: Any, ydl: YoutubeDL) -> Iterable[tuple[Path, dict[str, Any]]]:
         if isinstance(result, dict) and result.get("entries"):
             for entry in result.get("entries") or []:
                 if not entry:
                     continue
                 filename = Path(ydl.prepare_filename(entry))
-                yield self._ensure_mp3_suffix(filename)
+                yield self._ensure_mp3_suffix(filename), entry
             return
 
         filename = Path(ydl.prepare_filename(result))
-        yield self._ensure_mp3_suffix(filename)
+        yield self._ensure_mp3_suffix(filename), result
 
     @staticmethod
     def _ensure_mp3_suffix(filename: Path) -> Path:
         final_file = filename.with_suffix(".mp3")
         return final_file if final_file.exists() else filename
+
+
+@dataclass
+class SessionStats:
+    created: int = 0
+    reused: int = 0
+    closed: int = 0
+
+
+class _HookRelay:
+    """Hooks fijos de una instancia caliente que reenvían al tracker de la descarga en curso."""
+
+    def __init__(self) -> None:
+        self.tracker: ProgressTracker | None = None
+
+    def progress_hook(self, data: dict[str, Any]) -> None:
+        if self.tracker is not None:
+            self.tracker.progress_hook(data)
+
+    def postprocessor_hook(self, data: dict[str, Any]) -> None:
+        if self.tracker is not None:
+            self.tracker.postprocessor_hook(data)
+
+
+@dataclass
+class _WarmClient:
+    ydl: YoutubeDL
+    relay: _HookRelay
+    generation: int
+
+
+class SoundCloudSession:
+    """Mantiene vivas instancias configuradas de ``YoutubeDL`` entre descargas.
+
+    Cada ``YoutubeDL`` conserva sus extractores ya inicializados (incluido el
+    ``client_id`` de SoundCloud), las cookies y las conexiones HTTP abiertas,
+    así que solo la primera URL paga ese coste. Las instancias no son seguras
+    entre hilos: la sesión presta cada una a una sola descarga a la vez y
+    crea hasta ``pool_size`` si hay descargas concurrentes.
+
+    ``refresh`` descarta las instancias (p. ej. tras cambiar credenciales) y
+    ``close`` libera todo; la sesión también funciona como context manager.
+    """
+
+    def __init__(self, downloader: SoundCloudDownloader, pool_size: int = 1) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size debe ser al menos 1")
+        self.downloader = downloader
+        self.pool_size = pool_size
+        self.stats = SessionStats()
+        self._idle: list[_WarmClient] = []
+        self._live = 0
+        self._generation = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __enter__(self) -> "SoundCloudSession":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def download(
+        self,
+        url: str,
+        output_dir: Path,
+        fmt: AudioFormat = "mp3",
+        progress: ProgressListener | None = None,
+    ) -> list[Path]:
+        return [path for path, _ in self.download_entries(url, output_dir, fmt, progress)]
+
+    def download_entries(
+        self,
+        url: str,
+        output_dir: Path,
+        fmt: AudioFormat = "mp3",
+        progress: ProgressListener | None = None,
+    ) -> list[tuple[Path, dict[str, Any]]]:
+        if fmt != "mp3":
+            raise ValueError("Solo se admite descarga directa a MP3")
+
+        client = self._acquire()
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            # Las plantillas se leen de params en cada descarga, basta con actualizarlas.
+            client.ydl.params["outtmpl"].update(self.downloader.output_templates(output_dir))
+            client.relay.tracker = ProgressTracker(progress) if progress is not None else None
+            self.downloader.retry_stats.record_attempt()
+            logger.info("Descargando audio", extra={"url": url, "output": str(output_dir)})
+            return self.downloader.extract(client.ydl, url)
+        finally:
+            client.relay.tracker = None
+            self._release(client)
+
+    def refresh(self) -> None:
+        """Descarta las instancias actuales; las siguientes descargas crean otras nuevas."""
+        with self._condition:
+            self._generation += 1
+            stale, self._idle = self._idle, []
+        for client in stale:
+            self._discard(client)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+        self.refresh()
+
+    def _acquire(self) -> _WarmClient:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("La sesión de descarga está cerrada")
+                if self._idle:
+                    self.stats.reused += 1
+                    return self._idle.pop()
+                if self._live < self.pool_size:
+                    self._live += 1
+                    generation = self._generation
+                    break
+                self._condition.wait()
+
+        try:
+            relay = _HookRelay()
+            # Directorio provisional: cada descarga fija sus plantillas de salida.
+            options = self.downloader.build_options(self.downloader.output_dir or Path.cwd())
+            options["progress_hooks"] = [relay.progress_hook]
+            options["postprocessor_hooks"] = [relay.postprocessor_hook]
+            ydl = self.downloader.ydl_factory(options)
+        except BaseException:
+            with self._condition:
+                self._live -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.stats.created += 1
+        return _WarmClient(ydl=ydl, relay=relay, generation=generation)
+
+    def _release(self, client: _WarmClient) -> None:
+        with self._condition:
+            keep = not self._closed and client.generation == self._generation
+            if keep:
+                self._idle.append(client)
+                self._condition.notify()
+                return
+        self._discard(client)
+
+    def _discard(self, client: _WarmClient) -> None:
+        try:
+            client.ydl.close()
+        except Exception:  # pragma: no cover - cierre defensivo
+            logger.exception("Error cerrando YoutubeDL")
+        with self._condition:
+            self._live -= 1
+            self.stats.closed += 1
+            self._condition.notify()
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
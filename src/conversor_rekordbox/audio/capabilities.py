@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from ..utils.logger import get_logger
+
+logger = get_logger()
+
+CACHE_PATH = Path.home() / ".conversor_audio" / "ffmpeg_capabilities.json"
+
+# Codificadores preferidos por formato de salida, el mejor primero. Todos
+# generan MP3 CBR a 320 kbps; libmp3lame da mejor calidad y los de la
+# plataforma se aceptan cuando la compilación no incluye LAME.
+ENCODER_PREFERENCES: dict[str, tuple[str, ...]] = {
+    "mp3": ("libmp3lame", "mp3_mf", "libshine"),
+    "wav": ("pcm_s16le",),
+}
+
+
+class CapabilityError(RuntimeError):
+    """Se lanza si ffmpeg no está instalado o le falta algo que la conversión necesita."""
+
+
+@dataclass(frozen=True)
+class FFmpegCapabilities:
+    """Lo que puede hacer un binario de ffmpeg concreto, leído de sus propios listados."""
+
+    binary: str
+    version: str | None
+    encoders: frozenset[str]
+    filters: frozenset[str]
+    hwaccels: frozenset[str]
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "binary": self.binary,
+            "version": self.version,
+            "encoders": sorted(self.encoders),
+            "filters": sorted(self.filters),
+            "hwaccels": sorted(self.hwaccels),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, object]) -> "FFmpegCapabilities":
+        return cls(
+            binary=str(data["binary"]),
+            version=data.get("version"),  # type: ignore[arg-type]
+            encoders=frozenset(data.get("encoders", ())),  # type: ignore[arg-type]
+            filters=frozenset(data.get("filters", ())),  # type: ignore[arg-type]
+            hwaccels=frozenset(data.get("hwaccels", ())),  # type: ignore[arg-type]
+        )
+
+
+_memory_cache: dict[tuple[str, int], FFmpegCapabilities] = {}
+_lock = threading.Lock()
+
+
+def probe_ffmpeg(
+    binary: str = "ffmpeg",
+    cache_path: Path | None = None,
+    use_disk_cache: bool = True,
+) -> FFmpegCapabilities:
+    """Devuelve las capacidades de ``binary`` consultándolo como mucho una vez.
+
+    El resultado se guarda en memoria y en disco (``cache_path``, por defecto
+    :data:`CACHE_PATH`) con la ruta resuelta del binario y su mtime como
+    clave, así que sustituir ffmpeg invalida la entrada.
+    """
+
+    if use_disk_cache:
+        cache_path = cache_path or CACHE_PATH
+    else:
+        cache_path = None
+
+    resolved = shutil.which(binary) or binary
+    path = Path(resolved)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError as exc:
+        raise CapabilityError("FFmpeg no está disponible en el sistema") from exc
+
+    key = (str(path.resolve()), mtime_ns)
+    with _lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            return cached
+        cached = _read_disk_cache(cache_path, key)
+        if cached is None:
+            cached = _run_probe(str(path))
+            _write_disk_cache(cache_path, key, cached)
+        _memory_cache[key] = cached
+        return cached
+
+
+def select_encoder(fmt: str, capabilities: FFmpegCapabilities) -> str:
+    """Elige el codificador preferido disponible para ``fmt`` o falla con un error claro."""
+
+    preferences = ENCODER_PREFERENCES.get(fmt)
+    if preferences is None:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    for encoder in preferences:
+        if capabilities.has_encoder(encoder):
+            return encoder
+    raise CapabilityError(
+        f"FFmpeg ({capabilities.binary}) no incluye ningún codificador para {fmt}: "
+        f"se necesita uno de {', '.join(preferences)}"
+    )
+
+
+def clear_cache() -> None:
+    with _lock:
+        _memory_cache.clear()
+
+
+def _run_probe(binary: str) -> FFmpegCapabilities:
+    logger.debug("Analizando capacidades de FFmpeg", extra={"binary": binary})
+    return FFmpegCapabilities(
+        binary=binary,
+        version=parse_version(_listing(binary, "-version")),
+        encoders=parse_encoders(_listing(binary, "-encoders")),
+        filters=parse_filters(_listing(binary, "-filters")),
+        hwaccels=parse_hwaccels(_listing(binary, "-hwaccels")),
+    )
+
+
+def _listing(binary: str, flag: str) -> str:
+    try:
+        completed = subprocess.run(
+            [binary, "-hide_banner", flag], capture_output=True, check=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        raise CapabilityError(f"No se pudo ejecutar {binary} {flag}: {exc}") from exc
+    return completed.stdout.decode("utf-8", errors="ignore")
+
+
+def parse_version(output: str) -> str | None:
+    # "ffmpeg version 6.1.1 Copyright (c) ..."
+    for line in output.splitlines():
+        tokens = line.split()
+        if len(tokens) >= 3 and tokens[1] == "version":
+            return tokens[2]
+    return None
+
+
+def parse_encoders(output: str) -> frozenset[str]:
+    # La leyenda termina en un separador " ------"; cada entrada es "FLAGS nombre descripción".
+    names: set[str] = set()
+    in_table = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("---"):
+            in_table = True
+            continue
+        if in_table and stripped:
+            tokens = stripped.split()
+            if len(tokens) >= 2:
+                names.add(tokens[1])
+    return frozenset(names)
+
+
+def parse_filters(output: str) -> frozenset[str]:
+    # Las entradas tienen la forma " T.C acompressor  A->A  Audio compressor."
+    names: set[str] = set()
+    for line in output.splitlines():
+        tokens = line.split()
+        if len(tokens) >= 3 and "->" in tokens[2]:
+            names.add(tokens[1])
+    return frozenset(names)
+
+
+def parse_hwaccels(output: str) -> frozenset[str]:
+    names: set[str] = set()
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.endswith(":"):
+            names.add(stripped)
+    return frozenset(names)
+
+
+def _cache_key(key: tuple[str, int]) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+def _read_disk_cache(cache_path: Path | None, key: tuple[str, int]) -> FFmpegCapabilities | None:
+    if cache_path is None or not cache_path.exists():
+        return None
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        entry = data.get(_cache_key(key))
+        return FFmpegCapabilities.from_json(entry) if entry else None
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.warning("Caché de capacidades de FFmpeg ilegible", extra={"path": str(cache_path)})
+        return None
+
+
+def _write_disk_cache(cache_path: Path | None, key: tuple[str, int], capabilities: FFmpegCapabilities) -> None:
+    if cache_path is None:
+        return
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8")) if cache_path.exists() else {}
+    except (OSError, ValueError):
+        data = {}
+    # Solo se conserva la huella actual de cada binario.
+    data = {k: v for k, v in data.items() if not k.startswith(f"{key[0]}:")}
+    data[_cache_key(key)] = capabilities.to_json()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    except OSError:
+        logger.warning("No se pudo guardar la caché de FFmpeg", extra={"path": str(cache_path)})
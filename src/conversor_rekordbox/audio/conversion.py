@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import os
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Literal
+from typing import Callable, Iterable, Literal
 
+from ..utils import metrics
 from ..utils.logger import get_logger
+from .capabilities import CapabilityError, FFmpegCapabilities, probe_ffmpeg, select_encoder
 
 AudioFormat = Literal["mp3", "wav"]
 
@@ -28,21 +31,28 @@ class ConversionError(RuntimeError):
 FFMPEG_COMMON_ARGS = ["-y", "-vn"]
 
 
-def build_ffmpeg_command(source: Path, destination: Path, fmt: AudioFormat) -> list[str]:
+def build_ffmpeg_command(
+    source: Path,
+    destination: Path,
+    fmt: AudioFormat,
+    encoder: str | None = None,
+    binary: str = "ffmpeg",
+) -> list[str]:
     """Return the ffmpeg command for the desired output format.
 
-    MP3 uses constant bitrate 320 kbps with libmp3lame.
+    MP3 uses constant bitrate 320 kbps, with libmp3lame unless ``encoder``
+    names another one picked from the binary's capabilities.
     WAV uses signed 16-bit PCM at 44.1 kHz.
     """
 
     if fmt == "mp3":
         return [
-            "ffmpeg",
+            binary,
             *FFMPEG_COMMON_ARGS,
             "-i",
             str(source),
             "-acodec",
-            "libmp3lame",
+            encoder or "libmp3lame",
             "-b:a",
             "320k",
             "-map_metadata",
@@ -54,12 +64,12 @@ def build_ffmpeg_command(source: Path, destination: Path, fmt: AudioFormat) -> l
 
     if fmt == "wav":
         return [
-            "ffmpeg",
+            binary,
             *FFMPEG_COMMON_ARGS,
             "-i",
             str(source),
             "-acodec",
-            "pcm_s16le",
+            encoder or "pcm_s16le",
             "-ar",
             "44100",
             str(destination),
@@ -68,14 +78,41 @@ def build_ffmpeg_command(source: Path, destination: Path, fmt: AudioFormat) -> l
     raise ValueError(f"Formato no soportado: {fmt}")
 
 
-def convert_file(source: Path, destination_dir: Path, fmt: AudioFormat) -> ConversionResult:
+def resolve_encoder(fmt: AudioFormat, capabilities: FFmpegCapabilities | None = None) -> tuple[str, str]:
+    """Return ``(binary, encoder)`` for ``fmt`` or raise before any file is touched.
+
+    The probe is cached per binary path and mtime, so calling this for every
+    batch costs a dictionary lookup after the first time.
+    """
+
+    try:
+        capabilities = capabilities or probe_ffmpeg()
+        return capabilities.binary, select_encoder(fmt, capabilities)
+    except CapabilityError as exc:
+        raise ConversionError(str(exc)) from exc
+
+
+def convert_file(
+    source: Path,
+    destination_dir: Path,
+    fmt: AudioFormat,
+    encoder: str | None = None,
+    binary: str = "ffmpeg",
+) -> ConversionResult:
+    # Fuera del try de FFmpeg: un origen ausente no es un FFmpeg ausente.
+    try:
+        size = source.stat().st_size
+    except OSError as exc:
+        raise ConversionError(f"No se puede leer el archivo de origen {source}: {exc.strerror or exc}") from exc
     destination_dir.mkdir(parents=True, exist_ok=True)
     destination = destination_dir / f"{source.stem}.{fmt}"
-    command = build_ffmpeg_command(source, destination, fmt)
+    command = build_ffmpeg_command(source, destination, fmt, encoder=encoder, binary=binary)
     logger.debug("Ejecutando comando ffmpeg", extra={"command": " ".join(command)})
 
     try:
-        subprocess.run(command, check=True, capture_output=True)
+        with metrics.stage("convert_file") as span:
+            _run_ffmpeg(command, span)
+            span.add(files=1, bytes=size)
     except FileNotFoundError as exc:  # ffmpeg no está instalado o no está en PATH
         logger.exception("FFmpeg no encontrado")
         raise ConversionError("FFmpeg no está disponible en el sistema") from exc
@@ -86,19 +123,51 @@ def convert_file(source: Path, destination_dir: Path, fmt: AudioFormat) -> Conve
     return ConversionResult(source=source, destination=destination, format=fmt, success=True)
 
 
-def bulk_convert(sources: Iterable[Path], destination_dir: Path, fmt: AudioFormat) -> list[ConversionResult]:
+def _run_ffmpeg(command: list[str], span: metrics.Span) -> None:
+    # os.times() suma la CPU de todos los hijos del proceso: con conversiones
+    # en paralelo cada etapa se llevaría también la de las demás. En POSIX se
+    # espera al hijo con wait4 y se anota solo su CPU.
+    if not hasattr(os, "wait4"):
+        subprocess.run(command, check=True, capture_output=True)
+        return
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    with process.stderr:  # una sola tubería: leerla entera no puede bloquear
+        stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    span.add_subprocess_cpu(usage.ru_utime + usage.ru_stime)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, b"", stderr)
+
+
+def bulk_convert(
+    sources: Iterable[Path],
+    destination_dir: Path,
+    fmt: AudioFormat,
+    on_result: Callable[[ConversionResult], None] | None = None,
+    capabilities: FFmpegCapabilities | None = None,
+) -> list[ConversionResult]:
+    """Convert every source, checking ffmpeg and the encoder once up front.
+
+    Raises :class:`ConversionError` before the first file if ffmpeg is
+    missing or has no suitable encoder; per-file failures are returned as
+    unsuccessful results.
+    """
+
+    binary, encoder = resolve_encoder(fmt, capabilities)
     results: list[ConversionResult] = []
     for source in sources:
         try:
-            results.append(convert_file(source, destination_dir, fmt))
+            result = convert_file(source, destination_dir, fmt, encoder=encoder, binary=binary)
         except ConversionError as exc:
-            results.append(
-                ConversionResult(
-                    source=source,
-                    destination=destination_dir / f"{source.stem}.{fmt}",
-                    format=fmt,
-                    success=False,
-                    error=str(exc),
-                )
+            result = ConversionResult(
+                source=source,
+                destination=destination_dir / f"{source.stem}.{fmt}",
+                format=fmt,
+                success=False,
+                error=str(exc),
             )
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
     return results
@@ -0,0 +1,405 @@
+"""Formas de onda de vista general (pico y RMS por columna) con caché en disco.
+
+ffmpeg decodifica cada archivo a PCM mono de 16 bits por una tubería. El
+PCM se lee en bloques de tamaño fijo y NumPy lo reduce a mínimo, máximo y
+energía por *salto* (1/100 s). Los saltos se acumulan en un número fijo de
+tramos (``BIN_FACTOR`` por columna y al menos ``MIN_BINS``); cuando se
+llenan, se fusionan de dos en dos y cada tramo pasa a cubrir el doble de
+saltos. Así la memoria por
+pista es un bloque de PCM más esos tramos, sea cual sea la duración, y no
+hace falta conocerla de antemano. Al terminar, los tramos se agrupan en
+``columns`` columnas.
+
+Los valores se cuantizan a un byte (mínimo/máximo como ``int8``, RMS como
+``uint8``) y se guardan en ``CACHE_DIR`` en un archivo binario pequeño por
+pista, con una huella del contenido como clave: un archivo renombrado o
+movido sigue encontrando su caché. Leer una forma de onda guardada no
+necesita ni ffmpeg ni NumPy.
+
+NumPy es una dependencia opcional (``pip install .[waveform]``) que solo se
+importa cuando de verdad hay que calcular una forma de onda.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..utils import metrics
+from ..utils.logger import get_logger
+
+logger = get_logger()
+
+CACHE_DIR = Path.home() / ".conversor_audio" / "waveforms"
+DEFAULT_COLUMNS = 400
+SAMPLE_RATE = 22050
+HOPS_PER_SECOND = 100
+CHUNK_HOPS = 512
+BIN_FACTOR = 8
+MIN_BINS = 8192
+FINGERPRINT_BYTES = 64 * 1024
+
+_HEADER = struct.Struct("<4sHId")  # firma, versión, columnas, duración
+_MAGIC = b"CWAV"
+_VERSION = 1
+
+
+class WaveformError(RuntimeError):
+    """Se lanza cuando no se puede calcular una forma de onda."""
+
+
+@dataclass
+class Waveform:
+    """Vista general cuantizada: ``minimum``/``maximum`` en -127..127, ``rms`` en 0..255."""
+
+    duration: float
+    minimum: array
+    maximum: array
+    rms: array
+
+    def __len__(self) -> int:
+        return len(self.rms)
+
+    def to_bytes(self) -> bytes:
+        return b"".join(
+            (
+                _HEADER.pack(_MAGIC, _VERSION, len(self), self.duration),
+                self.minimum.tobytes(),
+                self.maximum.tobytes(),
+                self.rms.tobytes(),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Waveform":
+        if len(data) < _HEADER.size:
+            raise ValueError("Waveform truncada")
+        magic, version, columns, duration = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or len(data) != _HEADER.size + 3 * columns:
+            raise ValueError("Formato de waveform no reconocido")
+        body = _HEADER.size
+        return cls(
+            duration=duration,
+            minimum=array("b", data[body : body + columns]),
+            maximum=array("b", data[body + columns : body + 2 * columns]),
+            rms=array("B", data[body + 2 * columns :]),
+        )
+
+
+def fingerprint(path: Path) -> str:
+    """Huella del contenido: tamaño más los primeros y últimos 64 KB, con BLAKE2b."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        digest.update(size.to_bytes(8, "little"))
+        digest.update(handle.read(FINGERPRINT_BYTES))
+        if size > 2 * FINGERPRINT_BYTES:
+            handle.seek(-FINGERPRINT_BYTES, os.SEEK_END)
+            digest.update(handle.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+class WaveformCache:
+    """Archivos binarios de formas de onda en ``directory``, uno por huella y número de columnas.
+
+    Las huellas se memorizan por ``(path, mtime, size)``: consultar de nuevo
+    un archivo sin cambios cuesta un ``stat`` y una lectura pequeña.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory or CACHE_DIR
+        self._fingerprints: dict[tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def key(self, path: Path) -> str:
+        stat = path.stat()
+        memo_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._fingerprints.get(memo_key)
+        if cached is None:
+            cached = fingerprint(path)
+            with self._lock:
+                self._fingerprints[memo_key] = cached
+        return cached
+
+    def get(self, path: Path, columns: int = DEFAULT_COLUMNS) -> Waveform | None:
+        try:
+            data = self._entry(self.key(path), columns).read_bytes()
+        except OSError:
+            return None
+        try:
+            return Waveform.from_bytes(data)
+        except ValueError:
+            return None
+
+    def put(self, path: Path, waveform: Waveform) -> None:
+        self.store(self.key(path), waveform)
+
+    def store(self, key: str, waveform: Waveform) -> None:
+        entry = self._entry(key, len(waveform))
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=entry.parent, prefix=f".{entry.name}.", delete=False) as handle:
+            handle.write(waveform.to_bytes())
+        os.replace(handle.name, entry)
+
+    def _entry(self, key: str, columns: int) -> Path:
+        # Dos niveles para no acumular cientos de miles de archivos en una carpeta.
+        return self.directory / key[:2] / f"{key}-{columns}.wf"
+
+
+def build_pcm_command(source: Path, binary: str = "ffmpeg", sample_rate: int = SAMPLE_RATE) -> list[str]:
+    """Comando de ffmpeg que escribe en stdout PCM mono de 16 bits con signo, little-endian."""
+
+    return [
+        binary,
+        "-v",
+        "error",
+        "-nostdin",
+        "-i",
+        str(source),
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-f",
+        "s16le",
+        "-acodec",
+        "pcm_s16le",
+        "-",
+    ]
+
+
+def compute_waveform(
+    source: Path,
+    columns: int = DEFAULT_COLUMNS,
+    binary: str = "ffmpeg",
+    sample_rate: int = SAMPLE_RATE,
+) -> Waveform:
+    """Decodifica ``source`` con ffmpeg y lo reduce a ``columns`` columnas."""
+
+    np = _numpy()
+    hop = max(1, sample_rate // HOPS_PER_SECOND)
+    hop_bytes = hop * 2
+    chunk_bytes = hop_bytes * CHUNK_HOPS
+    bins = _Bins(np, max(columns * BIN_FACTOR, MIN_BINS))
+    samples = 0
+    remainder = b""
+
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(
+                build_pcm_command(source, binary, sample_rate), stdout=subprocess.PIPE, stderr=errors
+            )
+        except FileNotFoundError as exc:
+            raise WaveformError("FFmpeg no está disponible en el sistema") from exc
+        with process:
+            assert process.stdout is not None
+            while True:
+                chunk = process.stdout.read(chunk_bytes)
+                if not chunk:
+                    break
+                data = remainder + chunk if remainder else chunk
+                usable = len(data) - len(data) % hop_bytes
+                remainder = data[usable:]
+                if usable:
+                    frames = np.frombuffer(data, dtype="<i2", count=usable // 2).reshape(-1, hop)
+                    _reduce(np, frames, bins)
+                    samples += usable // 2
+        if process.returncode != 0:
+            errors.seek(0)
+            message = errors.read().decode("utf-8", errors="ignore").strip()
+            raise WaveformError(message or f"ffmpeg terminó con código {process.returncode}")
+
+    tail = len(remainder) // 2
+    if tail:
+        _reduce(np, np.frombuffer(remainder, dtype="<i2", count=tail).reshape(1, tail), bins)
+        samples += tail
+    return _fold(np, bins, columns, samples / sample_rate)
+
+
+def generate_waveforms(
+    sources: Iterable[Path],
+    columns: int = DEFAULT_COLUMNS,
+    cache: WaveformCache | None = None,
+    binary: str = "ffmpeg",
+    workers: int | None = None,
+) -> dict[Path, Waveform | None]:
+    """Devuelve la forma de onda de cada archivo y calcula las que faltan en un pool de procesos.
+
+    Las que ya están en caché se devuelven sin arrancar ningún proceso. Los
+    fallos se registran en el log y se devuelven como ``None``.
+    """
+
+    cache = cache or WaveformCache()
+    results: dict[Path, Waveform | None] = {}
+    pending: dict[Path, str] = {}
+    for source in sources:
+        source = Path(source)
+        try:
+            key = cache.key(source)
+        except OSError:
+            logger.warning("Archivo de audio no encontrado", extra={"path": str(source)})
+            results[source] = None
+            continue
+        waveform = cache.get(source, columns)
+        if waveform is None:
+            pending[source] = key
+        results[source] = waveform
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or min(len(pending), os.cpu_count() or 1)) as pool:
+            futures = {
+                source: pool.submit(_compute_timed, source, columns, binary) for source in pending
+            }
+            for source, future in futures.items():
+                waveform, error, timings = future.result()
+                if metrics.registry.enabled:
+                    counters = {"files": 1, "bytes": source.stat().st_size} if waveform is not None else {}
+                    metrics.registry.record("waveform", *timings, counters, failed=waveform is None)
+                if waveform is None:
+                    logger.warning("No se pudo generar la waveform", extra={"path": str(source), "error": error})
+                    continue
+                cache.store(pending[source], waveform)
+                results[source] = waveform
+    return results
+
+
+def _compute_timed(
+    source: Path, columns: int, binary: str
+) -> tuple[Waveform | None, str | None, tuple[float, float, float]]:
+    # Se mide dentro del proceso de trabajo: en el padre solo se vería la
+    # espera de cada resultado en orden de envío. Cada trabajador calcula
+    # una pista a la vez, así que la CPU de sus hijos es la de su ffmpeg.
+    wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+    try:
+        waveform, error = compute_waveform(source, columns, binary), None
+    except WaveformError as exc:
+        waveform, error = None, str(exc)
+    timings = (time.perf_counter() - wall, time.process_time() - cpu, _children_cpu() - children)
+    return waveform, error, timings
+
+
+def _children_cpu() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise WaveformError("NumPy no está instalado; instala el extra 'waveform' (pip install .[waveform])") from exc
+    return numpy
+
+
+def _reduce(np: Any, frames: Any, bins: "_Bins") -> None:
+    scaled = frames.astype(np.float32) / 32768.0
+    energy = np.square(scaled, dtype=np.float64).sum(axis=1)
+    bins.add(scaled.min(axis=1), scaled.max(axis=1), energy, frames.shape[1])
+
+
+class _Bins:
+    """Mínimo, máximo, energía y muestras por tramo de saltos, en memoria fija.
+
+    Al llenarse los ``capacity`` tramos se fusionan de dos en dos y ``span``
+    (saltos por tramo) se duplica. Los saltos que aún no completan un tramo
+    se guardan como escalares en ``_partial``.
+    """
+
+    def __init__(self, np: Any, capacity: int) -> None:
+        self.capacity = capacity + capacity % 2
+        self.low = np.empty(self.capacity, np.float32)
+        self.high = np.empty(self.capacity, np.float32)
+        self.energy = np.empty(self.capacity, np.float64)
+        self.samples = np.empty(self.capacity, np.int64)
+        self.size = 0
+        self.span = 1
+        self._partial: list[float] | None = None  # mínimo, máximo, energía, muestras
+        self._partial_hops = 0
+
+    def add(self, low: Any, high: Any, energy: Any, hop_samples: int) -> None:
+        position, total = 0, len(energy)
+        while position < total:
+            if self._partial_hops or total - position < self.span:
+                take = min(self.span - self._partial_hops, total - position)
+                part = slice(position, position + take)
+                values = [
+                    float(low[part].min()), float(high[part].max()), float(energy[part].sum()), take * hop_samples
+                ]
+                if self._partial is not None:
+                    previous = self._partial
+                    values = [min(previous[0], values[0]), max(previous[1], values[1]),
+                              previous[2] + values[2], previous[3] + values[3]]
+                self._partial, self._partial_hops = values, self._partial_hops + take
+                position += take
+                if self._partial_hops == self.span:
+                    self._push(*values)
+                    self._partial, self._partial_hops = None, 0
+                continue
+            count = min((total - position) // self.span, self.capacity - self.size)
+            end = position + count * self.span
+            target = slice(self.size, self.size + count)
+            self.low[target] = low[position:end].reshape(count, self.span).min(axis=1)
+            self.high[target] = high[position:end].reshape(count, self.span).max(axis=1)
+            self.energy[target] = energy[position:end].reshape(count, self.span).sum(axis=1)
+            self.samples[target] = self.span * hop_samples
+            self.size += count
+            position = end
+            self._compact_if_full()
+
+    def finish(self) -> None:
+        if self._partial is not None:
+            self._push(*self._partial)
+            self._partial, self._partial_hops = None, 0
+
+    def _push(self, low: float, high: float, energy: float, samples: float) -> None:
+        self.low[self.size], self.high[self.size] = low, high
+        self.energy[self.size], self.samples[self.size] = energy, samples
+        self.size += 1
+        self._compact_if_full()
+
+    def _compact_if_full(self) -> None:
+        if self.size < self.capacity:
+            return
+        half = self.size // 2
+        self.low[:half] = self.low[: self.size].reshape(half, 2).min(axis=1)
+        self.high[:half] = self.high[: self.size].reshape(half, 2).max(axis=1)
+        self.energy[:half] = self.energy[: self.size].reshape(half, 2).sum(axis=1)
+        self.samples[:half] = self.samples[: self.size].reshape(half, 2).sum(axis=1)
+        self.size = half
+        self.span *= 2
+
+
+def _fold(np: Any, bins: _Bins, columns: int, duration: float) -> Waveform:
+    bins.finish()
+    count = bins.size
+    if not count:
+        return Waveform(duration, array("b", bytes(columns)), array("b", bytes(columns)), array("B", bytes(columns)))
+    edges = np.linspace(0, count, columns + 1).astype(np.int64)
+    starts = np.minimum(edges[:-1], count - 1)
+    energy = np.add.reduceat(bins.energy[:count], starts)
+    samples = np.add.reduceat(bins.samples[:count], starts)
+    rms = np.sqrt(energy / np.maximum(samples, 1))
+    return Waveform(
+        duration=duration,
+        minimum=_quantize(np, np.minimum.reduceat(bins.low[:count], starts), 127, "b", np.int8),
+        maximum=_quantize(np, np.maximum.reduceat(bins.high[:count], starts), 127, "b", np.int8),
+        rms=_quantize(np, rms, 255, "B", np.uint8),
+    )
+
+
+def _quantize(np: Any, values: Any, scale: int, typecode: str, dtype: Any) -> array:
+    low = -scale if typecode == "b" else 0
+    return array(typecode, np.clip(np.rint(values * scale), low, scale).astype(dtype).tobytes())
@@ -0,0 +1,250 @@
+"""CLI sin interfaz gráfica para descargar y convertir audio.
+
+Pensada para servidores y scripts: nunca importa PyQt y solo carga
+``yt_dlp`` cuando se ejecuta una descarga. El progreso se emite en stdout
+como JSON lines (un objeto por línea con la clave ``event``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, TextIO
+
+from .utils import metrics
+
+
+class JsonLinesReporter:
+    """Escribe eventos de progreso como JSON lines."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream or sys.stdout
+
+    def emit(self, event: str, **fields: Any) -> None:
+        payload = {"event": event, "ts": round(time.time(), 3), **fields}
+        self.stream.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+        self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Descarga de SoundCloud y conversión de audio sin interfaz gráfica",
+    )
+    parser.add_argument(
+        "--metrics-json", type=Path, help="Guardar tiempos y contadores por etapa en JSON"
+    )
+    parser.add_argument(
+        "--metrics-prom", type=Path, help="Guardar las métricas en formato de texto de Prometheus"
+    )
+    parser.add_argument("--profile", type=Path, help="Guardar un volcado de cProfile")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    download = subparsers.add_parser("download", help="Descargar una pista o playlist en MP3 320 kbps")
+    download.add_argument("urls", nargs="+", metavar="url", help="Enlaces de SoundCloud")
+    download.add_argument(
+        "-o", "--output-dir", type=Path, default=Path.cwd(), help="Carpeta de destino"
+    )
+    download.add_argument(
+        "--progress-rate",
+        type=float,
+        default=4.0,
+        help="Máximo de eventos de progreso por segundo (0 = sin límite)",
+    )
+    download.add_argument(
+        "--library",
+        type=Path,
+        help="Biblioteca (XML, M3U o JSON) a la que añadir las pistas descargadas",
+    )
+
+    convert = subparsers.add_parser("convert", help="Convertir archivos de audio con FFmpeg")
+    convert.add_argument("sources", type=Path, nargs="+", help="Archivos de entrada")
+    convert.add_argument(
+        "-o", "--output-dir", type=Path, required=True, help="Carpeta de destino"
+    )
+    convert.add_argument(
+        "-f", "--format", choices=["mp3", "wav"], default="mp3", help="Formato de salida"
+    )
+
+    waveform = subparsers.add_parser("waveform", help="Generar waveforms de vista general (requiere NumPy)")
+    waveform.add_argument("sources", type=Path, nargs="+", help="Archivos de audio")
+    waveform.add_argument("--columns", type=int, default=400, help="Columnas por waveform")
+    waveform.add_argument("--cache-dir", type=Path, help="Carpeta de la caché (por defecto ~/.conversor_audio/waveforms)")
+    waveform.add_argument("-j", "--jobs", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+
+    serve = subparsers.add_parser("serve", help="Servicio local con una API HTTP/JSON de trabajos")
+    serve.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto solo localhost)")
+    serve.add_argument("--port", type=int, default=8765, help="Puerto (0 = uno libre)")
+    serve.add_argument("--library-workers", type=int, default=2, help="Conversiones de biblioteca en paralelo")
+    serve.add_argument("--audio-workers", type=int, help="Conversiones de audio en paralelo (por defecto, una por núcleo)")
+    serve.add_argument("--download-workers", type=int, default=2, help="Descargas en paralelo")
+    serve.add_argument(
+        "--token",
+        help="Token exigido en la cabecera X-Conversor-Token (también CONVERSOR_DAEMON_TOKEN); "
+        "por defecto se genera uno y se guarda en ~/.conversor_audio/daemon_token",
+    )
+    return parser
+
+
+def run_download(args: argparse.Namespace, reporter: JsonLinesReporter) -> int:
+    # Importación diferida: yt_dlp es pesado y solo hace falta aquí.
+    from .api.progress import ProgressEvent, ProgressThrottle
+    from .api.soundcloud import SoundCloudDownloader
+
+    def report_progress(events: list[ProgressEvent]) -> None:
+        for event in events:
+            totals = event.totals
+            reporter.emit(
+                "progress",
+                entry=event.entry_id,
+                title=event.title,
+                phase=event.phase,
+                downloaded_bytes=event.downloaded_bytes,
+                total_bytes=event.total_bytes,
+                speed=event.speed,
+                eta=event.eta,
+                postprocessor=event.postprocessor,
+                entries_done=totals.entries_done if totals else None,
+                entries_total=totals.entries_total if totals else None,
+            )
+
+    downloader = SoundCloudDownloader()
+    throttle = ProgressThrottle(report_progress, max_rate=args.progress_rate)
+    reporter.emit("start", command="download", urls=args.urls, output_dir=str(args.output_dir))
+
+    entries: list[tuple[Path, dict[str, Any]]] = []
+    failed = 0
+    # Una sola sesión para todas las URLs: yt-dlp se inicializa una vez.
+    with downloader.session() as session:
+        for url in args.urls:
+            try:
+                downloaded = session.download_entries(url, args.output_dir, progress=throttle)
+            except Exception as exc:
+                throttle.flush()
+                failed += 1
+                reporter.emit("error", url=url, message=str(exc))
+                continue
+            throttle.flush()
+            entries.extend(downloaded)
+            for path, info in downloaded:
+                reporter.emit("file", url=url, path=str(path), title=info.get("title"))
+
+    if args.library and entries:
+        from .api.ingest import ingest_downloads
+
+        tracks = ingest_downloads(entries, args.library)
+        reporter.emit("library", path=str(args.library), added=len(tracks))
+
+    reporter.emit(
+        "done", files=len(entries), failed=failed, retries=downloader.retry_stats.as_dict()
+    )
+    return 1 if failed else 0
+
+
+def run_convert(args: argparse.Namespace, reporter: JsonLinesReporter) -> int:
+    from .audio.conversion import ConversionError, ConversionResult, bulk_convert
+
+    total = len(args.sources)
+    reporter.emit("start", command="convert", total=total, format=args.format)
+    done = 0
+
+    def on_result(result: ConversionResult) -> None:
+        nonlocal done
+        done += 1
+        reporter.emit(
+            "file",
+            index=done,
+            total=total,
+            source=str(result.source),
+            destination=str(result.destination),
+            success=result.success,
+            error=result.error,
+        )
+
+    try:
+        results = bulk_convert(args.sources, args.output_dir, args.format, on_result=on_result)
+    except ConversionError as exc:
+        # FFmpeg ausente o sin codificador: se aborta antes del primer archivo.
+        reporter.emit("error", message=str(exc))
+        return 1
+    failed = sum(1 for result in results if not result.success)
+    reporter.emit("done", total=total, failed=failed)
+    return 1 if failed else 0
+
+
+def run_waveform(args: argparse.Namespace, reporter: JsonLinesReporter) -> int:
+    from .audio.capabilities import CapabilityError, probe_ffmpeg
+    from .audio.waveform import WaveformCache, WaveformError, generate_waveforms
+
+    reporter.emit("start", command="waveform", total=len(args.sources), columns=args.columns)
+    try:
+        binary = probe_ffmpeg().binary
+        results = generate_waveforms(
+            args.sources, columns=args.columns, cache=WaveformCache(args.cache_dir), binary=binary, workers=args.jobs
+        )
+    except (CapabilityError, WaveformError) as exc:
+        reporter.emit("error", message=str(exc))
+        return 1
+    for source, result in results.items():
+        reporter.emit(
+            "file",
+            source=str(source),
+            success=result is not None,
+            duration=result.duration if result is not None else None,
+        )
+    failed = sum(1 for result in results.values() if result is None)
+    reporter.emit("done", total=len(results), failed=failed)
+    return 1 if failed else 0
+
+
+def run_serve(args: argparse.Namespace, reporter: JsonLinesReporter) -> int:
+    import os
+    import signal
+
+    from .daemon import TOKEN_PATH, create_server
+
+    workers = {"library": args.library_workers, "download": args.download_workers}
+    if args.audio_workers:
+        workers["audio"] = args.audio_workers
+    token = args.token or os.environ.get("CONVERSOR_DAEMON_TOKEN")
+    server = create_server(args.host, args.port, workers=workers, token=token)
+    server.manager.warm_up()
+    reporter.emit(
+        "listening", url=server.url, workers=server.manager.workers, token_file=None if token else str(TOKEN_PATH)
+    )
+    thread = threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True)
+    thread.start()
+    if threading.current_thread() is threading.main_thread():
+        # SIGTERM (systemd, docker stop) se trata como Ctrl+C: cierre ordenado.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    reporter.emit("done", jobs=server.manager.counts())
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    reporter = JsonLinesReporter()
+
+    with metrics.collect(args.metrics_json, args.metrics_prom, args.profile):
+        if args.command == "download":
+            return run_download(args, reporter)
+        if args.command == "waveform":
+            return run_waveform(args, reporter)
+        if args.command == "serve":
+            return run_serve(args, reporter)
+        return run_convert(args, reporter)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
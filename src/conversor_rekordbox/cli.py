@@ -1,27 +1,114 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
-from .converter import Format, convert_library
+from .converter import Format, UsageError, convert_library, fan_out_library, merge_libraries
+from .formats.registry import registry
+from .utils import metrics
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Convierte bibliotecas entre Rekordbox, Serato y Engine DJ",
     )
-    parser.add_argument("input", type=Path, help="Archivo de entrada")
+    parser.add_argument("input", type=Path, help="Archivo de entrada o carpeta de audio a escanear")
     parser.add_argument("output", type=Path, help="Archivo de salida")
     parser.add_argument(
         "--input-format",
-        choices=[f.value for f in Format],
-        help="Forzar el formato de entrada",
+        metavar="FORMATO",
+        help=(
+            f"Forzar el formato de entrada ({', '.join(f.value for f in Format)} o uno de un plugin); "
+            "con --merge, el de la entrada principal"
+        ),
     )
     parser.add_argument(
         "--output-format",
-        choices=[f.value for f in Format],
+        metavar="FORMATO",
         help="Forzar el formato de salida",
     )
+    parser.add_argument(
+        "--also",
+        action="append",
+        default=[],
+        type=Path,
+        metavar="SALIDA",
+        help="Escribir también esta salida (formato según la extensión) leyendo la entrada una sola vez; se puede repetir",
+    )
+    parser.add_argument(
+        "--merge",
+        action="append",
+        default=[],
+        type=Path,
+        metavar="BIBLIOTECA",
+        help="Fusionar otra biblioteca con la de entrada (se puede repetir; la primera tiene prioridad)",
+    )
+    parser.add_argument(
+        "--prefer",
+        choices=["first", "last"],
+        default="first",
+        help="Qué entrada gana cuando un campo difiere al fusionar (rating siempre toma el mayor)",
+    )
+    parser.add_argument(
+        "-q",
+        "--query",
+        help='Exportar solo las pistas que cumplan la consulta, p. ej. "genre:house bpm:120..128"',
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Eliminar pistas duplicadas (misma ruta o mismo artista/título y duración)",
+    )
+    parser.add_argument(
+        "--relocate",
+        action="append",
+        default=[],
+        metavar="ORIGEN=DESTINO",
+        help="Reescribir el prefijo de las rutas (se puede repetir)",
+    )
+    parser.add_argument(
+        "--missing-report",
+        type=Path,
+        help="Comprobar que los archivos existen y guardar las rutas ausentes en este archivo",
+    )
+    parser.add_argument(
+        "--sort",
+        nargs="?",
+        const="artist,album,title",
+        metavar="CAMPOS",
+        help="Ordenar la salida por estos campos separados por comas (por defecto artist,album,title)",
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="CAMPO",
+        help="Escribir un archivo por cada valor del campo (p. ej. genre) o por playlist; la salida es una carpeta",
+    )
+    parser.add_argument(
+        "--scan-cache",
+        type=Path,
+        metavar="ARCHIVO",
+        help="Caché del escaneo de carpetas; al repetirlo solo se leen los archivos modificados",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Vigilar la carpeta de entrada y aplicar altas, bajas y cambios a la salida hasta Ctrl+C",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=5.0,
+        metavar="SEGUNDOS",
+        help="Segundos entre sondeos con --watch",
+    )
+    parser.add_argument(
+        "--metrics-json", type=Path, help="Guardar tiempos y contadores por etapa en JSON"
+    )
+    parser.add_argument(
+        "--metrics-prom", type=Path, help="Guardar las métricas en formato de texto de Prometheus"
+    )
+    parser.add_argument("--profile", type=Path, help="Guardar un volcado de cProfile")
     return parser
 
 
@@ -29,19 +116,120 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
-    input_format = Format(args.input_format) if args.input_format else None
-    output_format = Format(args.output_format) if args.output_format else None
+    relocate: dict[str, str] = {}
+    for rule in args.relocate:
+        source, sep, target = rule.partition("=")
+        if not sep or not source or not target:
+            parser.error(f"Regla de --relocate no válida: {rule!r} (se espera ORIGEN=DESTINO)")
+        relocate[source] = target
 
-    convert_library(
-        input_path=args.input,
-        output_path=args.output,
-        input_format=input_format,
-        output_format=output_format,
-    )
+    # Los plugins solo se buscan si se pide un formato que no está incluido.
+    for name in (args.input_format, args.output_format):
+        if name and name not in registry:
+            parser.error(f"Formato desconocido: {name} (disponibles: {', '.join(registry.names())})")
+    input_format = args.input_format
+    output_format = args.output_format
+
+    order_by = None
+    if args.sort:
+        from .library.order import parse_order
+
+        try:
+            order_by = parse_order(args.sort)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    with metrics.collect(args.metrics_json, args.metrics_prom, args.profile):
+        stages = dict(
+            query=args.query,
+            dedup=args.dedup,
+            relocate=relocate,
+            missing_report=args.missing_report,
+            order_by=order_by,
+        )
+        try:
+            if args.also:
+                if args.merge or args.watch or args.group_by:
+                    parser.error("--also no se puede combinar con --merge, --watch ni --group-by")
+                fan_out_library(
+                    args.input,
+                    [args.output, *args.also],
+                    input_format=input_format,
+                    output_formats=[output_format, *([None] * len(args.also))],
+                    scan_cache=args.scan_cache,
+                    **stages,
+                )
+            elif args.watch:
+                return _watch(parser, args, output_format)
+            elif args.merge:
+                from .library.merge import MergePolicy
+
+                merge_libraries(
+                    [args.input, *args.merge],
+                    args.output,
+                    output_format=output_format,
+                    policy=MergePolicy(default=args.prefer),
+                    input_format=input_format,
+                    group_by=args.group_by,
+                    **stages,
+                )
+            else:
+                convert_library(
+                    input_path=args.input,
+                    output_path=args.output,
+                    input_format=input_format,
+                    output_format=output_format,
+                    scan_cache=args.scan_cache,
+                    group_by=args.group_by,
+                    **stages,
+                )
+        except UsageError as exc:  # formato no inferible u opciones incompatibles
+            parser.error(str(exc))
+        except ValueError as exc:
+            from .library.index import QueryError
+
+            if isinstance(exc, QueryError):
+                parser.error(str(exc))
+            # Datos de entrada no válidos (p. ej. un XML sin colección): no es un error de uso.
+            print(f"Error: {exc}", file=sys.stderr)
+            return 1
 
     print(f"Conversión completada: {args.output}")
     return 0
 
 
+def _watch(parser: argparse.ArgumentParser, args: argparse.Namespace, output_format: str | None) -> int:
+    from .library.watcher import LibraryWatcher
+
+    if not args.input.is_dir():
+        parser.error("--watch necesita una carpeta como entrada")
+    # El vigilante aplica altas, bajas y cambios tal cual; no filtra, reubica ni ordena.
+    unsupported = {
+        "--query": args.query,
+        "--dedup": args.dedup,
+        "--relocate": args.relocate,
+        "--missing-report": args.missing_report,
+        "--sort": args.sort,
+        "--merge": args.merge,
+        "--group-by": args.group_by,
+    }
+    used = [name for name, value in unsupported.items() if value]
+    if used:
+        parser.error(f"--watch no se puede combinar con {', '.join(used)}")
+    watcher = LibraryWatcher(
+        [args.input],
+        args.output,
+        library_format=output_format,
+        index_path=args.scan_cache,
+        interval=args.watch_interval,
+    )
+    print(f"Vigilando {args.input} → {args.output} (Ctrl+C para salir)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
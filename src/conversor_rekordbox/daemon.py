@@ -0,0 +1,682 @@
+"""Servicio local con una API HTTP/JSON de trabajos.
+
+Evita arrancar un intérprete por cada conversión: el proceso queda vivo y
+conserva entre trabajos los módulos de formatos ya importados, la sonda de
+FFmpeg (memoizada por binario) y las instancias de ``YoutubeDL`` de una
+:class:`~conversor_rekordbox.api.soundcloud.SoundCloudSession` compartida.
+Por defecto escucha solo en ``127.0.0.1``.
+
+Toda petición debe llevar la cabecera ``X-Conversor-Token`` con el token del
+servicio (por defecto se genera una vez y se guarda en :data:`TOKEN_PATH`,
+legible solo por el usuario), un ``Host`` local y, si trae ``Origin``, que
+también sea local; ``POST`` exige ``Content-Type: application/json``. Así una
+página web abierta en el navegador no puede encolar trabajos que escriban
+archivos del usuario.
+
+Endpoints (todas las respuestas son JSON):
+
+- ``GET /health``: estado del servicio y número de trabajos por estado.
+- ``POST /jobs`` con ``{"kind": "library" | "audio" | "download", "params": {...}}``:
+  valida los parámetros, encola el trabajo y responde ``202``.
+- ``GET /jobs`` (admite ``?status=running``) y ``GET /jobs/<id>``.
+- ``DELETE /jobs/<id>``: cancela el trabajo.
+
+Cada tipo de trabajo tiene su propio pool de hilos persistente, de modo que
+una descarga larga no retrasa las conversiones. La cancelación es
+cooperativa: un trabajo en cola se descarta, una conversión de audio se
+detiene antes del siguiente archivo y una descarga en el siguiente aviso de
+progreso de yt-dlp. Una conversión de biblioteca ya iniciada no se puede
+interrumpir (``409``).
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Mapping
+from urllib.parse import parse_qs, urlsplit
+
+from .utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from .api.soundcloud import SoundCloudDownloader, SoundCloudSession
+
+logger = get_logger()
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = {"library": 2, "audio": os.cpu_count() or 2, "download": 2}
+JOB_KINDS = tuple(DEFAULT_WORKERS)
+MAX_BODY_BYTES = 1024 * 1024
+MAX_FINISHED_JOBS = 1_000
+TOKEN_HEADER = "X-Conversor-Token"
+TOKEN_PATH = Path.home() / ".conversor_audio" / "daemon_token"
+LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = frozenset({DONE, FAILED, CANCELLED})
+
+# Tipos de trabajo que comprueban la cancelación mientras se ejecutan.
+_INTERRUPTIBLE = frozenset({"audio", "download"})
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando se ha pedido cancelarlo."""
+
+
+class JobConflict(RuntimeError):
+    """El trabajo ya no se puede cancelar."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict[str, Any]
+    status: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    progress: dict[str, Any] = field(default_factory=dict)
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Future | None = field(default=None, repr=False)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def update_progress(self, **fields: Any) -> None:
+        # Se sustituye el diccionario en lugar de mutarlo: los hilos HTTP lo
+        # serializan sin bloqueo.
+        self.progress = {**self.progress, **fields}
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+        }
+
+
+Runner = Callable[[Job], dict[str, Any]]
+
+
+class JobManager:
+    """Cola de trabajos con un pool de hilos persistente por tipo.
+
+    ``workers`` ajusta el tamaño de cada pool (ver :data:`DEFAULT_WORKERS`).
+    Se conservan como mucho ``max_finished`` trabajos terminados; los más
+    antiguos se olvidan. ``downloader`` permite inyectar un
+    :class:`SoundCloudDownloader` (por defecto se crea al primer trabajo de
+    descarga, que es cuando se importa yt-dlp).
+    """
+
+    def __init__(
+        self,
+        workers: Mapping[str, int] | None = None,
+        max_finished: int = MAX_FINISHED_JOBS,
+        downloader: "SoundCloudDownloader | None" = None,
+    ) -> None:
+        sizes = {**DEFAULT_WORKERS, **(workers or {})}
+        unknown = sizes.keys() - set(JOB_KINDS)
+        if unknown:
+            raise ValueError(f"Tipo de trabajo desconocido: {', '.join(sorted(unknown))}")
+        self.workers = sizes
+        self.max_finished = max_finished
+        self._pools = {
+            kind: ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix=f"daemon-{kind}")
+            for kind, size in sizes.items()
+        }
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._downloader = downloader
+        self._session: "SoundCloudSession | None" = None
+        self._session_lock = threading.Lock()
+
+    def warm_up(self) -> None:
+        """Importa los formatos incluidos y sondea FFmpeg antes del primer trabajo."""
+
+        from . import converter  # noqa: F401
+        from .audio.capabilities import CapabilityError, probe_ffmpeg
+        from .formats.registry import BUILTIN_FORMATS, registry
+
+        for spec in BUILTIN_FORMATS:
+            registry.module(spec.name)
+        try:
+            probe_ffmpeg()
+        except CapabilityError:
+            logger.warning("FFmpeg no disponible: los trabajos de audio fallarán")
+
+    def submit(self, kind: str, params: Mapping[str, Any]) -> Job:
+        """Valida ``params`` y encola el trabajo; lanza ``ValueError`` si no son válidos."""
+
+        prepare = _PREPARERS.get(kind)
+        if prepare is None:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind!r} (disponibles: {', '.join(JOB_KINDS)})")
+        if not isinstance(params, Mapping):
+            raise ValueError("'params' debe ser un objeto JSON")
+        runner = prepare(self, dict(params))
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=dict(params))
+        with self._lock:
+            self._jobs[job.id] = job
+            job._future = self._pools[kind].submit(self._run, job, runner)
+        logger.info("Trabajo encolado", extra={"job": job.id, "kind": kind})
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, status: str | None = None) -> list[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if status is None or job.status == status]
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED, CANCELLED), 0)
+        for job in self.jobs():
+            counts[job.status] += 1
+        return counts
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Cancela un trabajo; ``None`` si no existe, :class:`JobConflict` si no se puede."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in FINISHED:
+                raise JobConflict(f"El trabajo ya ha terminado ({job.status})")
+            if job.status == RUNNING and job.kind not in _INTERRUPTIBLE:
+                raise JobConflict("Una conversión de biblioteca en curso no se puede cancelar")
+            job._cancel.set()
+            if job._future is not None and job._future.cancel():
+                self._finish(job, CANCELLED)
+        return job
+
+    def download_session(self) -> "SoundCloudSession":
+        """Sesión de yt-dlp compartida por todas las descargas del servicio."""
+
+        with self._session_lock:
+            if self._session is None:
+                from .api.soundcloud import SoundCloudDownloader
+
+                downloader = self._downloader or SoundCloudDownloader()
+                self._session = downloader.session(pool_size=max(1, self.workers["download"]))
+            return self._session
+
+    def close(self, wait: bool = True) -> None:
+        """Cancela lo pendiente, espera a los trabajos en curso y libera la sesión."""
+
+        for job in self.jobs():
+            if job.status not in FINISHED:
+                try:
+                    self.cancel(job.id)
+                except JobConflict:
+                    pass
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _run(self, job: Job, runner: Runner) -> None:
+        with self._lock:
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+                return
+            job.status = RUNNING
+            job.started = time.time()
+        try:
+            result = runner(job)
+        except JobCancelled:
+            status, result, error = CANCELLED, None, None
+        except Exception as exc:
+            logger.warning("Trabajo fallido", extra={"job": job.id, "kind": job.kind, "error": str(exc)})
+            status, result, error = FAILED, None, str(exc) or type(exc).__name__
+        else:
+            status, error = DONE, None
+        with self._lock:
+            job.result = result
+            job.error = error
+            self._finish(job, status)
+
+    def _finish(self, job: Job, status: str) -> None:
+        # Llamar con self._lock tomado.
+        job.status = status
+        job.finished = time.time()
+        finished = [key for key, item in self._jobs.items() if item.status in FINISHED]
+        for key in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[key]
+
+
+def _library_job(manager: JobManager, params: dict[str, Any]) -> Runner:
+    from .formats.registry import registry
+    from .library.order import DEFAULT_ORDER, SORTABLE_FIELDS, parse_order
+
+    _check_keys(
+        params,
+        {
+            "input", "output", "input_format", "output_format", "query", "dedup", "relocate",
+            "missing_report", "scan_cache", "sort", "group_by", "also", "merge", "prefer",
+        },
+    )
+    input_path = _text(params, "input", required=True)
+    output_path = _text(params, "output", required=True)
+    input_format = _text(params, "input_format")
+    output_format = _text(params, "output_format")
+    for name in (input_format, output_format):
+        if name and name not in registry:
+            raise ValueError(f"Formato desconocido: {name} (disponibles: {', '.join(registry.names())})")
+    relocate = params.get("relocate") or {}
+    if not isinstance(relocate, dict) or not all(
+        isinstance(key, str) and isinstance(value, str) for key, value in relocate.items()
+    ):
+        raise ValueError("'relocate' debe ser un objeto {origen: destino}")
+    sort = params.get("sort")
+    if sort is True:
+        order_by = DEFAULT_ORDER
+    elif isinstance(sort, list):
+        order_by = parse_order(",".join(map(str, sort)))
+    elif isinstance(sort, str):
+        order_by = parse_order(sort)
+    elif sort in (None, False):
+        order_by = None
+    else:
+        raise ValueError("'sort' debe ser true, una cadena o una lista de campos")
+    also = _texts(params, "also")
+    merge = _texts(params, "merge")
+    group_by = _text(params, "group_by")
+    if group_by not in (None, "playlist") and group_by not in SORTABLE_FIELDS:
+        raise ValueError(f"Campo de agrupación no válido: {group_by}")
+    prefer = _text(params, "prefer") or "first"
+    if also and (merge or group_by):
+        raise ValueError("'also' no se puede combinar con 'merge' ni 'group_by'")
+    if merge:
+        from .library.merge import MergePolicy
+
+        MergePolicy(default=prefer).resolvers()  # ValueError si la regla no existe
+        if group_by == "playlist":
+            raise ValueError("La agrupación por playlist no está disponible al fusionar bibliotecas.")
+    query = _text(params, "query")
+    if query:
+        from .library.index import parse_query
+
+        parse_query(query)  # QueryError (ValueError) si está mal formada
+    dedup = params.get("dedup", False)
+    if not isinstance(dedup, bool):
+        raise ValueError("'dedup' debe ser true o false")
+    stages = dict(
+        query=query,
+        dedup=dedup,
+        relocate=relocate,
+        missing_report=_text(params, "missing_report"),
+        order_by=order_by,
+    )
+
+    def run(job: Job) -> dict[str, Any]:
+        from . import converter
+
+        if also:
+            outputs = converter.fan_out_library(
+                input_path,
+                [output_path, *also],
+                input_format=input_format,
+                output_formats=[output_format, *([None] * len(also))],
+                scan_cache=_text(params, "scan_cache"),
+                **stages,
+            )
+            return {"outputs": [str(path) for path in outputs]}
+        if merge:
+            from .library.merge import MergePolicy
+
+            output = converter.merge_libraries(
+                [input_path, *merge],
+                output_path,
+                output_format=output_format,
+                policy=MergePolicy(default=prefer),
+                input_format=input_format,
+                group_by=group_by,
+                **stages,
+            )
+        else:
+            output = converter.convert_library(
+                input_path,
+                output_path,
+                input_format=input_format,
+                output_format=output_format,
+                scan_cache=_text(params, "scan_cache"),
+                group_by=group_by,
+                **stages,
+            )
+        return {"outputs": [str(output)]}
+
+    return run
+
+
+def _audio_job(manager: JobManager, params: dict[str, Any]) -> Runner:
+    _check_keys(params, {"sources", "output_dir", "format"})
+    sources = [Path(source) for source in _texts(params, "sources", required=True)]
+    output_dir = Path(_text(params, "output_dir", required=True))
+    fmt = params.get("format", "mp3")
+    if fmt not in ("mp3", "wav"):
+        raise ValueError(f"Formato de audio no soportado: {fmt!r} (mp3 o wav)")
+
+    def run(job: Job) -> dict[str, Any]:
+        from .audio import conversion
+
+        # La sonda de FFmpeg se memoiza: tras el primer trabajo es una consulta en memoria.
+        binary, encoder = conversion.resolve_encoder(fmt)
+        files: list[dict[str, Any]] = []
+        failed = 0
+        job.update_progress(done=0, total=len(sources), failed=0)
+        for index, source in enumerate(sources, start=1):
+            job.check_cancelled()
+            try:
+                result = conversion.convert_file(source, output_dir, fmt, encoder=encoder, binary=binary)
+            except conversion.ConversionError as exc:
+                failed += 1
+                files.append({"source": str(source), "success": False, "error": str(exc)})
+            else:
+                files.append({"source": str(source), "destination": str(result.destination), "success": True})
+            job.update_progress(done=index, failed=failed)
+        return {"files": files, "failed": failed}
+
+    return run
+
+
+def _download_job(manager: JobManager, params: dict[str, Any]) -> Runner:
+    _check_keys(params, {"urls", "output_dir", "library"})
+    urls = _texts(params, "urls", required=True)
+    output_dir = Path(_text(params, "output_dir", required=True))
+    library = _text(params, "library")
+
+    def run(job: Job) -> dict[str, Any]:
+        session = manager.download_session()
+
+        def on_progress(event: Any) -> None:
+            # Lanzar desde el hook de yt-dlp interrumpe la descarga en curso.
+            job.check_cancelled()
+            job.update_progress(
+                url=current,
+                entry=event.entry_id,
+                title=event.title,
+                phase=event.phase,
+                downloaded_bytes=event.downloaded_bytes,
+                total_bytes=event.total_bytes,
+            )
+
+        entries: list[tuple[Path, dict[str, Any]]] = []
+        files: list[dict[str, Any]] = []
+        errors: list[dict[str, str]] = []
+        for current in urls:
+            job.check_cancelled()
+            try:
+                downloaded = session.download_entries(current, output_dir, progress=on_progress)
+            except JobCancelled:
+                raise
+            except Exception as exc:
+                errors.append({"url": current, "message": str(exc)})
+                continue
+            entries.extend(downloaded)
+            files.extend({"url": current, "path": str(path), "title": info.get("title")} for path, info in downloaded)
+        # yt-dlp puede envolver la excepción del hook: se vuelve a comprobar.
+        job.check_cancelled()
+        result: dict[str, Any] = {"files": files, "errors": errors}
+        if library and entries:
+            from .api.ingest import ingest_downloads
+
+            result["library_added"] = len(ingest_downloads(entries, library))
+        return result
+
+    return run
+
+
+_PREPARERS: dict[str, Callable[[JobManager, dict[str, Any]], Runner]] = {
+    "library": _library_job,
+    "audio": _audio_job,
+    "download": _download_job,
+}
+
+
+def _check_keys(params: Mapping[str, Any], allowed: set[str]) -> None:
+    unknown = sorted(params.keys() - allowed)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos: {', '.join(unknown)}")
+
+
+def _text(params: Mapping[str, Any], key: str, required: bool = False) -> str | None:
+    value = params.get(key)
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"Falta el parámetro '{key}'")
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"'{key}' debe ser una cadena")
+    return value
+
+
+def _texts(params: Mapping[str, Any], key: str, required: bool = False) -> list[str]:
+    values = params.get(key) or []
+    if isinstance(values, str) or not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"'{key}' debe ser una lista de cadenas")
+    if required and not values:
+        raise ValueError(f"Falta el parámetro '{key}'")
+    return values
+
+
+class DaemonServer(ThreadingHTTPServer):
+    """Servidor HTTP de la API de trabajos; ``close`` lo detiene y libera los pools."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], manager: JobManager, token: str) -> None:
+        if not token:
+            raise ValueError("El servicio necesita un token")
+        super().__init__(address, _Handler)
+        self.manager = manager
+        self.token = token
+        self.allowed_hosts = LOCAL_HOSTS | ({address[0]} if address[0] not in ("", "0.0.0.0", "::") else set())
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+        self.manager.close()
+
+
+def create_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: Mapping[str, int] | None = None,
+    token: str | None = None,
+    manager: JobManager | None = None,
+) -> DaemonServer:
+    """Crea el servidor (``port=0`` elige un puerto libre); se arranca con ``serve_forever``.
+
+    Sin ``token`` se usa el de :func:`load_token`.
+    """
+
+    return DaemonServer((host, port), manager or JobManager(workers), token or load_token())
+
+
+def load_token(path: Path | None = None) -> str:
+    """Devuelve el token guardado en ``path`` (por defecto :data:`TOKEN_PATH`), creándolo si no existe."""
+
+    path = path or TOKEN_PATH
+    try:
+        token = path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        token = ""
+    if token:
+        return token
+    path.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    try:
+        # O_EXCL: si otro proceso lo crea a la vez, gana el primero.
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_text(encoding="utf-8").strip()
+    with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+        handle.write(token + "\n")
+    return token
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: DaemonServer
+    server_version = "conversor-daemon"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        parts = _segments(url.path)
+        manager = self.server.manager
+        if parts == ["health"]:
+            self._send(HTTPStatus.OK, {"status": "ok", "jobs": manager.counts(), "workers": manager.workers})
+        elif parts == ["jobs"]:
+            status = parse_qs(url.query).get("status", [None])[0]
+            self._send(HTTPStatus.OK, {"jobs": [job.as_dict() for job in manager.jobs(status)]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = manager.get(parts[1])
+            if job is None:
+                self._error(HTTPStatus.NOT_FOUND, "Trabajo no encontrado")
+            else:
+                self._send(HTTPStatus.OK, job.as_dict())
+        else:
+            self._error(HTTPStatus.NOT_FOUND, "Ruta no encontrada")
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        if _segments(urlsplit(self.path).path) != ["jobs"]:
+            self._error(HTTPStatus.NOT_FOUND, "Ruta no encontrada")
+            return
+        content_type = self.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type != "application/json":
+            self.close_connection = True
+            self._error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Se espera Content-Type: application/json")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._error(HTTPStatus.BAD_REQUEST, "Content-Length no válido")
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo demasiado grande")
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._error(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido")
+            return
+        if not isinstance(body, dict) or not isinstance(body.get("kind"), str):
+            self._error(HTTPStatus.BAD_REQUEST, "Se espera {\"kind\": ..., \"params\": {...}}")
+            return
+        try:
+            job = self.server.manager.submit(body["kind"], body.get("params") or {})
+        except ValueError as exc:
+            self._error(HTTPStatus.BAD_REQUEST, str(exc))
+            return
+        self._send(HTTPStatus.ACCEPTED, job.as_dict(), location=f"/jobs/{job.id}")
+
+    def do_DELETE(self) -> None:
+        if not self._authorized():
+            return
+        parts = _segments(urlsplit(self.path).path)
+        if len(parts) != 2 or parts[0] != "jobs":
+            self._error(HTTPStatus.NOT_FOUND, "Ruta no encontrada")
+            return
+        try:
+            job = self.server.manager.cancel(parts[1])
+        except JobConflict as exc:
+            self._error(HTTPStatus.CONFLICT, str(exc))
+            return
+        if job is None:
+            self._error(HTTPStatus.NOT_FOUND, "Trabajo no encontrado")
+        else:
+            self._send(HTTPStatus.OK, job.as_dict())
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("Petición HTTP", extra={"client": self.client_address[0], "request": format % args})
+
+    def _authorized(self) -> bool:
+        # Host y Origin frenan el DNS rebinding y las peticiones desde páginas web.
+        allowed = self.server.allowed_hosts
+        if _hostname(self.headers.get("Host")) not in allowed:
+            self.close_connection = True
+            self._error(HTTPStatus.FORBIDDEN, "Host no permitido")
+            return False
+        origin = self.headers.get("Origin")
+        if origin is not None and _hostname(urlsplit(origin).netloc) not in allowed:
+            self.close_connection = True
+            self._error(HTTPStatus.FORBIDDEN, "Origen no permitido")
+            return False
+        if not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode(), self.server.token.encode()):
+            self.close_connection = True
+            self._error(HTTPStatus.UNAUTHORIZED, f"Falta la cabecera {TOKEN_HEADER} o no es válida")
+            return False
+        return True
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def _send(self, status: HTTPStatus, payload: Any, location: str | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _segments(path: str) -> list[str]:
+    return [part for part in path.split("/") if part]
+
+
+def _hostname(netloc: str | None) -> str | None:
+    if not netloc:
+        return None
+    try:
+        return urlsplit(f"//{netloc}").hostname
+    except ValueError:
+        return None
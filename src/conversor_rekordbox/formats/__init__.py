@@ -1,5 +1,23 @@
-"""Implementaciones de formatos soportados por el conversor."""
+"""Implementaciones de formatos soportados por el conversor.
 
-from . import enginedj, rekordbox, serato
+Los submódulos se importan al acceder a ellos por primera vez
+(``formats.rekordbox``), de modo que importar el paquete no carga ningún
+formato que no se vaya a usar.
+"""
 
-__all__ = ["enginedj", "rekordbox", "serato"]
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+
+__all__ = ["enginedb", "enginedj", "rekordbox", "serato", "seratodb"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(__all__)
@@ -0,0 +1,87 @@
+"""Utilidades para insertar datos cerca del final de un archivo sin reescribirlo."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+BLOCK_SIZE = 64 * 1024
+
+
+def rfind(handle: BinaryIO, needle: bytes, block_size: int = BLOCK_SIZE) -> int | None:
+    """Devuelve el offset de la última aparición de ``needle`` leyendo desde el final."""
+
+    handle.seek(0, os.SEEK_END)
+    position = handle.tell()
+    carry = b""
+    while position > 0:
+        start = max(0, position - block_size)
+        handle.seek(start)
+        chunk = handle.read(position - start) + carry
+        index = chunk.rfind(needle)
+        if index != -1:
+            return start + index
+        # Conservamos el solape por si la aguja cae entre dos bloques.
+        carry = chunk[: len(needle) - 1]
+        position = start
+    return None
+
+
+def find(handle: BinaryIO, needle: bytes, limit: int | None = None, block_size: int = BLOCK_SIZE) -> int | None:
+    """Devuelve el offset de la primera aparición de ``needle`` desde el principio."""
+
+    handle.seek(0)
+    offset = 0
+    carry = b""
+    while limit is None or offset < limit:
+        chunk = handle.read(block_size)
+        if not chunk:
+            return None
+        data = carry + chunk
+        index = data.find(needle)
+        if index != -1:
+            return offset - len(carry) + index
+        carry = data[-(len(needle) - 1):] if len(needle) > 1 else b""
+        offset += len(chunk)
+    return None
+
+
+def splice(handle: BinaryIO, offset: int, payload: bytes, block_size: int = BLOCK_SIZE) -> None:
+    """Inserta ``payload`` en ``offset`` moviendo solo la cola del archivo.
+
+    La cola se desplaza por bloques empezando por el final, así que en
+    memoria hay como mucho un bloque aunque la cola sea grande.
+    """
+
+    handle.seek(0, os.SEEK_END)
+    position = handle.tell()
+    shift = len(payload)
+    while position > offset:
+        start = max(offset, position - block_size)
+        handle.seek(start)
+        chunk = handle.read(position - start)
+        handle.seek(start + shift)
+        handle.write(chunk)
+        position = start
+    handle.seek(offset)
+    handle.write(payload)
+
+
+def replace_range(path: Path, start: int, end: int, payload: bytes) -> None:
+    """Sustituye ``[start, end)`` por ``payload`` con una copia en streaming.
+
+    Se usa cuando el reemplazo cambia de longitud cerca del principio y no se
+    puede parchear en el sitio. El archivo no se interpreta, solo se copia.
+    """
+
+    with path.open("rb") as source, tempfile.NamedTemporaryFile(
+        "wb", dir=path.parent, delete=False, suffix=".tmp"
+    ) as target:
+        target.write(source.read(start))
+        target.write(payload)
+        source.seek(end)
+        shutil.copyfileobj(source, target, BLOCK_SIZE)
+    os.replace(target.name, path)
@@ -0,0 +1,329 @@
+"""Base de datos SQLite de Engine DJ (``Database2/m.db``).
+
+Se leen y escriben las tablas ``Track``, ``Playlist`` y ``PlaylistEntity``
+con las columnas que corresponden a :class:`Track`; al leer una base de
+datos real el resto de columnas se ignora. Las rutas se guardan tal cual
+(Engine admite rutas absolutas y relativas a la carpeta de la base de
+datos); las URI ``file://`` se convierten en rutas locales.
+
+Las escrituras usan ``executemany`` dentro de una única transacción con
+``journal_mode=MEMORY`` y ``synchronous=OFF``; las lecturas recorren un
+cursor con ``fetchmany`` sin materializar el resultado completo.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, Sequence
+
+from ..models import Track
+from ..utils.locations import location_to_path
+from ..utils.metrics import instrumented
+
+SCHEMA_VERSION = (2, 18, 0)
+FETCH_SIZE = 2_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Information (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uuid TEXT,
+    schemaVersionMajor INTEGER,
+    schemaVersionMinor INTEGER,
+    schemaVersionPatch INTEGER,
+    currentPlayedIndiciator INTEGER,
+    lastRekordBoxLibraryImportReadCounter INTEGER
+);
+CREATE TABLE IF NOT EXISTS Track (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    playOrder INTEGER,
+    length INTEGER,
+    bpm INTEGER,
+    year INTEGER,
+    path TEXT,
+    filename TEXT,
+    bitrate INTEGER,
+    bpmAnalyzed REAL,
+    albumArtId INTEGER,
+    fileBytes INTEGER,
+    title TEXT,
+    artist TEXT,
+    album TEXT,
+    genre TEXT,
+    comment TEXT,
+    label TEXT,
+    composer TEXT,
+    remixer TEXT,
+    key INTEGER,
+    rating INTEGER,
+    albumArt TEXT,
+    timeLastPlayed DATETIME,
+    isPlayed BOOLEAN,
+    fileType TEXT,
+    isAnalyzed BOOLEAN,
+    dateCreated DATETIME,
+    dateAdded DATETIME,
+    isAvailable BOOLEAN,
+    isMetadataOfPackedTrackChanged BOOLEAN,
+    isPerfomanceDataOfPackedTrackChanged BOOLEAN,
+    playedIndicator INTEGER,
+    isMetadataImported BOOLEAN,
+    pdbImportKey INTEGER,
+    streamingSource TEXT,
+    uri TEXT,
+    isBeatGridLocked BOOLEAN,
+    originDatabaseUuid TEXT,
+    originTrackId INTEGER,
+    streamingFlags INTEGER,
+    explicitLyrics BOOLEAN,
+    lastEditTime DATETIME
+);
+CREATE INDEX IF NOT EXISTS index_Track_path ON Track (path);
+CREATE TABLE IF NOT EXISTS Playlist (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    parentListId INTEGER,
+    isPersisted BOOLEAN,
+    nextListId INTEGER,
+    lastEditTime DATETIME,
+    isExplicitlyExported BOOLEAN
+);
+CREATE TABLE IF NOT EXISTS PlaylistEntity (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    listId INTEGER,
+    trackId INTEGER,
+    databaseUuid TEXT,
+    nextEntityId INTEGER,
+    membershipReference INTEGER
+);
+"""
+
+_INSERT_TRACK = """
+INSERT INTO Track (
+    id, playOrder, length, bpm, bpmAnalyzed, year, path, filename, title, artist,
+    album, genre, comment, rating, fileType, isAnalyzed, isAvailable,
+    isMetadataImported, dateAdded, originDatabaseUuid, originTrackId
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 1, 1, strftime('%s', 'now'), ?, NULL)
+"""
+
+_SELECT_TRACKS = """
+SELECT id, title, artist, album, genre, length, bpm, bpmAnalyzed, comment, path, year, rating
+FROM Track ORDER BY id
+"""
+
+
+@instrumented("enginedb.load")
+def load(path: Path) -> list[Track]:
+    """Lee la tabla ``Track`` de una base de datos de Engine DJ."""
+    return list(iter_tracks(path))
+
+
+def iter_tracks(path: Path) -> Iterator[Track]:
+    """Recorre las pistas en lotes de :data:`FETCH_SIZE` filas."""
+    with closing(_connect_readonly(path)) as connection:
+        for _, track in _iter_rows(connection):
+            yield track
+
+
+# Nombre común con los demás formatos para leer sin materializar.
+iter_load = iter_tracks
+
+
+def load_playlists(path: Path) -> dict[str, list[Track]]:
+    """Devuelve cada playlist con sus pistas en el orden de ``nextEntityId``."""
+
+    with closing(_connect_readonly(path)) as connection:
+        tracks = dict(_iter_rows(connection))
+        entities: dict[int, dict[int, tuple[int, int]]] = {}
+        for entity_id, list_id, track_id, next_id in connection.execute(
+            "SELECT id, listId, trackId, nextEntityId FROM PlaylistEntity"
+        ):
+            entities.setdefault(list_id, {})[entity_id] = (track_id, next_id)
+
+        playlists: dict[str, list[Track]] = {}
+        for list_id, title in connection.execute("SELECT id, title FROM Playlist ORDER BY id"):
+            order = _ordered(entities.get(list_id, {}))
+            playlists[title] = [tracks[track_id] for track_id in order if track_id in tracks]
+    return playlists
+
+
+@instrumented("enginedb.dump")
+def dump(
+    tracks: Iterable[Track],
+    path: Path,
+    playlists: Mapping[str, Sequence[Track]] | None = None,
+) -> None:
+    """Crea una base de datos nueva con ``tracks`` y, opcionalmente, playlists.
+
+    Las pistas de ``playlists`` se enlazan por identidad con las de
+    ``tracks``; las que no estén en ``tracks`` se añaden a la tabla.
+    """
+
+    path.unlink(missing_ok=True)
+    with closing(_connect_for_import(path)) as connection:
+        with connection:
+            connection.executescript(_SCHEMA)
+            database_uuid = str(uuid.uuid4())
+            major, minor, patch = SCHEMA_VERSION
+            connection.execute(
+                "INSERT INTO Information (uuid, schemaVersionMajor, schemaVersionMinor, schemaVersionPatch, "
+                "currentPlayedIndiciator, lastRekordBoxLibraryImportReadCounter) VALUES (?, ?, ?, ?, 0, 0)",
+                (database_uuid, major, minor, patch),
+            )
+            if not playlists:
+                _insert_tracks(connection, tracks, database_uuid)
+                return
+            # Enlazar por identidad obliga a conservar las pistas.
+            track_list = list(tracks)
+            ids = _insert_tracks(connection, track_list, database_uuid)
+            _insert_playlists(connection, playlists, dict(zip(map(id, track_list), ids)), database_uuid)
+
+
+@instrumented("enginedb.append")
+def append(tracks: Iterable[Track], path: Path) -> None:
+    """Inserta pistas en una base de datos existente en una sola transacción."""
+
+    if not path.exists():
+        dump(tracks, path)
+        return
+    with closing(_connect_for_import(path)) as connection:
+        with connection:
+            row = connection.execute("SELECT uuid FROM Information LIMIT 1").fetchone()
+            _insert_tracks(connection, tracks, row[0] if row else None)
+
+
+def _connect_readonly(path: Path) -> sqlite3.Connection:
+    if not path.exists():
+        raise FileNotFoundError(path)
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    connection.execute("PRAGMA query_only = ON")
+    return connection
+
+
+def _connect_for_import(path: Path) -> sqlite3.Connection:
+    # Importación masiva: sin fsync por sentencia ni diario en disco. Una
+    # caída a mitad deja el archivo a medias, igual que cualquier otro dump.
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    connection.execute("PRAGMA cache_size = -65536")
+    return connection
+
+
+def _iter_rows(connection: sqlite3.Connection) -> Iterator[tuple[int, Track]]:
+    cursor = connection.execute(_SELECT_TRACKS)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            yield row[0], _row_to_track(row)
+
+
+def _row_to_track(row: tuple) -> Track:
+    _, title, artist, album, genre, length, bpm, bpm_analyzed, comment, location, year, rating = row
+    return Track(
+        title=title or "",
+        artist=artist or "",
+        album=album,
+        genre=genre,
+        duration=float(length) if length is not None else None,
+        bpm=float(bpm_analyzed) if bpm_analyzed else (float(bpm) if bpm else None),
+        comment=comment,
+        location=location,
+        year=year,
+        rating=rating,
+    )
+
+
+def _track_params(track: Track, track_id: int, order: int, database_uuid: str | None) -> tuple:
+    path = location_to_path(track.location)[0] if track.location else None
+    filename = path.rsplit("/", 1)[-1] if path else None
+    suffix = filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else None
+    return (
+        track_id,
+        order,
+        round(track.duration) if track.duration is not None else None,
+        round(track.bpm) if track.bpm is not None else None,
+        track.bpm,
+        track.year,
+        path,
+        filename,
+        track.title,
+        track.artist,
+        track.album,
+        track.genre,
+        track.comment,
+        track.rating,
+        suffix,
+        database_uuid,
+    )
+
+
+def _insert_tracks(connection: sqlite3.Connection, tracks: Iterable[Track], database_uuid: str | None) -> range:
+    # Los ids se asignan aquí para enlazar las playlists sin releer la tabla;
+    # ``tracks`` se consume una sola vez y puede ser un iterador.
+    last_id, last_order = connection.execute(
+        "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'Track'), 0), "
+        "COALESCE(MAX(id), 0)), COALESCE(MAX(playOrder), 0) FROM Track"
+    ).fetchone()
+    count = 0
+
+    def params() -> Iterator[tuple]:
+        nonlocal count
+        for count, track in enumerate(tracks, start=1):
+            yield _track_params(track, last_id + count, last_order + count, database_uuid)
+
+    connection.executemany(_INSERT_TRACK, params())
+    return range(last_id + 1, last_id + 1 + count)
+
+
+def _insert_playlists(
+    connection: sqlite3.Connection,
+    playlists: Mapping[str, Sequence[Track]],
+    track_ids: dict[int, int],
+    database_uuid: str,
+) -> None:
+    previous_list: int | None = None
+    for title, members in playlists.items():
+        list_id = connection.execute(
+            "INSERT INTO Playlist (title, parentListId, isPersisted, nextListId, isExplicitlyExported) "
+            "VALUES (?, 0, 1, 0, 1)",
+            (title,),
+        ).lastrowid
+        if previous_list is not None:
+            connection.execute("UPDATE Playlist SET nextListId = ? WHERE id = ?", (list_id, previous_list))
+        previous_list = list_id
+
+        missing = [track for track in members if id(track) not in track_ids]
+        if missing:
+            track_ids.update(zip(map(id, missing), _insert_tracks(connection, missing, database_uuid)))
+
+        first = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM PlaylistEntity").fetchone()[0]
+        count = len(members)
+        connection.executemany(
+            "INSERT INTO PlaylistEntity (id, listId, trackId, databaseUuid, nextEntityId, membershipReference) "
+            "VALUES (?, ?, ?, ?, ?, 0)",
+            (
+                (first + index, list_id, track_ids[id(track)], database_uuid, first + index + 1 if index + 1 < count else 0)
+                for index, track in enumerate(members)
+            ),
+        )
+
+
+def _ordered(entities: dict[int, tuple[int, int]]) -> list[int]:
+    """Sigue la lista enlazada ``nextEntityId`` (0 marca el final)."""
+
+    referenced = {next_id for _, next_id in entities.values()}
+    heads = [entity_id for entity_id in entities if entity_id not in referenced]
+    ordered: list[int] = []
+    current = min(heads) if heads else (min(entities) if entities else 0)
+    visited: set[int] = set()
+    while current and current in entities and current not in visited:
+        visited.add(current)
+        track_id, current = entities[current]
+        ordered.append(track_id)
+    return ordered
@@ -2,61 +2,161 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Iterable
+from typing import Any, BinaryIO, Iterable
 
 from ..models import Track
+from ..utils.metrics import instrumented
+from . import _splice
 
 
 ENGINE_VERSION = "2.4.0"
 
 
+@instrumented("enginedj.load")
 def load(path: Path) -> list[Track]:
     """Lee la representación JSON simplificada exportada por Engine DJ."""
 
     with path.open("r", encoding="utf-8") as handle:
         data = json.load(handle)
 
-    tracks: list[Track] = []
-    for entry in data.get("tracks", []):
-        tracks.append(
-            Track(
-                title=entry.get("title", ""),
-                artist=entry.get("artist", ""),
-                album=entry.get("album"),
-                genre=entry.get("genre"),
-                duration=entry.get("duration"),
-                bpm=entry.get("bpm"),
-                comment=entry.get("comment"),
-                location=entry.get("location"),
-                year=entry.get("year"),
-                rating=entry.get("rating"),
-            )
-        )
-    return tracks
+    return [_entry_to_track(entry) for entry in data.get("tracks", [])]
 
 
+@instrumented("enginedj.dump")
 def dump(tracks: Iterable[Track], path: Path) -> None:
-    """Genera un archivo JSON compatible con Engine DJ (formato simplificado)."""
-
-    payload = {
-        "engine_dj_version": ENGINE_VERSION,
-        "generated_by": "Conversor Rekordbox",
-        "tracks": [
-            {
-                "title": track.title,
-                "artist": track.artist,
-                "album": track.album,
-                "genre": track.genre,
-                "duration": track.duration,
-                "bpm": track.bpm,
-                "comment": track.comment,
-                "location": track.location,
-                "year": track.year,
-                "rating": track.rating,
-            }
-            for track in tracks
-        ],
-    }
+    """Genera un archivo JSON compatible con Engine DJ (formato simplificado).
 
+    Las entradas se escriben una a una con la misma forma que
+    ``json.dump(..., indent=2)``, de modo que ``tracks`` puede ser un iterador.
+    """
+
+    head = json.dumps(
+        {"engine_dj_version": ENGINE_VERSION, "generated_by": "Conversor Rekordbox", "tracks": []},
+        indent=2,
+        ensure_ascii=False,
+    )
+    head = head[: head.rindex("[") + 1]
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write(head)
+        separator = "\n"
+        for track in tracks:
+            handle.write(separator)
+            handle.write(_indent(json.dumps(_track_to_entry(track), indent=2, ensure_ascii=False), "    "))
+            separator = ",\n"
+        handle.write("]\n}" if separator == "\n" else "\n  ]\n}")
+
+
+@instrumented("enginedj.append")
+def append(tracks: Iterable[Track], path: Path) -> None:
+    """Añade pistas al array ``tracks`` insertándolas antes del cierre del archivo.
+
+    Solo se lee la cola del JSON: se localiza el último ``]`` y se empalman
+    las entradas nuevas delante, con la misma indentación que ``dump``. Si el
+    archivo no termina en el array ``tracks`` se carga entero y se reescribe
+    conservando el resto de claves.
+    """
+
+    if not path.exists():
+        dump(tracks, path)
+        return
+
+    entries = [_track_to_entry(track) for track in tracks]
+    if not entries:
+        return
+
+    with path.open("r+b") as handle:
+        tail = _locate_tracks_tail(handle)
+        if tail is not None:
+            offset, prefix, suffix = tail
+            body = ",\n".join(
+                _indent(json.dumps(entry, indent=2, ensure_ascii=False), "    ")
+                for entry in entries
+            )
+            _splice.splice(handle, offset, prefix + body.encode("utf-8") + suffix)
+            return
+
+    # Se conservan las demás claves del archivo, no solo ``tracks``.
+    with path.open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    payload.setdefault("tracks", []).extend(entries)
     with path.open("w", encoding="utf-8") as handle:
         json.dump(payload, handle, indent=2, ensure_ascii=False)
+
+
+def _entry_to_track(entry: dict[str, Any]) -> Track:
+    return Track(
+        title=entry.get("title", ""),
+        artist=entry.get("artist", ""),
+        album=entry.get("album"),
+        genre=entry.get("genre"),
+        duration=entry.get("duration"),
+        bpm=entry.get("bpm"),
+        comment=entry.get("comment"),
+        location=entry.get("location"),
+        year=entry.get("year"),
+        rating=entry.get("rating"),
+    )
+
+
+def _track_to_entry(track: Track) -> dict[str, Any]:
+    return {
+        "title": track.title,
+        "artist": track.artist,
+        "album": track.album,
+        "genre": track.genre,
+        "duration": track.duration,
+        "bpm": track.bpm,
+        "comment": track.comment,
+        "location": track.location,
+        "year": track.year,
+        "rating": track.rating,
+    }
+
+
+def _indent(text: str, prefix: str) -> str:
+    return "\n".join(prefix + line for line in text.splitlines())
+
+
+def _locate_tracks_tail(handle: BinaryIO) -> tuple[int, bytes, bytes] | None:
+    """Localiza el punto de inserción tras el último elemento de ``tracks``.
+
+    Solo se lee la cola, así que se comprueba que el último ``]`` cierra
+    ``tracks``: si el array está vacío su clave está justo delante, y si no,
+    su último elemento (una línea ``    {`` con sangría 4, la de ``dump``)
+    debe ser una entrada de pista. En cualquier otro caso (otra clave con un
+    array detrás, otro formato de sangría) se devuelve ``None``.
+    """
+
+    close = _splice.rfind(handle, b"]")
+    if close is None:
+        return None
+    handle.seek(close + 1)
+    if handle.read().strip() != b"}":
+        return None
+
+    start = max(0, close - _splice.BLOCK_SIZE)
+    handle.seek(start)
+    before = handle.read(close - start).rstrip()
+    if before.endswith(b"["):
+        if not before[:-1].rstrip().endswith(b'"tracks":'):
+            return None
+        return start + len(before), b"\n", b"\n  "
+    if before.endswith(b"}") and _ends_with_track_entry(before):
+        return start + len(before), b",\n", b""
+    return None
+
+
+def _ends_with_track_entry(data: bytes) -> bool:
+    # Dentro de una cadena JSON no puede haber saltos de línea literales, así
+    # que "\n    {" solo aparece al empezar un elemento del array de primer nivel.
+    opening = data.rfind(b"\n    {")
+    if opening == -1:
+        return False
+    try:
+        entry = json.loads(data[opening:])
+    except ValueError:
+        return False
+    return isinstance(entry, dict) and entry.keys() == _ENTRY_KEYS
+
+
+_ENTRY_KEYS = _track_to_entry(Track(title="", artist="")).keys()
@@ -0,0 +1,209 @@
+"""Registro de formatos de biblioteca.
+
+Cada formato se describe con un :class:`FormatSpec` (nombre, módulo,
+extensiones y una función que reconoce la cabecera del archivo). El módulo
+solo se importa cuando se usa el formato.
+
+Otros paquetes pueden añadir formatos declarando un *entry point* en el
+grupo ``conversor_rekordbox.formats`` cuyo valor es el módulo que
+implementa ``load``/``dump``/``append``. Si el módulo define ``EXTENSIONS``
+y ``sniff(header: bytes) -> bool`` también participa en la detección, y si
+define ``iter_load(path)`` la ordenación lee las pistas sin cargarlas en
+una lista. Los *entry points* se consultan la primera vez que un nombre o
+un archivo no encaja en los formatos incluidos, nunca al arrancar::
+
+    [project.entry-points."conversor_rekordbox.formats"]
+    traktor = "mi_paquete.traktor"
+
+La detección lee como mucho :data:`SNIFF_BYTES` del principio del archivo
+y, si ningún formato la reconoce, recurre a la extensión.
+"""
+
+from __future__ import annotations
+
+import importlib
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Iterable
+
+ENTRY_POINT_GROUP = "conversor_rekordbox.formats"
+SNIFF_BYTES = 4096
+
+Sniffer = Callable[[bytes], bool]
+
+
+@dataclass(frozen=True)
+class FormatSpec:
+    name: str
+    module: str
+    extensions: tuple[str, ...] = ()
+    filenames: tuple[str, ...] = ()
+    sniff: Sniffer | None = None
+
+
+class FormatRegistry:
+    """Formatos conocidos por nombre; importa cada módulo la primera vez que se pide."""
+
+    def __init__(self, specs: Iterable[FormatSpec] = (), group: str | None = ENTRY_POINT_GROUP) -> None:
+        self._specs: dict[str, FormatSpec] = {}
+        self._modules: dict[str, ModuleType] = {}
+        self._group = group
+        self._plugins: dict[str, str] | None = None if group else {}
+        self._lock = threading.RLock()
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: FormatSpec) -> None:
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._modules.pop(spec.name, None)
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return [*self._specs, *(name for name in self._plugin_entries() if name not in self._specs)]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._spec(name) is not None
+
+    def spec(self, name: str) -> FormatSpec:
+        spec = self._spec(name)
+        if spec is None:
+            raise ValueError(f"Formato desconocido: {name}")
+        return spec
+
+    def module(self, name: str) -> ModuleType:
+        with self._lock:
+            module = self._modules.get(name)
+            if module is None:
+                module = importlib.import_module(self.spec(name).module)
+                self._modules[name] = module
+            return module
+
+    def from_extension(self, path: Path) -> str | None:
+        """Formato por la extensión o el nombre del archivo (sin leerlo)."""
+
+        for specs in (self._registered(), self._pending_plugins()):
+            for spec in specs:
+                if _matches_name(spec, path):
+                    return spec.name
+        return None
+
+    def detect(self, path: Path) -> str | None:
+        """Formato por el contenido de la cabecera y, si no, por la extensión."""
+
+        try:
+            with path.open("rb") as handle:
+                header = handle.read(SNIFF_BYTES)
+        except OSError:
+            header = b""
+        # Primero los formatos ya registrados; los plugins solo se importan
+        # si ninguno reconoce el archivo.
+        for specs in (self._registered(), self._pending_plugins()):
+            specs = list(specs)
+            for spec in specs:
+                if header and spec.sniff is not None and spec.sniff(header):
+                    return spec.name
+            for spec in specs:
+                if _matches_name(spec, path):
+                    return spec.name
+        return None
+
+    def _spec(self, name: str) -> FormatSpec | None:
+        with self._lock:
+            spec = self._specs.get(name)
+            if spec is None and name in self._plugin_entries():
+                spec = self._resolve_plugin(name)
+            return spec
+
+    def _registered(self) -> list[FormatSpec]:
+        with self._lock:
+            return list(self._specs.values())
+
+    def _pending_plugins(self) -> Iterable[FormatSpec]:
+        for name in list(self._plugin_entries()):
+            if name not in self._specs:
+                spec = self._spec(name)
+                if spec is not None:
+                    yield spec
+
+    def _plugin_entries(self) -> dict[str, str]:
+        if self._plugins is None:
+            entries = _entry_points(self._group or "")
+            self._plugins = {entry.name: entry.value.partition(":")[0] for entry in entries}
+        return self._plugins
+
+    def _resolve_plugin(self, name: str) -> FormatSpec:
+        module = importlib.import_module(self._plugin_entries()[name])
+        spec = FormatSpec(
+            name=name,
+            module=module.__name__,
+            extensions=tuple(extension.lower() for extension in getattr(module, "EXTENSIONS", ())),
+            sniff=getattr(module, "sniff", None),
+        )
+        self._specs[name] = spec
+        self._modules[name] = module
+        return spec
+
+
+def _matches_name(spec: FormatSpec, path: Path) -> bool:
+    return path.suffix.lower() in spec.extensions or path.name.lower() in spec.filenames
+
+
+def _entry_points(group: str) -> list:
+    from importlib.metadata import entry_points
+
+    return list(entry_points(group=group))
+
+
+# --- Detección de los formatos incluidos -----------------------------------
+
+_XML_ROOT_RE = re.compile(rb"<(?![?!])([\w:.-]+)")
+# Claves de primer nivel que escribe ``enginedj.dump``, al principio del archivo.
+_ENGINE_KEYS = (re.compile(rb'"engine_dj_version"\s*:'), re.compile(rb'"tracks"\s*:'))
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def _text_header(header: bytes) -> bytes:
+    return header.removeprefix(_UTF8_BOM).lstrip()
+
+
+def sniff_rekordbox(header: bytes) -> bool:
+    header = _text_header(header)
+    if not header.startswith(b"<"):
+        return False
+    match = _XML_ROOT_RE.search(header)
+    return match is not None and match.group(1) == b"DJ_PLAYLISTS"
+
+
+def sniff_m3u(header: bytes) -> bool:
+    return _text_header(header).startswith(b"#EXTM3U")
+
+
+def sniff_engine_json(header: bytes) -> bool:
+    header = _text_header(header)
+    return header.startswith(b"{") and all(key.search(header) for key in _ENGINE_KEYS)
+
+
+def sniff_sqlite(header: bytes) -> bool:
+    return header.startswith(b"SQLite format 3\x00")
+
+
+def sniff_serato(header: bytes) -> bool:
+    # Primer registro "vrsn" con la versión en UTF-16BE ("1.0/Serato…", "2.0/Serato…").
+    return header[:4] == b"vrsn" and "Serato".encode("utf-16-be") in header[8:128]
+
+
+_PACKAGE = __name__.rpartition(".")[0]
+
+BUILTIN_FORMATS = (
+    FormatSpec("rekordbox", f"{_PACKAGE}.rekordbox", (".xml",), sniff=sniff_rekordbox),
+    FormatSpec("serato", f"{_PACKAGE}.serato", (".m3u8", ".m3u"), sniff=sniff_m3u),
+    FormatSpec("engine_dj", f"{_PACKAGE}.enginedj", (".json",), sniff=sniff_engine_json),
+    FormatSpec("engine_db", f"{_PACKAGE}.enginedb", (".db",), sniff=sniff_sqlite),
+    FormatSpec("serato_db", f"{_PACKAGE}.seratodb", (".crate",), ("database v2",), sniff=sniff_serato),
+)
+
+registry = FormatRegistry(BUILTIN_FORMATS)
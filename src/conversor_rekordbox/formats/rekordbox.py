@@ -1,87 +1,271 @@
 from __future__ import annotations
 
+import re
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
+from array import array
+from collections.abc import Sized
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from ..models import Track
+from ..models import BeatGrid, CuePoint, Track
+from ..utils.metrics import instrumented
+from . import _splice
 
+_ENTRIES_RE = re.compile(rb'Entries="(\d+)"')
+_METERS = {f"{numerator}/4": numerator for numerator in range(1, 17)}
 
+
+@instrumented("rekordbox.load")
 def load(path: Path) -> list[Track]:
     """Carga pistas desde un archivo XML exportado por Rekordbox."""
 
-    tree = ET.parse(path)
-    root = tree.getroot()
+    return list(iter_load(path))
+
+
+def iter_load(path: Path) -> Iterator[Track]:
+    """Recorre las pistas de la colección sin tener el árbol en memoria.
+
+    El XML se recorre con ``iterparse`` y cada ``TRACK`` de la colección se
+    libera en cuanto se convierte, con sus ``TEMPO`` y ``POSITION_MARK``.
+    """
+
+    collection: ET.Element | None = None
+    found = False
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if element.tag == "COLLECTION":
+            found = True
+            collection = element if event == "start" else None
+        elif element.tag == "TRACK" and event == "end" and collection is not None:
+            yield _track_from_element(element)
+            collection.clear()
 
-    collection = root.find("COLLECTION")
-    if collection is None:
+    if not found:
         raise ValueError("El archivo de Rekordbox no contiene una colección válida")
 
-    tracks: list[Track] = []
-    for track_element in collection.findall("TRACK"):
-        attributes = track_element.attrib
-        track = Track(
-            title=attributes.get("Name", ""),
-            artist=attributes.get("Artist", ""),
-            album=_empty_to_none(attributes.get("Album")),
-            genre=_empty_to_none(attributes.get("Genre")),
-            duration=_safe_float(attributes.get("TotalTime")),
-            bpm=_safe_float(attributes.get("AverageBpm")),
-            comment=_empty_to_none(attributes.get("Comments")),
-            location=_empty_to_none(attributes.get("Location")),
-            year=_safe_int(attributes.get("Year")),
-            rating=_safe_int(attributes.get("Rating")),
+
+@instrumented("rekordbox.dump")
+def dump(tracks: Iterable[Track], path: Path) -> None:
+    """Genera un archivo XML compatible con Rekordbox escribiendo pista a pista.
+
+    ``Entries`` va antes de las pistas: si ``tracks`` no tiene longitud (un
+    iterador), los ``TRACK`` se escriben primero a un temporal en disco y se
+    copian tras la cabecera, sin tener la lista en memoria.
+    """
+
+    product = ET.Element(
+        "PRODUCT", attrib={"Name": "Conversor Rekordbox", "Version": "0.1.0", "Company": "Conversor Team"}
+    )
+    header = b"".join(
+        (
+            b"<?xml version='1.0' encoding='utf-8'?>\n",
+            b'<DJ_PLAYLISTS Version="1.0.0">',
+            ET.tostring(product, encoding="utf-8", xml_declaration=False),
         )
-        tracks.append(track)
-    return tracks
+    )
+    footer = b'</COLLECTION><PLAYLISTS Entries="0" /></DJ_PLAYLISTS>'
 
+    if isinstance(tracks, Sized):
+        with path.open("wb") as handle:
+            handle.write(header)
+            handle.write(f'<COLLECTION Entries="{len(tracks)}">'.encode("ascii"))
+            for track in tracks:
+                handle.write(_track_xml(track))
+            handle.write(footer)
+        return
 
-def dump(tracks: Iterable[Track], path: Path) -> None:
-    """Genera un archivo XML compatible con Rekordbox."""
-
-    root = ET.Element("DJ_PLAYLISTS")
-    root.set("Version", "1.0.0")
-
-    product = ET.SubElement(root, "PRODUCT")
-    product.set("Name", "Conversor Rekordbox")
-    product.set("Version", "0.1.0")
-    product.set("Company", "Conversor Team")
-
-    collection = ET.SubElement(root, "COLLECTION")
-
-    # Materializamos la secuencia para contar y reutilizar los valores.
-    track_list = list(tracks)
-    collection.set("Entries", str(len(track_list)))
-
-    for track in track_list:
-        attrs = {
-            "Name": track.title,
-            "Artist": track.artist,
-        }
-        if track.album:
-            attrs["Album"] = track.album
-        if track.genre:
-            attrs["Genre"] = track.genre
-        if track.duration is not None:
-            attrs["TotalTime"] = str(int(track.duration))
-        if track.bpm is not None:
-            attrs["AverageBpm"] = f"{track.bpm:.2f}"
-        if track.comment:
-            attrs["Comments"] = track.comment
-        if track.location:
-            attrs["Location"] = track.location
-        if track.year is not None:
-            attrs["Year"] = str(track.year)
-        if track.rating is not None:
-            attrs["Rating"] = str(track.rating)
-
-        ET.SubElement(collection, "TRACK", attrib=attrs)
-
-    playlists = ET.SubElement(root, "PLAYLISTS")
-    playlists.set("Entries", "0")
-
-    tree = ET.ElementTree(root)
-    tree.write(path, encoding="utf-8", xml_declaration=True)
+    with tempfile.TemporaryFile(dir=path.parent) as body:
+        count = 0
+        for track in tracks:
+            body.write(_track_xml(track))
+            count += 1
+        body.seek(0)
+        with path.open("wb") as handle:
+            handle.write(header)
+            handle.write(f'<COLLECTION Entries="{count}">'.encode("ascii"))
+            shutil.copyfileobj(body, handle, 1024 * 1024)
+            handle.write(footer)
+
+
+@instrumented("rekordbox.append")
+def append(tracks: Iterable[Track], path: Path) -> None:
+    """Añade pistas a la colección de un XML existente sin volver a parsearlo.
+
+    Los ``TRACK`` nuevos se empalman delante de ``</COLLECTION>`` moviendo
+    solo la cola del archivo (la sección ``PLAYLISTS``) y se actualiza el
+    atributo ``Entries`` de la colección.
+    """
+
+    if not path.exists():
+        dump(tracks, path)
+        return
+
+    elements = [_track_xml(track) for track in tracks]
+    if not elements:
+        return
+
+    with path.open("r+b") as handle:
+        close = _splice.rfind(handle, b"</COLLECTION>")
+        if close is not None:
+            _splice.splice(handle, close, b"".join(elements))
+    if close is None:
+        # Colección vacía autocerrada u otro formato inesperado.
+        existing = load(path)
+        dump([*existing, *(_track_from_element(ET.fromstring(raw)) for raw in elements)], path)
+        return
+
+    _update_entries(path, len(elements))
+
+
+def _update_entries(path: Path, added: int) -> None:
+    with path.open("r+b") as handle:
+        tag_start = _splice.find(handle, b"<COLLECTION")
+        if tag_start is None:
+            return
+        handle.seek(tag_start)
+        head = handle.read(_splice.BLOCK_SIZE)
+        tag = head[: head.find(b">") + 1]
+        match = _ENTRIES_RE.search(tag)
+        if match is None:
+            return
+        value = str(int(match.group(1)) + added).encode("ascii")
+        start = tag_start + match.start(1)
+        end = tag_start + match.end(1)
+        if len(value) == end - start:
+            handle.seek(start)
+            handle.write(value)
+            return
+    _splice.replace_range(path, start, end, value)
+
+
+def _track_from_element(element: ET.Element) -> Track:
+    attributes = element.attrib
+    tempos: list[dict[str, str]] = []
+    cues: list[CuePoint] = []
+    for child in element:
+        if child.tag == "TEMPO":
+            tempos.append(child.attrib)
+        elif child.tag == "POSITION_MARK":
+            cue = _cue_from_attributes(child.attrib)
+            if cue is not None:
+                cues.append(cue)
+    return Track(
+        title=attributes.get("Name", ""),
+        artist=attributes.get("Artist", ""),
+        album=_empty_to_none(attributes.get("Album")),
+        genre=_empty_to_none(attributes.get("Genre")),
+        duration=_safe_float(attributes.get("TotalTime")),
+        bpm=_safe_float(attributes.get("AverageBpm")),
+        comment=_empty_to_none(attributes.get("Comments")),
+        location=_empty_to_none(attributes.get("Location")),
+        year=_safe_int(attributes.get("Year")),
+        rating=_safe_int(attributes.get("Rating")),
+        cues=tuple(cues) or None,
+        beatgrid=_beatgrid(tempos) if tempos else None,
+    )
+
+
+def _beatgrid(tempos: list[dict[str, str]]) -> BeatGrid:
+    # Una rejilla variable tiene un TEMPO por tiempo: se evita pasar por
+    # _safe_float/_safe_int y los arrays se construyen de una vez.
+    positions: list[float] = []
+    bpms: list[float] = []
+    meters: list[int] = []
+    beats: list[int] = []
+    for attributes in tempos:
+        try:
+            position = float(attributes["Inizio"])
+            bpm = float(attributes["Bpm"])
+        except (KeyError, ValueError):
+            continue
+        metro = attributes.get("Metro", "4/4")
+        meter = _METERS.get(metro)
+        if meter is None:
+            meter = min(_safe_int(metro.partition("/")[0]) or 4, 255)
+        battito = attributes.get("Battito", "1")
+        beat = int(battito) if battito.isdigit() and len(battito) < 3 else 1
+        positions.append(position)
+        bpms.append(bpm)
+        meters.append(meter)
+        beats.append(min(beat, 255))
+    return BeatGrid(array("d", positions), array("d", bpms), array("B", meters), array("B", beats))
+
+
+def _cue_from_attributes(attributes: dict[str, str]) -> CuePoint | None:
+    start = _safe_float(attributes.get("Start"))
+    if start is None:
+        return None
+    color = None
+    if "Red" in attributes:
+        color = (
+            _safe_int(attributes.get("Red")) or 0,
+            _safe_int(attributes.get("Green")) or 0,
+            _safe_int(attributes.get("Blue")) or 0,
+        )
+    num = _safe_int(attributes.get("Num"))
+    return CuePoint(
+        start=start,
+        num=-1 if num is None else num,
+        kind=_safe_int(attributes.get("Type")) or 0,
+        end=_safe_float(attributes.get("End")),
+        name=attributes.get("Name", ""),
+        color=color,
+    )
+
+
+def _track_xml(track: Track) -> bytes:
+    element = ET.Element("TRACK", attrib=_track_attributes(track))
+    for cue in track.cues or ():
+        attrs = {"Name": cue.name, "Type": str(cue.kind), "Start": _format_seconds(cue.start)}
+        if cue.end is not None:
+            attrs["End"] = _format_seconds(cue.end)
+        attrs["Num"] = str(cue.num)
+        if cue.color is not None:
+            attrs.update(zip(("Red", "Green", "Blue"), map(str, cue.color)))
+        ET.SubElement(element, "POSITION_MARK", attrib=attrs)
+    xml = ET.tostring(element, encoding="unicode")
+    if track.beatgrid:
+        # Los TEMPO solo llevan números: se formatean directamente, sin
+        # crear un Element por marca.
+        tempos = "".join(
+            f'<TEMPO Inizio="{position:.3f}" Bpm="{bpm:.2f}" Metro="{meter}/4" Battito="{beat}" />'
+            for position, bpm, meter, beat in track.beatgrid
+        )
+        if xml.endswith(" />"):
+            xml = f"{xml[:-3]}>{tempos}</TRACK>"
+        else:
+            head, _, rest = xml.partition(">")
+            xml = f"{head}>{tempos}{rest}"
+    return xml.encode("utf-8")
+
+
+def _format_seconds(value: float) -> str:
+    return f"{value:.3f}"
+
+
+def _track_attributes(track: Track) -> dict[str, str]:
+    attrs = {
+        "Name": track.title,
+        "Artist": track.artist,
+    }
+    if track.album:
+        attrs["Album"] = track.album
+    if track.genre:
+        attrs["Genre"] = track.genre
+    if track.duration is not None:
+        attrs["TotalTime"] = str(int(track.duration))
+    if track.bpm is not None:
+        attrs["AverageBpm"] = f"{track.bpm:.2f}"
+    if track.comment:
+        attrs["Comments"] = track.comment
+    if track.location:
+        attrs["Location"] = track.location
+    if track.year is not None:
+        attrs["Year"] = str(track.year)
+    if track.rating is not None:
+        attrs["Rating"] = str(track.rating)
+    return attrs
 
 
 def _safe_float(value: str | None) -> float | None:
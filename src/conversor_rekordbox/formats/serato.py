@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, TextIO
 
 from ..models import Track
+from ..utils.metrics import instrumented
 
 
+@instrumented("serato.load")
 def load(path: Path) -> list[Track]:
     """Lee un archivo de playlist M3U/M3U8 compatible con Serato."""
 
-    tracks: list[Track] = []
+    return list(iter_load(path))
+
+
+def iter_load(path: Path) -> Iterator[Track]:
+    """Recorre las entradas de la playlist línea a línea."""
+
     pending_info: tuple[int | None, str | None] | None = None
     with path.open("r", encoding="utf-8") as handle:
         for raw_line in handle:
@@ -25,29 +32,49 @@ def load(path: Path) -> list[Track]:
             duration, description = pending_info or (None, None)
             artist, title = _split_description(description)
 
-            tracks.append(
-                Track(
-                    title=title or _guess_title(line),
-                    artist=artist or "",
-                    duration=duration,
-                    location=line,
-                )
+            yield Track(
+                title=title or _guess_title(line),
+                artist=artist or "",
+                duration=duration,
+                location=line,
             )
             pending_info = None
-    return tracks
 
 
+@instrumented("serato.dump")
 def dump(tracks: Iterable[Track], path: Path) -> None:
     """Escribe un archivo M3U8 con marcas compatibles con Serato."""
 
     with path.open("w", encoding="utf-8") as handle:
         handle.write("#EXTM3U\n")
         handle.write("#PLAYLIST:Conversor Rekordbox\n")
-        for track in tracks:
-            duration = int(track.duration or 0)
-            handle.write(f"#EXTINF:{duration},{track.artist} - {track.title}\n")
-            location = track.location or _build_location(track)
-            handle.write(f"{location}\n")
+        _write_entries(handle, tracks)
+
+
+@instrumented("serato.append")
+def append(tracks: Iterable[Track], path: Path) -> None:
+    """Añade pistas al final de una playlist existente sin reescribirla."""
+
+    if not path.exists() or path.stat().st_size == 0:
+        dump(tracks, path)
+        return
+
+    with path.open("rb") as handle:
+        handle.seek(-1, 2)
+        needs_newline = handle.read(1) not in (b"\n", b"\r")
+
+    with path.open("a", encoding="utf-8") as handle:
+        if needs_newline:
+            handle.write("\n")
+        _write_entries(handle, tracks)
+
+
+def _write_entries(handle: TextIO, tracks: Iterable[Track]) -> None:
+    for track in tracks:
+        duration = int(track.duration or 0)
+        handle.write(f"#EXTINF:{duration},{track.artist} - {track.title}\n")
+        location = track.location or _build_location(track)
+        handle.write(f"{location}\n")
 
 
 def _guess_title(location: str) -> str:
@@ -0,0 +1,251 @@
+"""Archivos binarios de Serato: ``database V2`` y crates (``*.crate``).
+
+Ambos son secuencias de registros *tag-length-value*: 4 bytes ASCII con la
+etiqueta, 4 bytes big-endian con la longitud y el contenido. Los registros
+``otrk`` contienen a su vez registros de la pista (``pfil``/``ptrk`` ruta,
+``tsng`` título, ``tart`` artista…); los textos van en UTF-16BE.
+
+La lectura proyecta el archivo con ``mmap`` y recorre los registros con
+``struct.unpack_from`` sobre un ``memoryview``, sin copiar bytes: un primer
+paso solo anota dónde empieza cada ``otrk`` y las :class:`Track` se
+construyen al acceder a ellas. La escritura compone todos los registros en
+una lista de fragmentos y escribe el archivo de una vez.
+
+Serato guarda las rutas relativas a la raíz del volumen (sin ``/``
+inicial); al leer se añade la barra y al escribir se quita.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, overload
+
+from ..models import Track
+from ..utils.locations import location_to_path
+from ..utils.metrics import instrumented
+
+DATABASE_VERSION = "2.0/Serato Scratch LIVE Database"
+CRATE_VERSION = "1.0/Serato ScratchLive Crate"
+CRATE_COLUMNS = ("song", "artist", "bpm", "length")
+
+_HEADER = struct.Struct(">4sI")
+_TEXT_FIELDS = {
+    b"tsng": "title",
+    b"tart": "artist",
+    b"talb": "album",
+    b"tgen": "genre",
+    b"tcom": "comment",
+}
+_PATH_TAGS = (b"pfil", b"ptrk")
+
+
+class SeratoFormatError(ValueError):
+    """El archivo no tiene la estructura de registros de Serato."""
+
+
+def iter_records(buffer: memoryview, start: int = 0, end: int | None = None) -> Iterator[tuple[bytes, int, int]]:
+    """Recorre los registros de ``buffer[start:end]`` devolviendo ``(tag, inicio, fin)`` del contenido."""
+
+    end = len(buffer) if end is None else end
+    offset = start
+    while offset < end:
+        if offset + _HEADER.size > end:
+            raise SeratoFormatError(f"Registro truncado en el byte {offset}")
+        tag, length = _HEADER.unpack_from(buffer, offset)
+        payload = offset + _HEADER.size
+        if payload + length > end:
+            raise SeratoFormatError(f"Registro {tag!r} más largo que el archivo en el byte {offset}")
+        yield tag, payload, payload + length
+        offset = payload + length
+
+
+class SeratoLibrary(Sequence[Track]):
+    """Vista perezosa de las pistas de un ``database V2`` o un crate.
+
+    Mantiene el archivo proyectado en memoria mientras está abierta; cada
+    acceso decodifica solo el registro ``otrk`` correspondiente.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle = path.open("rb")
+        size = self._handle.seek(0, 2)
+        self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self.version: str | None = None
+        self._tracks: list[tuple[int, int]] = []
+        try:
+            for tag, start, end in iter_records(self._view):
+                if tag == b"vrsn":
+                    self.version = _text(self._view[start:end])
+                elif tag == b"otrk":
+                    self._tracks.append((start, end))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "SeratoLibrary":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._handle.close()
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    @overload
+    def __getitem__(self, index: int) -> Track: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Track]: ...
+
+    def __getitem__(self, index: int | slice) -> Track | list[Track]:
+        if isinstance(index, slice):
+            return [self._decode(*bounds) for bounds in self._tracks[index]]
+        return self._decode(*self._tracks[index])
+
+    def __iter__(self) -> Iterator[Track]:
+        for start, end in self._tracks:
+            yield self._decode(start, end)
+
+    def _decode(self, start: int, end: int) -> Track:
+        view = self._view
+        values: dict[str, object] = {}
+        for tag, field_start, field_end in iter_records(view, start, end):
+            field = _TEXT_FIELDS.get(tag)
+            if field is not None:
+                values[field] = _text(view[field_start:field_end]) or None
+            elif tag in _PATH_TAGS:
+                values["location"] = _from_serato_path(_text(view[field_start:field_end]))
+            elif tag == b"tbpm":
+                values["bpm"] = _safe_float(_text(view[field_start:field_end]))
+            elif tag == b"tlen":
+                values["duration"] = _parse_length(_text(view[field_start:field_end]))
+            elif tag == b"ttyr":
+                values["year"] = _safe_int(_text(view[field_start:field_end]))
+        location = values.get("location")
+        if not values.get("title") and isinstance(location, str):
+            values["title"] = Path(location).stem
+        values.setdefault("title", "")
+        values["artist"] = values.get("artist") or ""
+        return Track(**values)  # type: ignore[arg-type]
+
+
+@instrumented("seratodb.load")
+def load(path: Path) -> list[Track]:
+    """Carga las pistas de un ``database V2`` o de un crate de Serato."""
+    with SeratoLibrary(path) as library:
+        return list(library)
+
+
+@instrumented("seratodb.dump")
+def dump(tracks: Iterable[Track], path: Path) -> None:
+    """Escribe un crate si ``path`` termina en ``.crate``; si no, un ``database V2``."""
+
+    if _is_crate(path):
+        chunks = [_record(b"vrsn", _encode(CRATE_VERSION))]
+        for column in CRATE_COLUMNS:
+            chunks.append(_record(b"ovct", _record(b"tvcn", _encode(column)) + _record(b"tvcw", _encode("0"))))
+        chunks.extend(_record(b"otrk", _record(b"ptrk", _encode(_to_serato_path(track)))) for track in tracks)
+    else:
+        chunks = [_record(b"vrsn", _encode(DATABASE_VERSION))]
+        chunks.extend(_record(b"otrk", _track_payload(track)) for track in tracks)
+    path.write_bytes(b"".join(chunks))
+
+
+@instrumented("seratodb.append")
+def append(tracks: Iterable[Track], path: Path) -> None:
+    """Añade registros ``otrk`` al final; el formato no tiene índice que actualizar."""
+
+    if not path.exists() or path.stat().st_size == 0:
+        dump(tracks, path)
+        return
+    crate = _is_crate(path)
+    chunks = [
+        _record(b"otrk", _record(b"ptrk", _encode(_to_serato_path(track))) if crate else _track_payload(track))
+        for track in tracks
+    ]
+    with path.open("ab") as handle:
+        handle.write(b"".join(chunks))
+
+
+def _is_crate(path: Path) -> bool:
+    return path.suffix.lower() == ".crate"
+
+
+def _track_payload(track: Track) -> bytes:
+    parts = [_record(b"pfil", _encode(_to_serato_path(track)))]
+    for tag, field in _TEXT_FIELDS.items():
+        value = getattr(track, field)
+        if value:
+            parts.append(_record(tag, _encode(value)))
+    if track.bpm is not None:
+        parts.append(_record(b"tbpm", _encode(f"{track.bpm:.2f}")))
+    if track.duration is not None:
+        parts.append(_record(b"tlen", _encode(_format_length(track.duration))))
+    if track.year is not None:
+        parts.append(_record(b"ttyr", _encode(str(track.year))))
+    return b"".join(parts)
+
+
+def _record(tag: bytes, payload: bytes) -> bytes:
+    return _HEADER.pack(tag, len(payload)) + payload
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-16-be")
+
+
+def _text(view: memoryview) -> str:
+    # str() decodifica directamente desde el buffer proyectado.
+    return str(view, "utf-16-be").rstrip("\x00")
+
+
+def _to_serato_path(track: Track) -> str:
+    if not track.location:
+        return ""
+    path = location_to_path(track.location)[0]
+    return path.lstrip("/")
+
+
+def _from_serato_path(path: str) -> str:
+    path = path.replace("\\", "/")
+    if not path or path.startswith("/") or (len(path) > 1 and path[1] == ":"):
+        return path
+    return "/" + path
+
+
+def _format_length(seconds: float) -> str:
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{rest:05.2f}"
+
+
+def _parse_length(text: str) -> float | None:
+    # "04:12.34" o "04:12".
+    minutes, sep, seconds = text.partition(":")
+    try:
+        return int(minutes) * 60 + float(seconds) if sep else float(text)
+    except ValueError:
+        return None
+
+
+def _safe_float(value: str) -> float | None:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _safe_int(value: str) -> int | None:
+    try:
+        return int(value)
+    except ValueError:
+        return None
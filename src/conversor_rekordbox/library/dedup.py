@@ -0,0 +1,208 @@
+"""Detección de pistas duplicadas en bibliotecas grandes.
+
+Comparar todos los pares es inviable con 200k pistas, así que solo se
+comparan candidatos que comparten una clave de bloqueo:
+
+* la ubicación normalizada (sin ``file://``, sin percent-encoding, en
+  minúsculas);
+* los tokens de artista + título sin acentos ni marcas como ``feat.``/``ft.``;
+* bandas LSH de una firma MinHash de esos tokens, que agrupan títulos
+  casi iguales.
+
+Cada candidato se confirma con la similitud de Jaccard real y una
+tolerancia de duración; los grupos se unen con *union-find*. El coste es
+lineal en el número de pistas.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+from urllib.parse import unquote, urlsplit
+
+from ..models import Track
+from ..utils.logger import get_logger
+from .index import tokenize
+
+logger = get_logger()
+
+# Palabras que no distinguen una pista de otra («feat.», «Original Mix»…).
+IGNORED_TOKENS = frozenset({"feat", "ft", "featuring", "original", "mix", "the", "and"})
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+@dataclass(frozen=True)
+class DedupPolicy:
+    """Parámetros de la detección.
+
+    ``bands * rows`` funciones hash forman la firma MinHash; con 8 bandas de
+    4 filas dos pistas con Jaccard 0.8 coinciden en alguna banda con
+    probabilidad > 0.9.
+    """
+
+    threshold: float = 0.8
+    duration_tolerance: float = 2.0
+    bands: int = 8
+    rows: int = 4
+    # Límite de comparaciones por cubeta para acotar cubetas enormes.
+    max_bucket_comparisons: int = 64
+    seed: int = 1
+
+    @property
+    def num_perm(self) -> int:
+        return self.bands * self.rows
+
+
+@dataclass(frozen=True)
+class DuplicateCluster:
+    """Grupo de pistas equivalentes; ``keep`` es el índice de la que se conserva."""
+
+    keep: int
+    duplicates: tuple[int, ...]
+
+    @property
+    def rows(self) -> tuple[int, ...]:
+        return (self.keep, *self.duplicates)
+
+
+def normalize_location(location: str | None) -> str | None:
+    if not location:
+        return None
+    if location.lower().startswith("file:"):
+        location = urlsplit(location).path
+    path = unquote(location).replace("\\", "/").casefold()
+    # "/C:/Music" (URI de Windows) y "c:/music" son la misma ruta.
+    if len(path) > 2 and path[0] == "/" and path[2] == ":":
+        path = path[1:]
+    return path or None
+
+
+def track_tokens(track: Track) -> frozenset[str]:
+    text = f"{track.artist or ''} {track.title or ''}"
+    return frozenset(token for token in tokenize(text) if token not in IGNORED_TOKENS)
+
+
+class _MinHasher:
+    def __init__(self, policy: DedupPolicy) -> None:
+        generator = random.Random(policy.seed)
+        self.params = [
+            (generator.randrange(1, _MERSENNE_PRIME), generator.randrange(0, _MERSENNE_PRIME))
+            for _ in range(policy.num_perm)
+        ]
+        self.bands = policy.bands
+        self.rows = policy.rows
+        self._token_cache: dict[str, list[int]] = {}
+
+    def _token_signature(self, token: str) -> list[int]:
+        signature = self._token_cache.get(token)
+        if signature is None:
+            base = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            signature = [(a * base + b) % _MERSENNE_PRIME for a, b in self.params]
+            self._token_cache[token] = signature
+        return signature
+
+    def band_keys(self, tokens: frozenset[str]) -> list[tuple[int, tuple[int, ...]]]:
+        # La firma de un conjunto es el mínimo por posición de las de sus tokens.
+        signatures = [self._token_signature(token) for token in tokens]
+        signature = list(map(min, *signatures)) if len(signatures) > 1 else signatures[0]
+        return [
+            (band, tuple(signature[band * self.rows : (band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, left: int, right: int) -> None:
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            # La raíz es siempre el índice menor: el primero en la biblioteca.
+            if right < left:
+                left, right = right, left
+            self.parent[right] = left
+
+
+def find_duplicates(tracks: Sequence[Track], policy: DedupPolicy | None = None) -> list[DuplicateCluster]:
+    """Agrupa las pistas duplicadas de ``tracks`` (por índice)."""
+
+    policy = policy or DedupPolicy()
+    hasher = _MinHasher(policy)
+    groups = _UnionFind(len(tracks))
+    tokens = [track_tokens(track) for track in tracks]
+    buckets: dict[object, list[int]] = {}
+
+    for row, track in enumerate(tracks):
+        location = normalize_location(track.location)
+        if location is not None:
+            first = buckets.setdefault(("location", location), [row])[0]
+            if first != row:
+                groups.union(first, row)
+
+        if not tokens[row]:
+            continue
+        keys: list[object] = [("exact", tokens[row])]
+        keys.extend(hasher.band_keys(tokens[row]))
+        for key in keys:
+            bucket = buckets.setdefault(key, [])
+            for other in bucket[: policy.max_bucket_comparisons]:
+                if groups.find(other) != groups.find(row) and _similar(tracks, tokens, other, row, policy):
+                    groups.union(other, row)
+            bucket.append(row)
+
+    members: dict[int, list[int]] = {}
+    for row in range(len(tracks)):
+        members.setdefault(groups.find(row), []).append(row)
+
+    clusters: list[DuplicateCluster] = []
+    for rows in members.values():
+        if len(rows) < 2:
+            continue
+        keep = max(rows, key=lambda row: (_completeness(tracks[row]), -row))
+        clusters.append(DuplicateCluster(keep=keep, duplicates=tuple(row for row in rows if row != keep)))
+    clusters.sort(key=lambda cluster: min(cluster.rows))
+    return clusters
+
+
+def drop_duplicates(tracks: Iterable[Track], policy: DedupPolicy | None = None) -> list[Track]:
+    """Devuelve ``tracks`` sin duplicados, conservando la pista más completa de cada grupo."""
+
+    tracks = list(tracks)
+    clusters = find_duplicates(tracks, policy)
+    dropped = {row for cluster in clusters for row in cluster.duplicates}
+    if dropped:
+        logger.info(
+            "Duplicados eliminados",
+            extra={"clusters": len(clusters), "dropped": len(dropped), "tracks": len(tracks)},
+        )
+    return [track for row, track in enumerate(tracks) if row not in dropped]
+
+
+def _similar(
+    tracks: Sequence[Track],
+    tokens: list[frozenset[str]],
+    left: int,
+    right: int,
+    policy: DedupPolicy,
+) -> bool:
+    first, second = tracks[left], tracks[right]
+    if first.duration is not None and second.duration is not None:
+        if abs(first.duration - second.duration) > policy.duration_tolerance:
+            return False
+    a, b = tokens[left], tokens[right]
+    return len(a & b) / len(a | b) >= policy.threshold
+
+
+def _completeness(track: Track) -> int:
+    return sum(value is not None and value != "" for value in vars(track).values())
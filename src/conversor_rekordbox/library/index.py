@@ -0,0 +1,179 @@
+"""Índice invertido en memoria para filtrar bibliotecas con consultas.
+
+Sintaxis (los términos se combinan con AND)::
+
+    genre:house bpm:120..128 year:2015..
+    artist:"daft punk" -genre:edit
+    disclosure            # palabra suelta: busca en todos los campos de texto
+
+Los campos de texto se normalizan (minúsculas, sin acentos) y se
+indexan por token; los numéricos se guardan ordenados y se consultan con
+``bisect``, así que una consulta cuesta O(log n + resultados) una vez
+construido el índice.
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from ..models import Track
+
+TEXT_FIELDS = ("title", "artist", "album", "genre", "comment")
+NUMERIC_FIELDS = ("bpm", "duration", "year", "rating")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class QueryError(ValueError):
+    """La consulta no se puede interpretar."""
+
+
+@dataclass(frozen=True)
+class Term:
+    field: str | None
+    tokens: tuple[str, ...] = ()
+    low: float | None = None
+    high: float | None = None
+    negated: bool = False
+
+    @property
+    def numeric(self) -> bool:
+        return self.field in NUMERIC_FIELDS
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(stripped)
+
+
+def parse_query(query: str) -> list[Term]:
+    """Convierte el texto de la consulta en términos; lanza :class:`QueryError`."""
+
+    try:
+        parts = shlex.split(query)
+    except ValueError as exc:
+        raise QueryError(f"Consulta mal formada: {exc}") from exc
+
+    terms: list[Term] = []
+    for part in parts:
+        negated = part.startswith("-") and len(part) > 1
+        if negated:
+            part = part[1:]
+        name, sep, value = part.partition(":")
+        if not sep:
+            terms.append(Term(field=None, tokens=_required_tokens(part), negated=negated))
+            continue
+        name = name.lower()
+        if name in NUMERIC_FIELDS:
+            low, high = _parse_range(name, value)
+            terms.append(Term(field=name, low=low, high=high, negated=negated))
+        elif name in TEXT_FIELDS:
+            terms.append(Term(field=name, tokens=_required_tokens(value), negated=negated))
+        else:
+            raise QueryError(f"Campo desconocido en la consulta: {name}")
+    return terms
+
+
+class LibraryIndex:
+    """Listas invertidas por token y columnas numéricas ordenadas sobre ``tracks``.
+
+    Los resultados conservan el orden original de la biblioteca.
+    """
+
+    def __init__(self, tracks: Iterable[Track]) -> None:
+        self.tracks: list[Track] = list(tracks)
+        self._postings: dict[str, dict[str, array]] = {name: {} for name in TEXT_FIELDS}
+        self._numeric: dict[str, tuple[list[float], array]] = {}
+
+        for row, track in enumerate(self.tracks):
+            for name in TEXT_FIELDS:
+                postings = self._postings[name]
+                for token in set(tokenize(getattr(track, name))):
+                    postings.setdefault(token, array("I")).append(row)
+
+        for name in NUMERIC_FIELDS:
+            pairs = sorted(
+                (float(value), row)
+                for row, track in enumerate(self.tracks)
+                if (value := getattr(track, name)) is not None
+            )
+            self._numeric[name] = ([value for value, _ in pairs], array("I", (row for _, row in pairs)))
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def search(self, query: str | Sequence[Term]) -> list[Track]:
+        return [self.tracks[row] for row in self.search_rows(query)]
+
+    def search_rows(self, query: str | Sequence[Term]) -> list[int]:
+        terms = parse_query(query) if isinstance(query, str) else list(query)
+        positive = [term for term in terms if not term.negated]
+        negative = [term for term in terms if term.negated]
+
+        if positive:
+            # Se intersecta empezando por el conjunto más pequeño.
+            candidates = sorted((self._rows_for(term) for term in positive), key=len)
+            rows = set(candidates[0])
+            for other in candidates[1:]:
+                rows.intersection_update(other)
+                if not rows:
+                    return []
+        else:
+            rows = set(range(len(self.tracks)))
+
+        for term in negative:
+            rows.difference_update(self._rows_for(term))
+        return sorted(rows)
+
+    def _rows_for(self, term: Term) -> set[int]:
+        if term.numeric:
+            values, rows = self._numeric[term.field]  # type: ignore[index]
+            start = 0 if term.low is None else bisect_left(values, term.low)
+            end = len(values) if term.high is None else bisect_right(values, term.high)
+            return set(rows[start:end])
+
+        fields = TEXT_FIELDS if term.field is None else (term.field,)
+        result: set[int] | None = None
+        for token in term.tokens:
+            matches: set[int] = set()
+            for name in fields:
+                matches.update(self._postings[name].get(token, ()))
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result or set()
+
+
+def filter_tracks(tracks: Iterable[Track], query: str) -> list[Track]:
+    """Atajo para una sola consulta; reutiliza :class:`LibraryIndex` para varias."""
+    return LibraryIndex(tracks).search(query)
+
+
+def _required_tokens(value: str) -> tuple[str, ...]:
+    tokens = tuple(tokenize(value))
+    if not tokens:
+        raise QueryError(f"Término vacío en la consulta: {value!r}")
+    return tokens
+
+
+def _parse_range(name: str, value: str) -> tuple[float | None, float | None]:
+    low_text, sep, high_text = value.partition("..")
+    try:
+        low = float(low_text) if low_text else None
+        high = (float(high_text) if high_text else None) if sep else low
+    except ValueError as exc:
+        raise QueryError(f"Valor numérico no válido para {name}: {value!r}") from exc
+    if low is None and high is None:
+        raise QueryError(f"Rango vacío para {name}")
+    if low is not None and high is not None and low > high:
+        raise QueryError(f"Rango invertido para {name}: {value!r}")
+    return low, high
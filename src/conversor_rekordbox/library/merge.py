@@ -0,0 +1,152 @@
+"""Fusión de varias bibliotecas en una sola.
+
+Las entradas se procesan una a una (*hash join* en streaming): cada pista
+se busca por su ubicación normalizada o, si no coincide, por sus tokens de
+artista + título con una tolerancia de duración. Solo se conserva en
+memoria una pista por clave única; la lista de cada entrada se libera al
+terminar de procesarla.
+
+Los conflictos de campos se resuelven con :class:`MergePolicy`: por
+defecto gana el primer valor no nulo (orden de las entradas), salvo
+``rating``, que se queda con el mayor.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Callable, Iterable, Mapping
+
+from ..models import Track
+from .dedup import normalize_location, track_tokens
+
+Resolver = Callable[[Any, Any], Any]
+
+
+def _prefer_first(current: Any, incoming: Any) -> Any:
+    return incoming if current is None else current
+
+
+def _prefer_last(current: Any, incoming: Any) -> Any:
+    return current if incoming is None else incoming
+
+
+def _prefer_max(current: Any, incoming: Any) -> Any:
+    if current is None or incoming is None:
+        return _prefer_first(current, incoming)
+    return max(current, incoming)
+
+
+def _prefer_min(current: Any, incoming: Any) -> Any:
+    if current is None or incoming is None:
+        return _prefer_first(current, incoming)
+    return min(current, incoming)
+
+
+RESOLVERS: dict[str, Resolver] = {
+    "first": _prefer_first,
+    "last": _prefer_last,
+    "max": _prefer_max,
+    "min": _prefer_min,
+}
+
+TRACK_FIELDS = tuple(item.name for item in fields(Track))
+
+
+@dataclass(frozen=True)
+class MergePolicy:
+    """Cómo resolver un campo presente en varias entradas.
+
+    ``default`` y los valores de ``fields`` son nombres de :data:`RESOLVERS`;
+    un valor nulo nunca sustituye a uno conocido.
+    """
+
+    default: str = "first"
+    fields: Mapping[str, str] = field(default_factory=lambda: {"rating": "max"})
+    duration_tolerance: float = 2.0
+
+    def resolvers(self) -> dict[str, Resolver]:
+        unknown = {self.default, *self.fields.values()} - RESOLVERS.keys()
+        if unknown:
+            raise ValueError(f"Regla de fusión desconocida: {', '.join(sorted(unknown))}")
+        return {name: RESOLVERS[self.fields.get(name, self.default)] for name in TRACK_FIELDS}
+
+
+@dataclass
+class MergeStats:
+    inputs: int = 0
+    seen: int = 0
+    merged: int = 0
+
+
+class TrackMerger:
+    """Acumula pistas de varias entradas y fusiona las que representan el mismo archivo."""
+
+    def __init__(self, policy: MergePolicy | None = None) -> None:
+        self.policy = policy or MergePolicy()
+        self._resolvers = self.policy.resolvers()
+        self._tracks: list[Track] = []
+        self._by_location: dict[str, int] = {}
+        self._by_metadata: dict[frozenset[str], list[int]] = {}
+        self.stats = MergeStats()
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def add(self, tracks: Iterable[Track]) -> None:
+        """Procesa una entrada completa; las anteriores tienen prioridad con ``first``."""
+
+        self.stats.inputs += 1
+        for track in tracks:
+            self.stats.seen += 1
+            slot = self._find(track)
+            if slot is None:
+                self._tracks.append(track)
+                self._register(len(self._tracks) - 1, track)
+                continue
+            self.stats.merged += 1
+            merged = self._resolve(self._tracks[slot], track)
+            self._tracks[slot] = merged
+            self._register(slot, merged)
+
+    def tracks(self) -> list[Track]:
+        return list(self._tracks)
+
+    def _find(self, track: Track) -> int | None:
+        location = normalize_location(track.location)
+        if location is not None and location in self._by_location:
+            return self._by_location[location]
+        tokens = track_tokens(track)
+        for slot in self._by_metadata.get(tokens, ()):
+            if _durations_match(self._tracks[slot].duration, track.duration, self.policy.duration_tolerance):
+                return slot
+        return None
+
+    def _register(self, slot: int, track: Track) -> None:
+        location = normalize_location(track.location)
+        if location is not None:
+            self._by_location.setdefault(location, slot)
+        tokens = track_tokens(track)
+        if tokens:
+            slots = self._by_metadata.setdefault(tokens, [])
+            if slot not in slots:
+                slots.append(slot)
+
+    def _resolve(self, current: Track, incoming: Track) -> Track:
+        changes = {}
+        for name, resolver in self._resolvers.items():
+            old = getattr(current, name)
+            new = resolver(old, getattr(incoming, name))
+            if new is not old:
+                changes[name] = new
+        return replace(current, **changes) if changes else current
+
+
+def merge_tracks(inputs: Iterable[Iterable[Track]], policy: MergePolicy | None = None) -> list[Track]:
+    merger = TrackMerger(policy)
+    for tracks in inputs:
+        merger.add(tracks)
+    return merger.tracks()
+
+
+def _durations_match(left: float | None, right: float | None, tolerance: float) -> bool:
+    return left is None or right is None or abs(left - right) <= tolerance
@@ -0,0 +1,155 @@
+"""Ordenación y agrupación de pistas con memoria acotada.
+
+:func:`sort_tracks` es un *merge sort* externo: las pistas se leen en
+tramos de ``run_size``, cada tramo se ordena en memoria y, si hay más de
+uno, se vuelca comprimido (``pickle`` + ``gzip``) a un directorio temporal.
+Después los tramos se mezclan con ``heapq.merge`` leyendo un bloque de cada
+uno, de modo que en memoria hay como mucho ``run_size`` pistas más un
+bloque por tramo. Si todo cabe en un tramo no se escribe nada a disco.
+
+El orden es estable e ignora mayúsculas y acentos; los valores vacíos van
+al final.
+:func:`iter_groups` usa la misma ordenación para recorrer las pistas por
+grupos (p. ej. un grupo por género) sin cargar más de un grupo a la vez.
+"""
+
+from __future__ import annotations
+
+import gzip
+import heapq
+import pickle
+import re
+import tempfile
+import unicodedata
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from ..models import Track
+
+DEFAULT_ORDER = ("artist", "album", "title")
+SORTABLE_FIELDS = ("title", "artist", "album", "genre", "duration", "bpm", "comment", "location", "year", "rating")
+RUN_SIZE = 100_000
+_BLOCK = 1_000
+
+SortKey = Callable[[Track], tuple]
+
+
+def parse_order(text: str) -> tuple[str, ...]:
+    """Convierte ``"artist,album,title"`` en una tupla de campos validada."""
+
+    fields = tuple(part.strip() for part in text.split(",") if part.strip())
+    unknown = [name for name in fields if name not in SORTABLE_FIELDS]
+    if unknown or not fields:
+        raise ValueError(
+            f"Campo de ordenación no válido: {', '.join(unknown) or text!r} "
+            f"(disponibles: {', '.join(SORTABLE_FIELDS)})"
+        )
+    return fields
+
+
+def sort_key(fields: Sequence[str] = DEFAULT_ORDER) -> SortKey:
+    for name in fields:
+        if name not in SORTABLE_FIELDS:
+            raise ValueError(f"Campo de ordenación no válido: {name}")
+
+    def key(track: Track) -> tuple:
+        return tuple(_value_key(getattr(track, name)) for name in fields)
+
+    return key
+
+
+def sort_tracks(
+    tracks: Iterable[Track],
+    fields: Sequence[str] = DEFAULT_ORDER,
+    run_size: int = RUN_SIZE,
+    tmp_dir: str | Path | None = None,
+) -> Iterator[Track]:
+    """Devuelve ``tracks`` ordenadas por ``fields`` usando como mucho ``run_size`` pistas en memoria."""
+
+    key = sort_key(fields)
+    iterator = iter(tracks)
+    first = sorted(islice(iterator, run_size), key=key)
+    if len(first) < run_size:
+        yield from first
+        return
+
+    with tempfile.TemporaryDirectory(prefix="conversor-sort-", dir=tmp_dir) as directory:
+        runs = [_write_run(Path(directory), 0, first)]
+        del first
+        while True:
+            chunk = sorted(islice(iterator, run_size), key=key)
+            if not chunk:
+                break
+            runs.append(_write_run(Path(directory), len(runs), chunk))
+        del chunk
+        # heapq.merge respeta el orden de los tramos en los empates: estable.
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=key)
+
+
+def iter_groups(
+    tracks: Iterable[Track],
+    field: str,
+    order: Sequence[str] = DEFAULT_ORDER,
+    run_size: int = RUN_SIZE,
+    tmp_dir: str | Path | None = None,
+) -> Iterator[tuple[Any, list[Track]]]:
+    """Recorre ``(valor, pistas)`` por cada valor distinto de ``field``, ordenadas por ``order``.
+
+    Los valores de texto se agrupan sin distinguir mayúsculas ni acentos; se devuelve
+    el valor de la primera pista del grupo.
+    """
+
+    group_key = sort_key([field])
+    ordered = sort_tracks(tracks, (field, *order), run_size, tmp_dir)
+    for _, members in groupby(ordered, key=group_key):
+        group = list(members)
+        yield getattr(group[0], field), group
+
+
+def group_filename(value: Any, used: set[str], extension: str = "") -> str:
+    """Nombre de archivo seguro y único (sin distinguir mayúsculas) para un grupo."""
+
+    base = _UNSAFE_RE.sub("_", str(value)).strip(" .") if value not in (None, "") else ""
+    base = base or "Sin valor"
+    name = f"{base}{extension}"
+    counter = 2
+    while name.casefold() in used:
+        name = f"{base} ({counter}){extension}"
+        counter += 1
+    used.add(name.casefold())
+    return name
+
+
+_UNSAFE_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def _value_key(value: Any) -> tuple:
+    # (vacío, valor): los valores ausentes van al final sin comparar tipos.
+    if value is None or value == "":
+        return (1, "")
+    if isinstance(value, str):
+        folded = value.casefold()
+        if not folded.isascii():
+            decomposed = unicodedata.normalize("NFKD", folded)
+            folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return (0, folded)
+    return (0, value)
+
+
+def _write_run(directory: Path, index: int, tracks: list[Track]) -> Path:
+    path = directory / f"run-{index:05d}.pkl.gz"
+    with gzip.open(path, "wb", compresslevel=1) as handle:
+        for start in range(0, len(tracks), _BLOCK):
+            pickle.dump(tracks[start : start + _BLOCK], handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: Path) -> Iterator[Track]:
+    with gzip.open(path, "rb") as handle:
+        while True:
+            try:
+                block = pickle.load(handle)
+            except EOFError:
+                return
+            yield from block
@@ -0,0 +1,229 @@
+"""Reubicación de ``Track.location`` al mover una biblioteca de máquina.
+
+Las reglas ``origen -> destino`` se guardan en un trie por segmentos de
+ruta, así que cada pista se resuelve con el prefijo más largo en
+O(profundidad). Las ubicaciones ``file://`` (Rekordbox) que se reescriben
+se vuelven a codificar como ``file://localhost/...``; las rutas planas
+(Serato, Engine DJ) conservan su forma y las ubicaciones a las que no
+aplica ninguna regla no se tocan.
+
+La comprobación de existencia agrupa las rutas por carpeta y lee cada
+carpeta una sola vez con ``os.scandir`` en un pool de hilos, en lugar de
+hacer un ``stat`` por pista. Las rutas relativas se resuelven contra la
+carpeta de la biblioteca (``base_dir``), no contra el directorio actual.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Iterator, Mapping
+
+from ..models import Track
+from ..utils.locations import location_to_path, path_to_location
+
+DEFAULT_WORKERS = 16
+
+
+class PrefixTrie:
+    """Trie de prefijos de ruta; ``rewrite`` aplica la regla más larga."""
+
+    def __init__(self, mappings: Mapping[str, str] | None = None, ignore_case: bool = False) -> None:
+        self.ignore_case = ignore_case
+        self._root: dict[str, object] = {}
+        for source, target in (mappings or {}).items():
+            self.add(source, target)
+
+    def add(self, source: str, target: str) -> None:
+        node = self._root
+        for segment in self._segments(source):
+            node = node.setdefault(segment, {})  # type: ignore[assignment]
+        node[""] = _strip_separator(_normalize_separators(target))
+
+    def rewrite(self, path: str) -> str | None:
+        """Devuelve ``path`` con el prefijo sustituido o ``None`` si ninguna regla aplica."""
+
+        node = self._root
+        segments = _normalize_separators(path).split("/")
+        match: tuple[int, str] | None = None
+        for depth, segment in enumerate(segments):
+            key = segment.casefold() if self.ignore_case else segment
+            child = node.get(key)
+            if child is None:
+                break
+            node = child  # type: ignore[assignment]
+            if "" in node:
+                match = (depth + 1, node[""])  # type: ignore[assignment]
+        if match is None:
+            return None
+        depth, target = match
+        rest = segments[depth:]
+        return "/".join([target.rstrip("/"), *rest]) if rest else target
+
+    def _segments(self, path: str) -> list[str]:
+        stripped = _strip_separator(_normalize_separators(path))
+        segments = [""] if stripped == "/" else stripped.split("/")
+        return [segment.casefold() for segment in segments] if self.ignore_case else segments
+
+
+@dataclass
+class RelocationReport:
+    tracks: list[Track]
+    relocated: int = 0
+    checked: int = 0
+    # Índices (en ``tracks``) de las pistas cuyo archivo no existe.
+    missing: list[int] = field(default_factory=list)
+
+    def missing_locations(self) -> list[str]:
+        return [self.tracks[row].location or "" for row in self.missing]
+
+
+def relocate_tracks(
+    tracks: Iterable[Track],
+    mappings: Mapping[str, str] | PrefixTrie,
+    check_exists: bool = True,
+    ignore_case: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    base_dir: str | os.PathLike[str] | None = None,
+) -> RelocationReport:
+    """Reescribe las ubicaciones según ``mappings`` y busca los archivos que faltan.
+
+    Las pistas modificadas se copian; las demás se devuelven tal cual.
+    ``base_dir`` es la carpeta contra la que se resuelven las rutas
+    relativas (la del archivo de la biblioteca). Con reglas que ignoran
+    mayúsculas la existencia también se comprueba sin distinguirlas.
+    """
+
+    trie = mappings if isinstance(mappings, PrefixTrie) else PrefixTrie(mappings, ignore_case)
+    report = RelocationReport(tracks=[])
+    paths: list[str | None] = []
+
+    for track in tracks:
+        relocated, path, changed = _relocate_one(track, trie)
+        report.tracks.append(relocated)
+        report.relocated += changed
+        paths.append(path)
+
+    if check_exists:
+        existing = existing_paths(
+            (path for path in paths if path), workers=workers, base_dir=base_dir, ignore_case=trie.ignore_case
+        )
+        report.checked = sum(path is not None for path in paths)
+        report.missing = [row for row, path in enumerate(paths) if path and path not in existing]
+    return report
+
+
+def iter_relocated(
+    tracks: Iterable[Track],
+    mappings: Mapping[str, str] | PrefixTrie,
+    ignore_case: bool = False,
+) -> Iterator[Track]:
+    """Como :func:`relocate_tracks` sin comprobar archivos, pista a pista y sin materializar."""
+
+    trie = mappings if isinstance(mappings, PrefixTrie) else PrefixTrie(mappings, ignore_case)
+    for track in tracks:
+        yield _relocate_one(track, trie)[0]
+
+
+def _relocate_one(track: Track, trie: PrefixTrie) -> tuple[Track, str | None, bool]:
+    """Devuelve ``(pista, ruta resultante, si se reubicó)``."""
+
+    if not track.location:
+        return track, None, False
+    path, as_uri = location_to_path(track.location)
+    rewritten = trie.rewrite(path)
+    if rewritten is not None:
+        path = rewritten
+        location = path_to_location(path, as_uri)
+        if not as_uri and "\\" in track.location:
+            location = location.replace("/", "\\")
+    else:
+        location = track.location
+    relocated = track if location == track.location else replace(track, location=location)
+    return relocated, path, rewritten is not None
+
+
+def existing_paths(
+    paths: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    base_dir: str | os.PathLike[str] | None = None,
+    ignore_case: bool = False,
+) -> set[str]:
+    """Devuelve el subconjunto de ``paths`` que existe, con un ``scandir`` por carpeta.
+
+    Las rutas relativas se resuelven contra ``base_dir`` (por defecto, el
+    directorio actual). Con ``ignore_case`` los nombres de archivo y de
+    carpeta se comparan sin distinguir mayúsculas.
+    """
+
+    base = _normalize_separators(os.fspath(base_dir if base_dir is not None else os.getcwd()))
+    by_directory: dict[str, dict[str, list[str]]] = {}
+    for path in paths:
+        absolute = path if _is_absolute(path) else f"{base.rstrip('/')}/{path}"
+        directory, _, name = absolute.rpartition("/")
+        key = name.casefold() if ignore_case else name
+        by_directory.setdefault(directory or "/", {}).setdefault(key, []).append(path)
+
+    def scan(directory: str) -> list[str]:
+        wanted = by_directory[directory]
+        try:
+            entries = _list_directory(directory)
+        except OSError:
+            resolved = _resolve_casefold(directory) if ignore_case else None
+            if resolved is None:
+                return []
+            try:
+                entries = _list_directory(resolved)
+            except OSError:
+                return []
+        present: list[str] = []
+        for name in entries:
+            present.extend(wanted.get(name.casefold() if ignore_case else name, ()))
+        return present
+
+    found: set[str] = set()
+    if not by_directory:
+        return found
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(by_directory)))) as pool:
+        for present in pool.map(scan, by_directory):
+            found.update(present)
+    return found
+
+
+def _list_directory(directory: str) -> list[str]:
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries]
+
+
+def _resolve_casefold(directory: str) -> str | None:
+    """Busca ``directory`` segmento a segmento sin distinguir mayúsculas."""
+
+    head, _, _ = directory.partition("/")
+    current = head + "/"
+    for segment in directory[len(current):].split("/"):
+        if not segment:
+            continue
+        try:
+            names = _list_directory(current)
+        except OSError:
+            return None
+        wanted = segment.casefold()
+        match = next((name for name in names if name.casefold() == wanted), None)
+        if match is None:
+            return None
+        current = f"{current.rstrip('/')}/{match}"
+    return current
+
+
+def _is_absolute(path: str) -> bool:
+    # "C:/Music" cuenta como absoluta aunque no estemos en Windows.
+    return path.startswith("/") or (len(path) > 1 and path[1] == ":")
+
+
+def _normalize_separators(path: str) -> str:
+    return path.replace("\\", "/")
+
+
+def _strip_separator(path: str) -> str:
+    return path.rstrip("/") or "/"
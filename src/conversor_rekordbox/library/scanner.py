@@ -0,0 +1,499 @@
+"""Escaneo de carpetas de audio para crear una biblioteca desde las etiquetas.
+
+Se recorren las carpetas con ``os.scandir`` y de cada archivo se lee solo
+la cabecera: el bloque ID3v2 y la primera trama MPEG de los MP3, los
+bloques de metadatos de los FLAC y el átomo ``moov`` de los MP4/M4A (el
+audio se salta con ``seek``). El trabajo se reparte en un pool de hilos.
+
+Con ``cache_path`` los resultados se guardan por ruta junto con el
+``mtime`` y el tamaño del archivo, de modo que al volver a escanear solo
+se leen los archivos nuevos o modificados. Un archivo cuyo contenido no se
+puede interpretar se guarda como inválido y, como el resto, solo se vuelve
+a leer si cambian su ``mtime`` o su tamaño; uno que no se pudo abrir
+(permisos, error de E/S) queda marcado como fallido y se reintenta siempre.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator
+
+from ..models import Track
+from ..utils.locations import path_to_location
+from ..utils.logger import get_logger
+
+logger = get_logger()
+
+AUDIO_EXTENSIONS = frozenset({".mp3", ".flac", ".m4a", ".mp4"})
+DEFAULT_WORKERS = 8
+CACHE_VERSION = 1
+
+# Campos de Track que se guardan en la caché (todos escalares).
+_CACHED_FIELDS = ("title", "artist", "album", "genre", "duration", "bpm", "comment", "year")
+
+
+@dataclass
+class ScanResult:
+    tracks: list[Track]
+    scanned: int = 0
+    cached: int = 0
+    failed: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    path: str
+    mtime_ns: int
+    size: int
+
+
+def iter_audio_files(roots: Iterable[str | Path], extensions: frozenset[str] = AUDIO_EXTENSIONS) -> Iterator[FileInfo]:
+    """Recorre ``roots`` en profundidad con ``os.scandir`` (sin seguir enlaces a carpetas)."""
+
+    pending = [os.fspath(root) for root in roots]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions:
+                            stat = entry.stat()
+                            yield FileInfo(entry.path, stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        except OSError:
+            logger.warning("No se pudo leer la carpeta", extra={"path": directory})
+
+
+def scan_library(
+    roots: Iterable[str | Path],
+    cache_path: Path | None = None,
+    workers: int = DEFAULT_WORKERS,
+    as_uri: bool = False,
+) -> ScanResult:
+    """Crea :class:`Track` para cada archivo de audio bajo ``roots``.
+
+    Args:
+        roots: carpetas a recorrer.
+        cache_path: archivo JSON de caché; se lee y se reescribe si se indica.
+        workers: hilos que leen etiquetas en paralelo.
+        as_uri: guardar la ubicación como ``file://`` (Rekordbox) en lugar
+            de ruta plana.
+    """
+
+    cache = load_index(cache_path)
+    files = sorted(iter_audio_files(roots), key=lambda info: info.path)
+    result = ScanResult(tracks=[])
+    new_cache: dict[str, dict[str, Any]] = {}
+
+    to_read: list[FileInfo] = []
+    for info in files:
+        entry = cache.get(info.path)
+        if is_current(entry, info):
+            new_cache[info.path] = entry
+            result.cached += 1
+        else:
+            to_read.append(info)
+
+    for info, fields, error in read_files(to_read, workers):
+        if error is not None:
+            result.failed.append(info.path)
+        new_cache[info.path] = index_entry(info, fields, error)
+        result.scanned += 1
+
+    for info in files:
+        result.tracks.append(track_from_fields(info.path, new_cache[info.path]["fields"], as_uri))
+
+    if cache_path is not None and (result.scanned or len(new_cache) != len(cache)):
+        save_index(cache_path, new_cache)
+    return result
+
+
+def read_files(
+    files: list[FileInfo], workers: int = DEFAULT_WORKERS
+) -> Iterator[tuple[FileInfo, dict[str, Any], str | None]]:
+    """Lee las etiquetas de ``files`` en paralelo.
+
+    Devuelve ``(info, campos, error)``: ``error`` es ``None``, ``"invalid"``
+    si el contenido no se pudo interpretar o ``"failed"`` si el archivo no se
+    pudo abrir; en ambos casos los campos quedan vacíos.
+    """
+
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+        for info, (fields, error) in zip(files, pool.map(_read_fields, files)):
+            yield info, fields, error
+
+
+def read_tags(path: str | Path) -> dict[str, Any]:
+    """Lee las etiquetas de un archivo de audio según su extensión."""
+
+    path = os.fspath(path)
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as handle:
+        if extension == ".flac":
+            return _read_flac(handle)
+        if extension in {".m4a", ".mp4"}:
+            return _read_mp4(handle)
+        return _read_mp3(handle, os.fstat(handle.fileno()).st_size)
+
+
+def _read_fields(info: FileInfo) -> tuple[dict[str, Any], str | None]:
+    try:
+        tags = read_tags(info.path)
+    except OSError:
+        logger.warning("No se pudo abrir el archivo", extra={"path": info.path})
+        return {}, "failed"
+    except (ValueError, struct.error, IndexError):
+        logger.warning("No se pudieron leer las etiquetas", extra={"path": info.path})
+        return {}, "invalid"
+    return {name: tags[name] for name in _CACHED_FIELDS if tags.get(name) not in (None, "")}, None
+
+
+def track_from_fields(path: str, fields: dict[str, Any], as_uri: bool) -> Track:
+    posix = Path(path).as_posix()
+    return Track(
+        title=fields.get("title") or Path(path).stem,
+        artist=fields.get("artist") or "",
+        album=fields.get("album"),
+        genre=fields.get("genre"),
+        duration=fields.get("duration"),
+        bpm=fields.get("bpm"),
+        comment=fields.get("comment"),
+        location=path_to_location(posix, as_uri),
+        year=fields.get("year"),
+    )
+
+
+# --- ID3v2 / MPEG ---------------------------------------------------------------
+
+_ID3_FRAMES = {
+    b"TIT2": "title", b"TT2": "title",
+    b"TPE1": "artist", b"TP1": "artist",
+    b"TALB": "album", b"TAL": "album",
+    b"TCON": "genre", b"TCO": "genre",
+    b"TBPM": "bpm", b"TBP": "bpm",
+    b"TDRC": "year", b"TYER": "year", b"TYE": "year",
+    b"COMM": "comment", b"COM": "comment",
+    b"TLEN": "length_ms", b"TLE": "length_ms",
+}
+_ID3_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+
+# Bitrates (kbps) de Layer III: MPEG-1 y MPEG-2/2.5.
+_MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _read_mp3(handle: BinaryIO, file_size: int) -> dict[str, Any]:
+    tags, audio_start = _read_id3(handle)
+    if "length_ms" in tags:
+        tags["duration"] = _to_float(tags.pop("length_ms"), scale=1000)
+    if tags.get("duration") is None:
+        handle.seek(audio_start)
+        tags["duration"] = _mpeg_duration(handle.read(4096), file_size - audio_start)
+    return tags
+
+
+def _read_id3(handle: BinaryIO) -> tuple[dict[str, Any], int]:
+    header = handle.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return {}, 0
+    major, flags = header[3], header[5]
+    size = _syncsafe(header[6:10])
+    data = handle.read(size)
+    tags: dict[str, Any] = {}
+
+    position = 0
+    if flags & 0x40 and major >= 3:
+        # Cabecera extendida: en 2.4 el tamaño es syncsafe y se incluye a sí mismo.
+        extended = data[:4]
+        position = _syncsafe(extended) if major == 4 else 4 + int.from_bytes(extended, "big")
+    id_size, header_size = (3, 6) if major == 2 else (4, 10)
+
+    while position + header_size <= len(data):
+        frame_id = data[position : position + id_size]
+        if not frame_id.strip(b"\x00"):
+            break  # relleno
+        raw_size = data[position + id_size : position + id_size + (3 if major == 2 else 4)]
+        frame_size = _syncsafe(raw_size) if major == 4 else int.from_bytes(raw_size, "big")
+        payload = data[position + header_size : position + header_size + frame_size]
+        position += header_size + frame_size
+        name = _ID3_FRAMES.get(frame_id)
+        if name is None or name in tags or not payload:
+            continue
+        text = _id3_text(payload, comment=name == "comment")
+        if not text:
+            continue
+        if name == "bpm":
+            tags[name] = _to_float(text)
+        elif name == "year":
+            tags[name] = _to_year(text)
+        else:
+            tags[name] = text
+    return tags, 10 + size + (10 if flags & 0x10 else 0)
+
+
+def _id3_text(payload: bytes, comment: bool = False) -> str:
+    encoding = _ID3_ENCODINGS.get(payload[0], "latin-1")
+    body = payload[4:] if comment else payload[1:]  # COMM: codificación + idioma
+    text = body.decode(encoding, errors="replace").replace("\ufeff", "")
+    parts = [part for part in text.split("\x00") if part]
+    if not parts:
+        return ""
+    # COMM lleva "descripción\0texto"; los marcos de texto, valores separados por \0.
+    return (parts[-1] if comment else parts[0]).strip()
+
+
+def _mpeg_duration(data: bytes, audio_size: int) -> float | None:
+    for offset in range(len(data) - 4):
+        if data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+            continue
+        version = (data[offset + 1] >> 3) & 0x03
+        layer = (data[offset + 1] >> 1) & 0x03
+        bitrate_index = data[offset + 2] >> 4
+        rate_index = (data[offset + 2] >> 2) & 0x03
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue  # solo Layer III con valores válidos
+        mpeg1 = version == 3
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (data[offset + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+        xing = offset + 4 + side_info
+        if data[xing : xing + 4] in (b"Xing", b"Info"):
+            (xing_flags,) = struct.unpack_from(">I", data, xing + 4)
+            if xing_flags & 0x01:
+                (frames,) = struct.unpack_from(">I", data, xing + 8)
+                return round(frames * samples_per_frame / sample_rate, 3)
+        vbri = offset + 4 + 32
+        if data[vbri : vbri + 4] == b"VBRI":
+            (frames,) = struct.unpack_from(">I", data, vbri + 14)
+            return round(frames * samples_per_frame / sample_rate, 3)
+
+        bitrate = (_MPEG1_BITRATES if mpeg1 else _MPEG2_BITRATES)[bitrate_index] * 1000
+        return round((audio_size - offset) * 8 / bitrate, 3)
+    return None
+
+
+# --- FLAC -------------------------------------------------------------------------
+
+_VORBIS_FIELDS = {
+    "TITLE": "title",
+    "ARTIST": "artist",
+    "ALBUM": "album",
+    "GENRE": "genre",
+    "BPM": "bpm",
+    "DATE": "year",
+    "YEAR": "year",
+    "COMMENT": "comment",
+    "DESCRIPTION": "comment",
+}
+
+
+def _read_flac(handle: BinaryIO) -> dict[str, Any]:
+    if handle.read(4) != b"fLaC":
+        raise ValueError("No es un archivo FLAC")
+    tags: dict[str, Any] = {}
+    while True:
+        header = handle.read(4)
+        if len(header) < 4:
+            break
+        last, block_type = header[0] & 0x80, header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:  # STREAMINFO
+            info = handle.read(length)
+            sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+            total = ((info[13] & 0x0F) << 32) | int.from_bytes(info[14:18], "big")
+            if sample_rate and total:
+                tags["duration"] = round(total / sample_rate, 3)
+        elif block_type == 4:  # VORBIS_COMMENT
+            _parse_vorbis(handle.read(length), tags)
+        else:
+            handle.seek(length, os.SEEK_CUR)  # PICTURE, SEEKTABLE…: sin leer
+        if last:
+            break
+    return tags
+
+
+def _parse_vorbis(block: bytes, tags: dict[str, Any]) -> None:
+    vendor_length = int.from_bytes(block[:4], "little")
+    position = 4 + vendor_length
+    count = int.from_bytes(block[position : position + 4], "little")
+    position += 4
+    for _ in range(count):
+        length = int.from_bytes(block[position : position + 4], "little")
+        key, _, value = block[position + 4 : position + 4 + length].decode("utf-8", errors="replace").partition("=")
+        position += 4 + length
+        name = _VORBIS_FIELDS.get(key.upper())
+        if name is None or name in tags or not value:
+            continue
+        tags[name] = _to_float(value) if name == "bpm" else _to_year(value) if name == "year" else value
+
+
+# --- MP4 / M4A --------------------------------------------------------------------
+
+_MP4_FIELDS = {
+    b"\xa9nam": "title",
+    b"\xa9ART": "artist",
+    b"\xa9alb": "album",
+    b"\xa9gen": "genre",
+    b"\xa9day": "year",
+    b"\xa9cmt": "comment",
+    b"tmpo": "bpm",
+}
+
+
+def _read_mp4(handle: BinaryIO) -> dict[str, Any]:
+    # Se recorren los átomos de primer nivel saltando "mdat" con seek.
+    while True:
+        header = handle.read(8)
+        if len(header) < 8:
+            raise ValueError("MP4 sin átomo moov")
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", handle.read(8))[0]
+            header_size = 16
+        if kind == b"moov":
+            return _parse_moov(handle.read(size - header_size))
+        if size == 0:
+            raise ValueError("MP4 sin átomo moov")
+        handle.seek(size - header_size, os.SEEK_CUR)
+
+
+def _iter_atoms(data: bytes, start: int = 0, end: int | None = None) -> Iterator[tuple[bytes, int, int]]:
+    end = len(data) if end is None else end
+    position = start
+    while position + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, position)
+        body = position + 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, body)
+            body += 8
+        elif size == 0:
+            size = end - position
+        if size < 8:
+            break
+        yield kind, body, min(position + size, end)
+        position += size
+
+
+def _parse_moov(moov: bytes) -> dict[str, Any]:
+    tags: dict[str, Any] = {}
+    for kind, start, end in _iter_atoms(moov):
+        if kind == b"mvhd":
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", moov, start + 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", moov, start + 12)
+            if timescale:
+                tags["duration"] = round(duration / timescale, 3)
+        elif kind == b"udta":
+            for meta_kind, meta_start, meta_end in _iter_atoms(moov, start, end):
+                if meta_kind != b"meta":
+                    continue
+                # "meta" es un full box: 4 bytes de versión y flags.
+                for list_kind, list_start, list_end in _iter_atoms(moov, meta_start + 4, meta_end):
+                    if list_kind == b"ilst":
+                        _parse_ilst(moov, list_start, list_end, tags)
+    return tags
+
+
+def _parse_ilst(data: bytes, start: int, end: int, tags: dict[str, Any]) -> None:
+    for kind, item_start, item_end in _iter_atoms(data, start, end):
+        name = _MP4_FIELDS.get(kind)
+        if name is None:
+            continue
+        for data_kind, data_start, data_end in _iter_atoms(data, item_start, item_end):
+            if data_kind != b"data":
+                continue
+            value = data[data_start + 8 : data_end]  # tipo (4) + idioma (4)
+            if name == "bpm":
+                tags[name] = float(int.from_bytes(value, "big")) if value else None
+            elif name == "year":
+                tags[name] = _to_year(value.decode("utf-8", errors="replace"))
+            else:
+                tags[name] = value.decode("utf-8", errors="replace")
+            break
+
+
+# --- Utilidades e índice ---------------------------------------------------------
+
+
+def _syncsafe(data: bytes) -> int:
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _to_float(text: str, scale: float = 1.0) -> float | None:
+    try:
+        return float(text.strip().replace(",", ".")) / scale
+    except ValueError:
+        return None
+
+
+def _to_year(text: str) -> int | None:
+    digits = text.strip()[:4]
+    return int(digits) if digits.isdigit() else None
+
+
+def index_entry(info: FileInfo, fields: dict[str, Any], error: str | None = None) -> dict[str, Any]:
+    """Entrada del índice; ``error`` (``"failed"`` o ``"invalid"``) se guarda como marca."""
+
+    entry: dict[str, Any] = {"mtime_ns": info.mtime_ns, "size": info.size, "fields": fields}
+    if error is not None:
+        entry[error] = True
+    return entry
+
+
+def is_current(entry: dict[str, Any] | None, info: FileInfo, retry_failed: bool = True) -> bool:
+    """``True`` si la entrada del índice corresponde al mismo ``mtime`` y tamaño.
+
+    Un archivo que no se pudo abrir nunca está al día salvo con
+    ``retry_failed=False``; uno inválido sí, mientras no cambie.
+    """
+
+    if not entry or (retry_failed and entry.get("failed")):
+        return False
+    return entry.get("mtime_ns") == info.mtime_ns and entry.get("size") == info.size
+
+
+def load_index(cache_path: Path | None) -> dict[str, dict[str, Any]]:
+    """Lee el índice ``ruta -> {mtime_ns, size, fields}``; vacío si no existe o no es válido."""
+
+    if cache_path is None or not cache_path.exists():
+        return {}
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Caché de escaneo ilegible", extra={"path": str(cache_path)})
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_index(cache_path: Path, files: dict[str, dict[str, Any]]) -> None:
+    """Reescribe el índice de forma atómica."""
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=cache_path.parent, prefix=f".{cache_path.name}.", delete=False
+    ) as handle:
+        json.dump({"version": CACHE_VERSION, "files": files}, handle, ensure_ascii=False)
+    os.replace(handle.name, cache_path)
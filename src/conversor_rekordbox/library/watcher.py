@@ -0,0 +1,215 @@
+"""Vigilancia de carpetas para mantener una biblioteca exportada al día.
+
+:class:`LibraryWatcher` recorre las carpetas cada ``interval`` segundos
+(sondeo con ``os.scandir``, sin APIs del sistema operativo) y compara el
+``mtime`` y el tamaño de cada archivo con un índice persistente (el mismo
+que usa :mod:`conversor_rekordbox.library.scanner`). Solo se leen las
+etiquetas de los archivos nuevos o modificados y los cambios se aplican a
+la biblioteca de destino con el módulo de su formato:
+
+* si solo hay altas, con ``append`` (sin reescribir la biblioteca);
+* si hay bajas o modificaciones, cargando la biblioteca, sustituyendo esas
+  pistas y volviendo a escribirla con ``dump``.
+
+Los cambios se acumulan hasta que el árbol pasa ``debounce`` segundos sin
+variar, de modo que una copia de cientos de archivos (o un archivo que aún
+se está copiando) se aplica de una vez. Entre sondeos se espera al menos lo
+necesario para que el propio vigilante no use más de ``max_cpu`` de un
+núcleo.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from ..converter import Format, detect_format, get_format_module
+from ..models import Track
+from ..utils import metrics
+from ..utils.logger import get_logger
+from .dedup import normalize_location
+from .scanner import (
+    FileInfo,
+    index_entry,
+    is_current,
+    iter_audio_files,
+    load_index,
+    read_files,
+    save_index,
+    track_from_fields,
+)
+
+logger = get_logger()
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_MAX_CPU = 0.1
+
+
+@dataclass
+class Delta:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def default_index_path(library_path: Path) -> Path:
+    return library_path.with_name(f".{library_path.name}.watch.json")
+
+
+class LibraryWatcher:
+    """Aplica a ``library_path`` las altas, bajas y cambios de ``roots``.
+
+    Args:
+        roots: carpetas vigiladas.
+        library_path: biblioteca de destino; se crea si no existe.
+        library_format: formato de la biblioteca; si es ``None`` se deduce
+            de su cabecera o de la extensión.
+        index_path: índice persistente ``mtime``/tamaño. Por defecto,
+            ``.<biblioteca>.watch.json`` junto a la biblioteca.
+        interval: segundos mínimos entre sondeos.
+        debounce: segundos sin cambios antes de aplicar los pendientes.
+        max_cpu: fracción de un núcleo que puede ocupar el sondeo.
+        workers: hilos para leer etiquetas.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[str | Path],
+        library_path: str | Path,
+        library_format: str | None = None,
+        index_path: str | Path | None = None,
+        interval: float = DEFAULT_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+        max_cpu: float = DEFAULT_MAX_CPU,
+        workers: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.library_path = Path(library_path)
+        fmt = library_format or detect_format(self.library_path)
+        if fmt is None:
+            raise ValueError(f"No se pudo inferir el formato de la biblioteca a partir de {self.library_path}.")
+        self.library_format = fmt
+        self.index_path = Path(index_path) if index_path is not None else default_index_path(self.library_path)
+        self.interval = interval
+        self.debounce = debounce
+        self.max_cpu = max_cpu
+        self.workers = workers
+        self._clock = clock
+        self._as_uri = fmt == Format.REKORDBOX.value
+        self._index = load_index(self.index_path)
+        # Sin índice previo la biblioteca puede contener ya las pistas: las
+        # altas del primer sondeo sustituyen a las existentes.
+        self._fresh = not self._index
+        self._snapshot: dict[str, tuple[int, int]] | None = None
+        # Lecturas hechas en ``_diff`` que ``_apply`` reutiliza en el mismo sondeo.
+        self._read: dict[str, tuple[FileInfo, dict[str, Any], str | None]] = {}
+        self._last_change = 0.0
+
+    def poll(self) -> Delta:
+        """Sondea una vez; devuelve los cambios aplicados (vacío si aún no hay que aplicar)."""
+
+        now = self._clock()
+        files = {info.path: info for info in iter_audio_files(self.roots)}
+        snapshot = {path: (info.mtime_ns, info.size) for path, info in files.items()}
+        if snapshot != self._snapshot:
+            self._snapshot = snapshot
+            self._last_change = now
+
+        delta = self._diff(files)
+        if not delta or now - self._last_change < self.debounce:
+            return Delta()
+        with metrics.stage("watch") as span:
+            self._apply(delta, files)
+            span.add(added=len(delta.added), removed=len(delta.removed), changed=len(delta.changed))
+        logger.info(
+            "Biblioteca actualizada",
+            extra={
+                "library": str(self.library_path),
+                "added": len(delta.added),
+                "removed": len(delta.removed),
+                "changed": len(delta.changed),
+            },
+        )
+        return delta
+
+    def run(self, stop: threading.Event | None = None, max_polls: int | None = None) -> None:
+        """Sondea hasta que se active ``stop`` (o tras ``max_polls`` sondeos)."""
+
+        stop = stop or threading.Event()
+        polls = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                self.poll()
+            except (OSError, ValueError):
+                logger.exception("Error al actualizar la biblioteca", extra={"library": str(self.library_path)})
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+            stop.wait(self._pause(time.perf_counter() - started))
+
+    def _pause(self, busy: float) -> float:
+        # Con max_cpu = 0.1 un sondeo de 1 s obliga a esperar 9 s.
+        if self.max_cpu <= 0 or self.max_cpu >= 1:
+            return self.interval
+        return max(self.interval, busy * (1 - self.max_cpu) / self.max_cpu)
+
+    def _diff(self, files: dict[str, FileInfo]) -> Delta:
+        delta = Delta()
+        retry: list[FileInfo] = []
+        for path, info in files.items():
+            entry = self._index.get(path)
+            if entry is None:
+                delta.added.append(path)
+            elif not is_current(entry, info, retry_failed=False):
+                delta.changed.append(path)
+            elif entry.get("failed"):
+                retry.append(info)
+        # Los archivos que no se pudieron abrir se reintentan en cada sondeo,
+        # pero la biblioteca solo se reescribe cuando por fin se leen.
+        self._read = {
+            info.path: (info, fields, error)
+            for info, fields, error in read_files(retry, self.workers)
+            if error != "failed"
+        }
+        delta.changed.extend(self._read)
+        delta.removed = [path for path in self._index if path not in files]
+        delta.added.sort()
+        delta.changed.sort()
+        return delta
+
+    def _apply(self, delta: Delta, files: dict[str, FileInfo]) -> None:
+        # El índice nuevo se construye aparte y solo se adopta si la escritura
+        # de la biblioteca termina bien; si falla, el siguiente sondeo vuelve
+        # a ver el mismo delta.
+        index = dict(self._index)
+        new_tracks: list[Track] = []
+        pending = [files[path] for path in (*delta.added, *delta.changed) if path not in self._read]
+        for info, fields, error in (*self._read.values(), *read_files(pending, self.workers)):
+            index[info.path] = index_entry(info, fields, error)
+            new_tracks.append(track_from_fields(info.path, fields, self._as_uri))
+        for path in delta.removed:
+            del index[path]
+
+        module = get_format_module(self.library_format)
+        replaced = [*delta.removed, *delta.changed]
+        if self._fresh and self.library_path.exists():
+            replaced.extend(delta.added)
+        if replaced and self.library_path.exists():
+            stale = {normalize_location(Path(path).as_posix()) for path in replaced}
+            kept = [track for track in module.load(self.library_path) if normalize_location(track.location) not in stale]
+            module.dump(kept + new_tracks, self.library_path)
+        elif new_tracks:
+            module.append(new_tracks, self.library_path)
+
+        self._index = index
+        self._fresh = False
+        save_index(self.index_path, index)
@@ -1,6 +1,54 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+@dataclass(frozen=True, slots=True)
+class CuePoint:
+    """Marca de una pista (``POSITION_MARK`` de Rekordbox).
+
+    ``num`` es ``-1`` para los memory cues y ``0``-``7`` para los hot cues;
+    ``kind`` sigue los valores de Rekordbox (0 cue, 1 fade-in, 2 fade-out,
+    3 load, 4 loop). ``end`` solo se usa en los loops.
+    """
+
+    start: float
+    num: int = -1
+    kind: int = 0
+    end: float | None = None
+    name: str = ""
+    color: tuple[int, int, int] | None = None
+
+
+@dataclass
+class BeatGrid:
+    """Rejilla de tempo de una pista (``TEMPO`` de Rekordbox).
+
+    Cada índice es un cambio de tempo. Los valores se guardan en arrays
+    compactos en lugar de un objeto por marca: ``positions`` (segundos) y
+    ``bpm`` como ``double``; ``meter`` (numerador del compás, ``4`` en
+    4/4) y ``beats`` (tiempo del compás en el que cae la marca) como bytes.
+    ``numpy.frombuffer`` puede usarlos sin copiar.
+    """
+
+    positions: array = field(default_factory=lambda: array("d"))
+    bpm: array = field(default_factory=lambda: array("d"))
+    meter: array = field(default_factory=lambda: array("B"))
+    beats: array = field(default_factory=lambda: array("B"))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self) -> Iterator[tuple[float, float, int, int]]:
+        return zip(self.positions, self.bpm, self.meter, self.beats)
+
+    def append(self, position: float, bpm: float, meter: int = 4, beat: int = 1) -> None:
+        self.positions.append(position)
+        self.bpm.append(bpm)
+        self.meter.append(meter)
+        self.beats.append(beat)
 
 
 @dataclass
@@ -17,3 +65,5 @@ class Track:
     location: str | None = None
     year: int | None = None
     rating: int | None = None
+    cues: tuple[CuePoint, ...] | None = None
+    beatgrid: BeatGrid | None = None
@@ -23,16 +23,18 @@ def run() -> None:
     app.setApplicationName("Conversor Audio")
 
     config = AppConfig.load()
-    bootstrap = DependencyBootstrap(config)
-    ffmpeg_ready, message = bootstrap.ensure_ffmpeg()
-
-    window = MainWindow(config=config, bootstrap_message=message, ffmpeg_ready=ffmpeg_ready)
-    window.show()
-
-    if ffmpeg_ready:
+    # Camino rápido: si el binario validado no ha cambiado no se detecta nada más.
+    cached = DependencyBootstrap(config).cached_ffmpeg()
+    if cached:
+        message = f"FFmpeg listo en {cached}"
         logger.info(message)
+        window = MainWindow(config=config, bootstrap_message=message, ffmpeg_ready=True)
+        window.show()
     else:
-        QtWidgets.QMessageBox.warning(window, "Dependencias", message)
+        # La detección o descarga se hace en segundo plano con la ventana ya visible.
+        window = MainWindow(config=config, ffmpeg_ready=False)
+        window.show()
+        window.start_dependency_check()
 
     sys.exit(app.exec())
 
@@ -3,15 +3,39 @@ from __future__ import annotations
 import threading
 from pathlib import Path
 
-from PyQt6 import QtCore, QtWidgets
+from PyQt6 import QtCore, QtGui, QtWidgets
 
+from ..api.progress import ProgressEvent, ProgressThrottle
 from ..api.soundcloud import SoundCloudDownloader
 from ..utils.config import AppConfig
-from ..utils.deps import DependencyBootstrap
+from ..utils.deps import DependencyBootstrap, ProgressCallback
 from ..utils.logger import get_logger
+from .queue_model import QueueTableModel, build_queue_view
 
 logger = get_logger()
 
+# Máximo de lotes de progreso por segundo que llegan al hilo de la interfaz.
+UI_PROGRESS_RATE = 8.0
+# Líneas que conserva el registro visible; las más antiguas se descartan.
+LOG_MAX_LINES = 2000
+
+
+class DownloadProgressBridge(QtCore.QObject):
+    """Lleva lotes de eventos de progreso del hilo de descarga a la interfaz.
+
+    El objeto vive en el hilo principal, así que emitir ``batch`` desde el
+    hilo de trabajo encola una sola llamada por lote en el bucle de eventos.
+    """
+
+    batch = QtCore.pyqtSignal(list)
+
+
+class BootstrapBridge(QtCore.QObject):
+    """Entrega al hilo de la interfaz el progreso de la instalación de FFmpeg."""
+
+    progress = QtCore.pyqtSignal(int, object)
+    finished = QtCore.pyqtSignal(bool, str)
+
 
 class MainWindow(QtWidgets.QMainWindow):
     """Interfaz principal para descargar audio de SoundCloud en MP3 320 kbps."""
@@ -28,6 +52,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.config = config or AppConfig.load()
         self.downloader = SoundCloudDownloader()
+        # Sesión caliente: reutiliza YoutubeDL, extractores y conexiones entre descargas.
+        self.download_session = self.downloader.session()
+        self.progress_bridge = DownloadProgressBridge(self)
+        self.progress_bridge.batch.connect(self._on_progress)
+        self.bootstrap_bridge = BootstrapBridge(self)
+        self.bootstrap_bridge.progress.connect(self._on_bootstrap_progress)
+        self.bootstrap_bridge.finished.connect(self._on_bootstrap_finished)
+        self._bootstrap_running = False
+        # Entradas de la descarga en curso, para marcarlas si falla.
+        self._job_url = ""
+        self._job_keys: set[str] = set()
         self.ffmpeg_ready = ffmpeg_ready
         self.bootstrap_message = bootstrap_message
 
@@ -126,16 +161,33 @@ class MainWindow(QtWidgets.QMainWindow):
 
         log_label = QtWidgets.QLabel("Progreso y notas")
         log_label.setObjectName("fieldLabel")
-        self.log_box = QtWidgets.QTextEdit()
+        # QPlainTextEdit con límite de bloques actúa como buffer circular:
+        # las líneas más antiguas se descartan y el repintado no crece.
+        self.log_box = QtWidgets.QPlainTextEdit()
         self.log_box.setReadOnly(True)
-        self.log_box.setMinimumHeight(160)
+        self.log_box.setMaximumBlockCount(LOG_MAX_LINES)
+        self.log_box.setMinimumHeight(120)
         self.log_box.setPlaceholderText("El progreso y los avisos aparecerán aquí…")
         log_layout.addWidget(log_label)
         log_layout.addWidget(self.log_box)
 
+        queue_card = QtWidgets.QFrame()
+        queue_card.setObjectName("panelCard")
+        queue_layout = QtWidgets.QVBoxLayout(queue_card)
+        queue_layout.setContentsMargins(18, 14, 18, 12)
+        queue_layout.setSpacing(8)
+        queue_label = QtWidgets.QLabel("Cola")
+        queue_label.setObjectName("fieldLabel")
+        self.queue_model = QueueTableModel(self)
+        self.queue_view = build_queue_view(self.queue_model)
+        self.queue_view.setMinimumHeight(160)
+        queue_layout.addWidget(queue_label)
+        queue_layout.addWidget(self.queue_view)
+
         main_layout.addWidget(hero)
         main_layout.addWidget(form_card)
-        main_layout.addWidget(log_card)
+        main_layout.addWidget(queue_card, stretch=2)
+        main_layout.addWidget(log_card, stretch=1)
 
         self.status = QtWidgets.QStatusBar()
         self.setStatusBar(self.status)
@@ -191,7 +243,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QLabel#heroTitle, QLabel#heroSubtitle, QLabel#fieldLabel {
                 margin: 0;
             }
-            QLineEdit, QTextEdit {
+            QLineEdit, QPlainTextEdit, QTableView {
                 background-color: rgba(255,255,255,0.08);
                 color: #e8edf5;
                 border: 1px solid #1f2e46;
@@ -199,7 +251,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 padding: 10px 12px;
                 selection-background-color: #2563eb;
             }
-            QLineEdit:focus, QTextEdit:focus {
+            QLineEdit:focus, QPlainTextEdit:focus, QTableView:focus {
                 border: 1px solid #2ea46f;
             }
             QPushButton {
@@ -246,6 +298,10 @@ class MainWindow(QtWidgets.QMainWindow):
             output_dir = Path.home() / "Downloads"
         self._set_output_dir(output_dir)
 
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:  # noqa: N802 - API de Qt
+        self.download_session.close()
+        super().closeEvent(event)
+
     def _set_output_dir(self, folder: Path) -> None:
         folder.mkdir(parents=True, exist_ok=True)
         self.output_label.setText(str(folder))
@@ -259,15 +315,51 @@ class MainWindow(QtWidgets.QMainWindow):
             self._set_output_dir(Path(folder))
 
     def _verify_dependencies(self) -> None:
+        self.start_dependency_check()
+
+    def start_dependency_check(self) -> None:
+        """Comprueba o instala FFmpeg en segundo plano sin bloquear la ventana."""
+        if self._bootstrap_running:
+            return
+        self._bootstrap_running = True
+        self.deps_button.setEnabled(False)
+        self.download_button.setEnabled(False)
+        self.ffmpeg_status.setText("FFmpeg: comprobando…")
+        self.status.showMessage("Comprobando dependencias…")
         bootstrap = DependencyBootstrap(self.config)
-        ok, message = bootstrap.ensure_ffmpeg()
+        bootstrap.ensure_ffmpeg_async(
+            on_done=self.bootstrap_bridge.finished.emit,
+            progress=self._throttled_bootstrap_progress(),
+        )
+
+    def _throttled_bootstrap_progress(self) -> ProgressCallback:
+        last_percent = [-1]
+
+        def report(done: int, total: int | None) -> None:
+            # Un aviso por punto porcentual basta para la barra de estado.
+            percent = int(done * 100 / total) if total else done // 1_048_576
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.bootstrap_bridge.progress.emit(done, total)
+
+        return report
+
+    def _on_bootstrap_progress(self, done: int, total: int | None) -> None:
+        if total:
+            self.status.showMessage(f"Descargando FFmpeg… {done * 100 // total}%")
+        else:
+            self.status.showMessage(f"Descargando FFmpeg… {done / 1_048_576:.1f} MB")
+
+    def _on_bootstrap_finished(self, ok: bool, message: str) -> None:
+        self._bootstrap_running = False
+        self.deps_button.setEnabled(True)
         self.ffmpeg_ready = ok
         self._update_dependency_badge(ok, message)
         self.append_log(message)
         if not ok:
+            self.status.showMessage("FFmpeg pendiente")
             QtWidgets.QMessageBox.warning(self, "FFmpeg no disponible", message)
         else:
-            self.download_button.setEnabled(True)
             self.status.showMessage("Dependencias listas")
 
     def _update_dependency_badge(self, ok: bool, message: str) -> None:
@@ -286,7 +378,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.ffmpeg_ready = True
 
     def append_log(self, text: str) -> None:
-        self.log_box.append(text)
+        self.log_box.appendPlainText(text)
 
     def download_stream(self) -> None:
         if not self.ffmpeg_ready:
@@ -308,13 +400,18 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         output_dir = Path(self.output_label.text())
+        self._job_url = url
+        self._job_keys = set()
         self.download_button.setEnabled(False)
         self.status.showMessage("Descargando…")
         self.append_log("Iniciando descarga…")
 
+        throttle = ProgressThrottle(self.progress_bridge.batch.emit, max_rate=UI_PROGRESS_RATE)
+
         def task() -> None:
             try:
-                targets = self.downloader.download(url, output_dir, "mp3")
+                targets = self.download_session.download(url, output_dir, "mp3", progress=throttle)
+                throttle.flush()
                 message = self._build_success_message(targets, output_dir)
                 QtCore.QMetaObject.invokeMethod(
                     self,
@@ -323,6 +420,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     QtCore.Q_ARG(str, message),
                 )
             except Exception as exc:  # pragma: no cover - seguridad adicional
+                throttle.flush()
                 logger.exception("Error en descarga")
                 QtCore.QMetaObject.invokeMethod(
                     self,
@@ -333,6 +431,26 @@ class MainWindow(QtWidgets.QMainWindow):
 
         threading.Thread(target=task, daemon=True).start()
 
+    def _on_progress(self, events: list[ProgressEvent]) -> None:
+        if not events:
+            return
+        self.queue_model.apply_progress(events)
+        self._job_keys.update(event.entry_id for event in events)
+        latest = events[-1]
+        totals = latest.totals
+        parts = ["Descargando…"]
+        if totals and totals.entries_total:
+            parts.append(f"{totals.entries_done}/{totals.entries_total}")
+        if latest.phase == "postprocessing":
+            parts.append(f"procesando {latest.title or ''}".strip())
+        elif latest.fraction is not None:
+            parts.append(f"{latest.fraction:.0%}")
+        if totals and totals.speed:
+            parts.append(f"{totals.speed / 1_048_576:.1f} MB/s")
+        if latest.eta is not None:
+            parts.append(f"ETA {int(latest.eta)} s")
+        self.status.showMessage(" · ".join(parts))
+
     def _build_success_message(self, files: list[Path], output_dir: Path) -> str:
         if not files:
             return f"Descarga completada en {output_dir}"
@@ -352,4 +470,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.download_button.setEnabled(True)
         self.status.showMessage("Error en la descarga")
         self.append_log(f"Error: {message}")
+        # El progreso pendiente llega antes que esta llamada (misma cola de
+        # eventos); si yt-dlp falló antes de informar, la fila es la URL.
+        if self._job_keys:
+            self.queue_model.fail_unfinished(self._job_keys, message)
+        else:
+            self.queue_model.mark_error(self._job_url, message, title=self._job_url)
         QtWidgets.QMessageBox.critical(self, "Error", message)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+from ..api.progress import (
+    PHASE_DOWNLOADED,
+    PHASE_DOWNLOADING,
+    PHASE_ERROR,
+    PHASE_FINISHED,
+    PHASE_POSTPROCESSING,
+    ProgressEvent,
+)
+
+STATUS_LABELS = {
+    "pending": "En cola",
+    PHASE_DOWNLOADING: "Descargando",
+    PHASE_DOWNLOADED: "Descargado",
+    PHASE_POSTPROCESSING: "Convirtiendo",
+    PHASE_FINISHED: "Completado",
+    PHASE_ERROR: "Error",
+}
+
+
+@dataclass
+class QueueItem:
+    key: str
+    title: str
+    status: str = "pending"
+    progress: float | None = None
+    speed: float | None = None
+    error: str | None = None
+
+
+class QueueTableModel(QtCore.QAbstractTableModel):
+    """Modelo de la cola de descargas con actualizaciones por lotes.
+
+    Cada fila es una entrada de yt-dlp; su conversión a MP3 con FFmpeg se
+    muestra como la fase «Convirtiendo» de la misma fila.
+
+    Los cambios se acumulan y se publican como mucho una vez por
+    ``flush_interval_ms``: las filas nuevas en un único ``beginInsertRows`` y
+    las modificadas como rangos contiguos de ``dataChanged``. La vista solo
+    pide ``data`` de las filas visibles, así que el coste de repintado no
+    depende del tamaño de la cola.
+    """
+
+    COLUMNS = ("Pista", "Estado", "Progreso", "Velocidad", "Error")
+    PROGRESS_COLUMN = 2
+
+    def __init__(self, parent: QtCore.QObject | None = None, flush_interval_ms: int = 150) -> None:
+        super().__init__(parent)
+        self._items: list[QueueItem] = []
+        self._rows: dict[str, int] = {}
+        self._pending_new: list[QueueItem] = []
+        self._dirty: set[int] = set()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    # --- API de Qt -----------------------------------------------------
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(  # noqa: N802
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return item.title
+            if column == 1:
+                return STATUS_LABELS.get(item.status, item.status)
+            if column == 2:
+                return "" if item.progress is None else f"{item.progress:.0%}"
+            if column == 3:
+                return "" if not item.speed else f"{item.speed / 1_048_576:.1f} MB/s"
+            if column == 4:
+                return item.error or ""
+        if role == QtCore.Qt.ItemDataRole.UserRole and column == self.PROGRESS_COLUMN:
+            return item.progress
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and item.error:
+            return item.error
+        return None
+
+    # --- Actualizaciones ----------------------------------------------
+    def upsert(self, key: str, title: str | None = None, **fields: Any) -> None:
+        """Crea o actualiza un elemento; el cambio se publica en el próximo lote."""
+        row = self._rows.get(key)
+        if row is None:
+            item = QueueItem(key=key, title=title or key)
+            self._rows[key] = len(self._items) + len(self._pending_new)
+            self._pending_new.append(item)
+        elif row >= len(self._items):
+            item = self._pending_new[row - len(self._items)]
+        else:
+            item = self._items[row]
+            self._dirty.add(row)
+        if title:
+            item.title = title
+        for name, value in fields.items():
+            setattr(item, name, value)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def apply_progress(self, events: list[ProgressEvent]) -> None:
+        for event in events:
+            self.upsert(
+                event.entry_id,
+                title=event.title,
+                status=event.phase,
+                progress=1.0 if event.phase == PHASE_FINISHED else event.fraction,
+                speed=event.speed if event.phase == PHASE_DOWNLOADING else None,
+            )
+
+    def mark_error(self, key: str, message: str, title: str | None = None) -> None:
+        self.upsert(key, title=title, status=PHASE_ERROR, error=message, speed=None)
+
+    def fail_unfinished(self, keys: Iterable[str], message: str) -> None:
+        """Marca con error las entradas de ``keys`` que no llegaron a completarse."""
+        for key in keys:
+            item = self._item(key)
+            if item is None or item.status not in (PHASE_FINISHED, PHASE_ERROR):
+                self.mark_error(key, message)
+
+    def _item(self, key: str) -> QueueItem | None:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if row >= len(self._items):
+            return self._pending_new[row - len(self._items)]
+        return self._items[row]
+
+    def clear(self) -> None:
+        self._timer.stop()
+        self.beginResetModel()
+        self._items.clear()
+        self._rows.clear()
+        self._pending_new.clear()
+        self._dirty.clear()
+        self.endResetModel()
+
+    def flush(self) -> None:
+        if self._pending_new:
+            first = len(self._items)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(self._pending_new) - 1)
+            self._items.extend(self._pending_new)
+            self._pending_new.clear()
+            self.endInsertRows()
+
+        if not self._dirty:
+            return
+        last_column = len(self.COLUMNS) - 1
+        for start, end in _contiguous_ranges(sorted(self._dirty)):
+            self.dataChanged.emit(self.index(start, 0), self.index(end, last_column))
+        self._dirty.clear()
+
+
+class ProgressBarDelegate(QtWidgets.QStyledItemDelegate):
+    """Dibuja la columna de progreso como barra; solo se invoca en filas visibles."""
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> None:
+        value = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        if value is None:
+            super().paint(painter, option, index)
+            return
+        bar = QtWidgets.QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(4, 4, -4, -4)
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = int(value * 100)
+        bar.text = f"{value:.0%}"
+        bar.textVisible = True
+        style = option.widget.style() if option.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.ControlElement.CE_ProgressBar, bar, painter)
+
+
+def build_queue_view(model: QueueTableModel, parent: QtWidgets.QWidget | None = None) -> QtWidgets.QTableView:
+    """Vista de tabla configurada para colas de miles de filas."""
+    view = QtWidgets.QTableView(parent)
+    view.setModel(model)
+    view.setItemDelegateForColumn(QueueTableModel.PROGRESS_COLUMN, ProgressBarDelegate(view))
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setAlternatingRowColors(True)
+    view.setWordWrap(False)
+    # Altura fija: la vista no mide filas fuera de pantalla.
+    vertical = view.verticalHeader()
+    vertical.setVisible(False)
+    vertical.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+    vertical.setDefaultSectionSize(24)
+    horizontal = view.horizontalHeader()
+    horizontal.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Interactive)
+    horizontal.setStretchLastSection(True)
+    horizontal.resizeSection(0, 280)
+    return view
+
+
+def _contiguous_ranges(rows: list[int]) -> list[tuple[int, int]]:
+    ranges: list[tuple[int, int]] = []
+    for row in rows:
+        if ranges and row == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, asdict
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
 
 DEFAULT_PATH = Path.home() / ".conversor_audio" / "config.json"
-DEFAULT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
 @dataclass
@@ -13,13 +12,16 @@ class AppConfig:
     output_dir: str | None = None
     ffmpeg_path: str | None = None
     first_launch_completed: bool = False
+    # Huella del binario de FFmpeg validado; si coincide se omite la detección.
+    ffmpeg_size: int | None = None
+    ffmpeg_mtime_ns: int | None = None
 
     @classmethod
     def load(cls, path: Path = DEFAULT_PATH) -> "AppConfig":
         if not path.exists():
             return cls()
         data = json.loads(path.read_text(encoding="utf-8"))
-        allowed_keys = {"output_dir", "ffmpeg_path", "first_launch_completed"}
+        allowed_keys = {field.name for field in fields(cls)}
         filtered = {k: v for k, v in data.items() if k in allowed_keys}
         return cls(**filtered)
 
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import platform
 import shutil
 import tarfile
 import tempfile
+import threading
 import urllib.request
 import zipfile
 from pathlib import Path
+from typing import BinaryIO, Callable
 
-from .config import AppConfig
+from .config import DEFAULT_PATH, AppConfig
 from .logger import get_logger
 
 logger = get_logger()
@@ -22,23 +25,105 @@ FFMPEG_URLS = {
     "darwin": "https://evermeet.cx/ffmpeg/ffmpeg-6.1.zip",
 }
 
+# Checksum sidecars published next to each build: (algorithm, suffix).
+FFMPEG_CHECKSUMS = {
+    "windows": ("sha256", ".sha256"),
+    "linux": ("md5", ".md5"),
+    "darwin": ("sha256", ".sha256"),
+}
+
+STREAM_BLOCK_SIZE = 256 * 1024
+
+ProgressCallback = Callable[[int, "int | None"], None]
+DoneCallback = Callable[[bool, str], None]
+
+
+class ChecksumError(RuntimeError):
+    """Raised when the downloaded archive does not match its published checksum."""
+
+
+class _HashingReader:
+    """File-like wrapper that hashes and reports every byte read from ``raw``."""
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        algorithm: str,
+        total: int | None,
+        progress: ProgressCallback | None,
+    ) -> None:
+        self.raw = raw
+        self.digest = hashlib.new(algorithm)
+        self.total = total
+        self.read_bytes = 0
+        self.progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        if data:
+            self.digest.update(data)
+            self.read_bytes += len(data)
+            if self.progress is not None:
+                self.progress(self.read_bytes, self.total)
+        return data
+
+    def drain(self) -> None:
+        while self.read(STREAM_BLOCK_SIZE):
+            pass
+
 
 class DependencyBootstrap:
-    """Detects and installs runtime dependencies such as FFmpeg."""
+    """Detects and installs runtime dependencies such as FFmpeg.
+
+    A validated binary is fingerprinted (size + mtime) in the config, so later
+    launches return immediately from :meth:`cached_ffmpeg` without probing
+    PATH or the filesystem. Installation streams the archive, verifies its
+    checksum and extracts only the ffmpeg member. If the published checksum
+    cannot be fetched the install is refused, unless ``allow_unverified`` is
+    set explicitly.
+    """
 
-    def __init__(self, config: AppConfig) -> None:
+    def __init__(
+        self,
+        config: AppConfig,
+        bin_dir: Path | None = None,
+        urls: dict[str, str] | None = None,
+        config_path: Path = DEFAULT_PATH,
+        allow_unverified: bool = False,
+    ) -> None:
         self.config = config
-        self.bin_dir = Path.home() / ".conversor_audio" / "bin"
+        self.allow_unverified = allow_unverified
+        self.bin_dir = bin_dir or Path.home() / ".conversor_audio" / "bin"
+        self.urls = urls or FFMPEG_URLS
+        self.config_path = config_path
+
+    def cached_ffmpeg(self) -> Path | None:
+        """Return the remembered binary if it is unchanged since it was validated."""
+        if not self.config.ffmpeg_path or self.config.ffmpeg_size is None:
+            return None
+        path = Path(self.config.ffmpeg_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_size != self.config.ffmpeg_size or stat.st_mtime_ns != self.config.ffmpeg_mtime_ns:
+            return None
+        self._prepend_to_path(path)
+        return path
 
-    def ensure_ffmpeg(self) -> tuple[bool, str]:
+    def ensure_ffmpeg(self, progress: ProgressCallback | None = None) -> tuple[bool, str]:
         """Ensure ffmpeg is present; download a static build if missing."""
+        cached = self.cached_ffmpeg()
+        if cached:
+            return True, f"FFmpeg listo en {cached}"
+
         existing = self._find_ffmpeg()
         if existing:
             self._remember(existing)
             return True, f"FFmpeg listo en {existing}"
 
         try:
-            installed = self._install_ffmpeg()
+            installed = self.install_ffmpeg(progress)
         except Exception as exc:  # pragma: no cover - depends on network/filesystem
             logger.exception("No se pudo instalar FFmpeg")
             return False, f"No se pudo instalar FFmpeg: {exc}"
@@ -46,10 +131,32 @@ class DependencyBootstrap:
         self._remember(installed)
         return True, f"FFmpeg instalado en {installed}"
 
+    def ensure_ffmpeg_async(
+        self,
+        on_done: DoneCallback,
+        progress: ProgressCallback | None = None,
+    ) -> threading.Thread:
+        """Run :meth:`ensure_ffmpeg` on a daemon thread and report through callbacks.
+
+        Callbacks run on the worker thread; UI callers must marshal them to
+        their own event loop.
+        """
+
+        def task() -> None:
+            ok, message = self.ensure_ffmpeg(progress)
+            on_done(ok, message)
+
+        thread = threading.Thread(target=task, name="ffmpeg-bootstrap", daemon=True)
+        thread.start()
+        return thread
+
     def _remember(self, path: Path) -> None:
+        stat = path.stat()
         self.config.ffmpeg_path = str(path)
+        self.config.ffmpeg_size = stat.st_size
+        self.config.ffmpeg_mtime_ns = stat.st_mtime_ns
         self.config.first_launch_completed = True
-        self.config.save()
+        self.config.save(self.config_path)
         self._prepend_to_path(path)
 
     def _prepend_to_path(self, binary: Path) -> None:
@@ -74,51 +181,95 @@ class DependencyBootstrap:
                 return path
         return None
 
-    def _install_ffmpeg(self) -> Path:
+    def install_ffmpeg(self, progress: ProgressCallback | None = None) -> Path:
         system = platform.system().lower()
-        url = FFMPEG_URLS.get(system)
+        url = self.urls.get(system)
         if not url:
             raise RuntimeError(f"Plataforma no soportada para instalar FFmpeg: {system}")
 
+        algorithm, suffix = FFMPEG_CHECKSUMS.get(system, ("sha256", ".sha256"))
+        expected = self._fetch_checksum(url + suffix, algorithm)
+        if expected is None and not self.allow_unverified:
+            raise ChecksumError(
+                f"No se pudo obtener la suma {algorithm} publicada para FFmpeg ({url + suffix}); "
+                "no se instala un binario sin verificar"
+            )
+
         self.bin_dir.mkdir(parents=True, exist_ok=True)
-        archive_path = self.bin_dir / Path(url).name
+        binary_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
+        target = self.bin_dir / binary_name
+        staging = self.bin_dir / f"{binary_name}.download"
 
         logger.info("Descargando FFmpeg", extra={"url": url})
-        self._download(url, archive_path)
+        try:
+            with urllib.request.urlopen(url) as response:
+                length = response.headers.get("Content-Length")
+                reader = _HashingReader(
+                    response, algorithm, int(length) if length else None, progress
+                )
+                if Path(url).suffix == ".zip":
+                    self._extract_from_zip(reader, binary_name, staging)
+                else:
+                    self._extract_from_tar(reader, binary_name, staging)
+                reader.drain()
 
-        with tempfile.TemporaryDirectory() as tmp:
-            extract_dir = Path(tmp)
-            self._extract_archive(archive_path, extract_dir)
-            ffmpeg_bin = self._locate_ffmpeg(extract_dir)
-            target = self.bin_dir / ffmpeg_bin.name
-            shutil.copy2(ffmpeg_bin, target)
-            target.chmod(target.stat().st_mode | 0o111)
-            return target
+            actual = reader.digest.hexdigest()
+            if expected is not None and actual.lower() != expected.lower():
+                raise ChecksumError(
+                    f"La suma {algorithm} de FFmpeg no coincide ({actual} != {expected})"
+                )
+            if expected is None:
+                logger.warning("FFmpeg instalado sin verificar (allow_unverified)", extra={"url": url})
 
-    @staticmethod
-    def _download(url: str, target: Path) -> None:
-        with urllib.request.urlopen(url) as response, open(target, "wb") as file:
-            shutil.copyfileobj(response, file)
+            staging.chmod(staging.stat().st_mode | 0o111)
+            os.replace(staging, target)
+        finally:
+            staging.unlink(missing_ok=True)
+        return target
 
     @staticmethod
-    def _extract_archive(archive_path: Path, target_dir: Path) -> None:
-        if archive_path.suffix == ".zip":
-            with zipfile.ZipFile(archive_path, "r") as zf:
-                zf.extractall(target_dir)
-            return
-
-        # Handle .tar.xz and similar
-        if archive_path.suffixes[-2:] == [".tar", ".xz"] or archive_path.suffix == ".xz":
-            with tarfile.open(archive_path, "r:*") as tf:
-                tf.extractall(target_dir)
-            return
+    def _fetch_checksum(url: str, algorithm: str) -> str | None:
+        """Return the hex digest published at ``url``, or ``None`` if it is missing or malformed."""
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                text = response.read(4096).decode("ascii", errors="ignore")
+        except OSError:
+            logger.warning("No se pudo descargar la suma de verificación", extra={"url": url})
+            return None
+        # Sidecar format: "<hex>  <filename>" or just "<hex>". Anything else
+        # (e.g. an HTML error page served with 200) is rejected.
+        token = text.split()[0].lower() if text.split() else ""
+        size = hashlib.new(algorithm).digest_size * 2
+        if len(token) != size or any(char not in "0123456789abcdef" for char in token):
+            return None
+        return token
 
-        raise RuntimeError(f"No se reconoce el formato de {archive_path.name}")
+    @staticmethod
+    def _extract_from_tar(reader: _HashingReader, binary_name: str, target: Path) -> None:
+        # Stream mode ("r|*") reads members sequentially from the socket; only
+        # the ffmpeg member is written to disk.
+        with tarfile.open(fileobj=reader, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and Path(member.name).name == binary_name:
+                    source = archive.extractfile(member)
+                    if source is None:
+                        break
+                    with source, target.open("wb") as handle:
+                        shutil.copyfileobj(source, handle, STREAM_BLOCK_SIZE)
+                    return
+        raise RuntimeError("El paquete descargado no contiene el ejecutable ffmpeg")
 
     @staticmethod
-    def _locate_ffmpeg(extracted_root: Path) -> Path:
-        binary_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
-        for candidate in extracted_root.rglob(binary_name):
-            if candidate.is_file():
-                return candidate
+    def _extract_from_zip(reader: _HashingReader, binary_name: str, target: Path) -> None:
+        # Zip keeps its index at the end, so the archive is spooled to an
+        # anonymous temp file; still only the ffmpeg member is extracted.
+        with tempfile.TemporaryFile() as spool:
+            shutil.copyfileobj(reader, spool, STREAM_BLOCK_SIZE)
+            spool.seek(0)
+            with zipfile.ZipFile(spool) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and Path(info.filename).name == binary_name:
+                        with archive.open(info) as source, target.open("wb") as handle:
+                            shutil.copyfileobj(source, handle, STREAM_BLOCK_SIZE)
+                        return
         raise RuntimeError("El paquete descargado no contiene el ejecutable ffmpeg")
@@ -0,0 +1,33 @@
+"""Conversión entre ``Track.location`` y rutas locales.
+
+Rekordbox guarda URIs ``file://localhost/...``; Serato y Engine DJ guardan
+rutas planas. Lo usan tanto los formatos como la biblioteca, así que vive
+aquí y no depende de ninguno de los dos.
+"""
+
+from __future__ import annotations
+
+from urllib.parse import quote, unquote, urlsplit
+
+_URI_SAFE = "/:!$&'()*+,;=@~"
+
+
+def location_to_path(location: str) -> tuple[str, bool]:
+    """Convierte una ubicación en ruta local; el booleano indica si era ``file://``."""
+
+    if not location.lower().startswith("file:"):
+        return location.replace("\\", "/"), False
+    path = unquote(urlsplit(location).path)
+    # "/C:/Music" es una ruta de Windows.
+    if len(path) > 2 and path[0] == "/" and path[2] == ":":
+        path = path[1:]
+    return path, True
+
+
+def path_to_location(path: str, as_uri: bool) -> str:
+    if not as_uri:
+        return path
+    if len(path) > 1 and path[1] == ":":
+        path = "/" + path
+    # Rekordbox escribe "file://localhost/..."; se usa siempre esa forma.
+    return "file://localhost" + quote(path, safe=_URI_SAFE)
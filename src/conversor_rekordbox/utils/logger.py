@@ -1,28 +1,175 @@
 from __future__ import annotations
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 
 LOG_PATH = Path.home() / ".conversor_audio" / "app.log"
-LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+LOGGER_NAME = "conversor_audio"
+
+# Rotación por tamaño: 5 MB por archivo y tres copias antiguas.
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+# ``CONVERSOR_LOG_FORMAT=json`` activa JSON lines sin tocar el código.
+FORMAT_ENV_VAR = "CONVERSOR_LOG_FORMAT"
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# Atributos propios de LogRecord; el resto proviene de ``extra={...}``.
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+_listener: logging.handlers.QueueListener | None = None
+_lock = threading.Lock()
+
+
+def extra_fields(record: logging.LogRecord) -> dict[str, object]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible que añade los campos de ``extra`` como ``clave=valor``."""
+
+    def __init__(self) -> None:
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extras = extra_fields(record)
+        if not extras:
+            return text
+        head, sep, tail = text.partition("\n")
+        pairs = " ".join(f"{key}={value}" for key, value in extras.items())
+        return f"{head} | {pairs}{sep}{tail}"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objeto JSON por línea con los campos estándar y los de ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        payload.update(extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que crea la carpeta y abre el archivo con el primer registro."""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int) -> None:
+        super().__init__(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Encola el registro sin aplanar ``extra`` ni mezclar la traza en el mensaje."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        return prepared
 
 
 def get_logger() -> logging.Logger:
-    logger = logging.getLogger("conversor_audio")
-    if logger.handlers:
+    logger = logging.getLogger(LOGGER_NAME)
+    if logger.handlers and _listener is not None:
         return logger
+    return configure_logging()
+
+
+def configure_logging(
+    path: Path | None = None,
+    json_lines: bool | None = None,
+    max_bytes: int = MAX_BYTES,
+    backup_count: int = BACKUP_COUNT,
+    console_level: int = logging.INFO,
+) -> logging.Logger:
+    """(Re)configura el logger de la aplicación.
+
+    Los hilos que registran solo encolan el ``LogRecord``; un
+    ``QueueListener`` en segundo plano formatea y escribe en el archivo
+    rotativo y en consola. ``json_lines`` (o ``CONVERSOR_LOG_FORMAT=json``)
+    escribe el archivo como JSON lines conservando los campos de ``extra``.
+    """
+
+    global _listener
 
-    logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+    if json_lines is None:
+        json_lines = os.environ.get(FORMAT_ENV_VAR, "").lower() == "json"
 
-    file_handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
-    file_handler.setFormatter(formatter)
+    file_handler = _LazyRotatingFileHandler(path or LOG_PATH, max_bytes, backup_count)
+    file_handler.setFormatter(JsonLinesFormatter() if json_lines else TextFormatter())
     file_handler.setLevel(logging.DEBUG)
 
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(TextFormatter())
+    console_handler.setLevel(console_level)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        records, file_handler, console_handler, respect_handler_level=True
+    )
+
+    logger = logging.getLogger(LOGGER_NAME)
+    with _lock:
+        previous, _listener = _listener, listener
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(_RecordQueueHandler(records))
+        listener.start()
+    if previous is not None:
+        _stop(previous)
     return logger
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola y cierra los archivos; se llama también al salir.
+
+    Se quita también el handler de la cola, que ya nadie vaciaría; el
+    siguiente :func:`get_logger` vuelve a configurar el logger.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    with _lock:
+        listener, _listener = _listener, None
+        for handler in list(logger.handlers):
+            if isinstance(handler, _RecordQueueHandler):
+                logger.removeHandler(handler)
+    if listener is not None:
+        _stop(listener)
+
+
+def _stop(listener: logging.handlers.QueueListener) -> None:
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,271 @@
+"""Temporizadores y contadores por etapa (carga, escritura, ffmpeg, red).
+
+Desactivado por defecto: :func:`stage` devuelve un contexto vacío
+compartido y :func:`instrumented` solo comprueba un booleano, así que el
+coste sin métricas es despreciable. Se activa con :func:`enable`, con
+``CONVERSOR_METRICS=1`` o desde los CLI con ``--metrics-json``,
+``--metrics-prom`` o ``--profile``.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Sized
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+ENV_VAR = "CONVERSOR_METRICS"
+PROMETHEUS_PREFIX = "conversor"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    # CPU de procesos hijos (ffmpeg) terminados durante la etapa.
+    subprocess_seconds: float = 0.0
+    counters: dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "subprocess_seconds": round(self.subprocess_seconds, 6),
+            **self.counters,
+        }
+
+
+class _NullSpan:
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+    def add(self, **counters: float) -> None:
+        return None
+
+    def add_subprocess_cpu(self, seconds: float) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Mide una ejecución de una etapa; ``add`` acumula contadores (pistas, bytes).
+
+    La CPU de los hijos se toma de ``os.times()``, que es de todo el proceso:
+    si otros hilos lanzan subprocesos a la vez, su CPU también cuenta. Quien
+    conozca la de sus propios hijos la informa con :meth:`add_subprocess_cpu`
+    y entonces se usa solo esa.
+    """
+
+    __slots__ = ("registry", "name", "counters", "_wall", "_cpu", "_children", "_subprocess")
+
+    def __init__(self, registry: "MetricsRegistry", name: str) -> None:
+        self.registry = registry
+        self.name = name
+        self.counters: dict[str, float] = {}
+
+    def __enter__(self) -> "Span":
+        self._subprocess: float | None = None
+        self._children = _children_cpu()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: object, *exc_info: object) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        children = _children_cpu() - self._children if self._subprocess is None else self._subprocess
+        self.registry.record(self.name, wall, cpu, children, self.counters, failed=exc_type is not None)
+
+    def add(self, **counters: float) -> None:
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_subprocess_cpu(self, seconds: float) -> None:
+        self._subprocess = (self._subprocess or 0.0) + seconds
+
+
+class MetricsRegistry:
+    """Acumula :class:`StageStats` por nombre de etapa de forma segura entre hilos."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._stages: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> Span | _NullSpan:
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def record(
+        self,
+        name: str,
+        wall: float,
+        cpu: float,
+        subprocess: float = 0.0,
+        counters: dict[str, float] | None = None,
+        failed: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.errors += int(failed)
+            stats.wall_seconds += wall
+            stats.cpu_seconds += cpu
+            stats.subprocess_seconds += subprocess
+            for key, value in (counters or {}).items():
+                stats.counters[key] = stats.counters.get(key, 0) + value
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._stages.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self) -> str:
+        return json.dumps({"stages": self.snapshot()}, indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Formato de texto de Prometheus (válido para el *textfile collector*)."""
+        series: dict[str, list[str]] = {}
+        for name, values in self.snapshot().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for key, value in values.items():
+                metric = f"{PROMETHEUS_PREFIX}_stage_{_metric_name(key)}_total"
+                series.setdefault(metric, []).append(f'{metric}{{stage="{label}"}} {value}')
+        lines: list[str] = []
+        for metric, samples in series.items():
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: Path) -> None:
+        _write_atomic(path, self.to_json())
+
+    def write_prometheus(self, path: Path) -> None:
+        _write_atomic(path, self.to_prometheus())
+
+
+registry = MetricsRegistry(enabled=os.environ.get(ENV_VAR, "") == "1")
+
+
+def enable() -> None:
+    registry.enabled = True
+
+
+def disable() -> None:
+    registry.enabled = False
+
+
+def stage(name: str) -> Span | _NullSpan:
+    """Contexto que mide ``name`` en el registro global."""
+    return registry.stage(name)
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """Decora ``load``/``dump``/``append`` de un formato.
+
+    Registra pistas (el resultado de ``load`` o el iterable recibido si
+    tiene longitud) y bytes del archivo tras la llamada.
+    """
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            with registry.stage(name) as span:
+                result = func(*args, **kwargs)
+                span.add(**_io_counters(args, result))
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+@contextmanager
+def collect(
+    json_path: Path | None = None,
+    prometheus_path: Path | None = None,
+    profile_path: Path | None = None,
+) -> Iterator[MetricsRegistry]:
+    """Activa métricas (y cProfile) durante el bloque y exporta al salir."""
+
+    active = any(path is not None for path in (json_path, prometheus_path, profile_path))
+    previous = registry.enabled
+    if active:
+        registry.enabled = True
+    profiler = None
+    if profile_path is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield registry
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+        if json_path is not None:
+            registry.write_json(json_path)
+        if prometheus_path is not None:
+            registry.write_prometheus(prometheus_path)
+        registry.enabled = previous
+
+
+def _io_counters(args: tuple[Any, ...], result: Any) -> dict[str, float]:
+    counters: dict[str, float] = {}
+    if isinstance(result, list):
+        counters["tracks"] = len(result)
+    elif args and isinstance(args[0], Sized) and not isinstance(args[0], (str, Path)):
+        counters["tracks"] = len(args[0])
+    path = next((arg for arg in reversed(args) if isinstance(arg, (str, Path))), None)
+    if path is not None:
+        try:
+            counters["bytes"] = os.stat(path).st_size
+        except OSError:
+            pass
+    return counters
+
+
+def _children_cpu() -> float:
+    # Hijos terminados de todo el proceso, no solo del hilo actual. En
+    # Windows os.times() no informa de los hijos y vale siempre 0.
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def _metric_name(key: str) -> str:
+    return "".join(char if char.isalnum() else "_" for char in key).strip("_")
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as handle:
+        handle.write(text)
+    os.replace(handle.name, path)
@@ -0,0 +1,55 @@
+"""Política de reintentos de las descargas y contadores de lo ocurrido.
+
+La transferencia en sí la hace yt-dlp: conserva los ``.part`` y continúa
+con cabeceras ``Range`` desde el último byte escrito. Aquí solo se define
+cómo y cuántas veces reintentar y se cuentan los intentos.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Reintentos y tamaño de bloque que se pasan a yt-dlp.
+
+    ``max_retries`` se aplica tanto a las peticiones HTTP como a los
+    fragmentos; ``chunk_size`` limita cada petición ``Range`` para que un
+    corte solo obligue a repetir el bloque en curso.
+    """
+
+    max_retries: int = 10
+    backoff_base: float = 0.5
+    backoff_factor: float = 2.0
+    backoff_max: float = 30.0
+    chunk_size: int | None = 10 * 1024 * 1024
+    timeout: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """Segundos de espera antes del reintento ``attempt`` (empezando en 0)."""
+        return min(self.backoff_max, self.backoff_base * (self.backoff_factor ** attempt))
+
+
+@dataclass
+class RetryStats:
+    """Contadores de intentos y reintentos; se pueden leer desde otros hilos."""
+
+    attempts: int = 0
+    retries: int = 0
+    errors: list[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_attempt(self) -> None:
+        with self._lock:
+            self.attempts += 1
+
+    def record_retry(self, error: BaseException | str) -> None:
+        with self._lock:
+            self.retries += 1
+            self.errors.append(str(error))
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {"attempts": self.attempts, "retries": self.retries}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+FAKE_FFMPEG = """#!/bin/sh
+case "$2" in
+  -version) echo "ffmpeg version 6.1-test Copyright (c) 2000-2023" ;;
+  -encoders) printf 'Encoders:\\n V..... = Video\\n ------\\n A....D {encoders}\\n' ;;
+  -filters) printf 'Filters:\\n  T.. = Timeline support\\n ... aresample  A->A  Resample.\\n' ;;
+  -hwaccels) printf 'Hardware acceleration methods:\\nvaapi\\n' ;;
+  *) echo "conversion failed" >&2; exit 1 ;;
+esac
+"""
+
+
+@pytest.fixture()
+def fake_ffmpeg(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Instala un ``ffmpeg`` falso en el PATH; devuelve una función para crearlo."""
+
+    from conversor_rekordbox.audio import capabilities
+
+    bin_dir = tmp_path / "fake-bin"
+    bin_dir.mkdir()
+    monkeypatch.setattr(capabilities, "CACHE_PATH", tmp_path / "ffmpeg_capabilities.json")
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+
+    def install(encoders: str = "libmp3lame  libmp3lame MP3 (codec mp3)") -> Path:
+        binary = bin_dir / "ffmpeg"
+        binary.write_text(FAKE_FFMPEG.replace("{encoders}", encoders), encoding="utf-8")
+        binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+        return binary
+
+    return install
+
+
+class FakeYoutubeDL:
+    """Sustituto mínimo de YoutubeDL que registra su ciclo de vida."""
+
+    instances: list["FakeYoutubeDL"] = []
+
+    def __init__(self, params: dict[str, Any]) -> None:
+        self.params = params
+        self.closed = False
+        self.calls: list[str] = []
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self) -> "FakeYoutubeDL":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.closed = True
+
+    def extract_info(self, url: str, download: bool = True) -> dict[str, Any]:
+        self.calls.append(url)
+        info = {"id": url.rsplit("/", 1)[-1], "title": "Mix", "ext": "mp3"}
+        for hook in self.params.get("progress_hooks", []):
+            hook({"status": "finished", "info_dict": info, "downloaded_bytes": 10})
+        return info
+
+    def prepare_filename(self, info: dict[str, Any]) -> str:
+        return self.params["outtmpl"]["default"].replace("%(title)s.%(ext)s", "Mix.mp3")
+
+
+@pytest.fixture()
+def fake_ydl() -> type[FakeYoutubeDL]:
+    """Devuelve :class:`FakeYoutubeDL` con el registro de instancias vacío."""
+
+    FakeYoutubeDL.instances.clear()
+    return FakeYoutubeDL
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.api.ingest import ingest_downloads, track_from_info
+from conversor_rekordbox.formats import enginedj, rekordbox, serato
+from conversor_rekordbox.models import Track
+
+DATA = Path(__file__).parent / "data"
+
+NEW_TRACKS = [
+    Track(title="Nueva", artist="Artista C", duration=200, location="file:///music/new.mp3"),
+    Track(title="Otra & más", artist="Artista D", bpm=122.5, location="file:///music/other.mp3"),
+]
+
+
+def test_rekordbox_append_splices_collection(tmp_path: Path) -> None:
+    library = tmp_path / "library.xml"
+    shutil.copy(DATA / "sample_rekordbox.xml", library)
+
+    rekordbox.append(NEW_TRACKS, library)
+
+    tracks = rekordbox.load(library)
+    assert [t.title for t in tracks] == ["Track One", "Track Two", "Nueva", "Otra & más"]
+    text = library.read_text(encoding="utf-8")
+    assert 'Entries="4"' in text
+    assert text.rstrip().endswith("</DJ_PLAYLISTS>")
+
+
+def test_rekordbox_append_grows_entries_width(tmp_path: Path) -> None:
+    library = tmp_path / "library.xml"
+    rekordbox.dump([Track(title=f"T{i}", artist="A") for i in range(9)], library)
+
+    rekordbox.append(NEW_TRACKS, library)
+
+    assert 'Entries="11"' in library.read_text(encoding="utf-8")
+    assert len(rekordbox.load(library)) == 11
+
+
+@pytest.mark.parametrize("existing", [[], [Track(title="Vieja", artist="A")]])
+def test_enginedj_append_keeps_layout(tmp_path: Path, existing: list[Track]) -> None:
+    library = tmp_path / "library.json"
+    enginedj.dump(existing, library)
+
+    enginedj.append(NEW_TRACKS, library)
+
+    expected = tmp_path / "expected.json"
+    enginedj.dump([*existing, *NEW_TRACKS], expected)
+    assert library.read_text(encoding="utf-8") == expected.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("trailing", [[], [{"title": "Warm up", "artist": "", "entries": [1, 2]}]])
+def test_enginedj_append_with_trailing_array(tmp_path: Path, trailing: list) -> None:
+    library = tmp_path / "library.json"
+    payload = {"tracks": [enginedj._track_to_entry(Track(title="Vieja", artist="A"))], "playlists": trailing}
+    library.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    enginedj.append(NEW_TRACKS, library)
+
+    data = json.loads(library.read_text(encoding="utf-8"))
+    assert [entry["title"] for entry in data["tracks"]] == ["Vieja", "Nueva", "Otra & más"]
+    assert data["playlists"] == trailing
+
+
+def test_splice_moves_tail_in_blocks(tmp_path: Path) -> None:
+    from conversor_rekordbox.formats import _splice
+
+    path = tmp_path / "datos.bin"
+    path.write_bytes(bytes(range(256)) * 10)
+    with path.open("r+b") as handle:
+        _splice.splice(handle, 1000, b"<nuevo>", block_size=7)
+
+    original = bytes(range(256)) * 10
+    assert path.read_bytes() == original[:1000] + b"<nuevo>" + original[1000:]
+
+
+def test_serato_append_in_place(tmp_path: Path) -> None:
+    library = tmp_path / "crate.m3u8"
+    library.write_text("#EXTM3U\n#EXTINF:10,A - B\n/music/b.mp3", encoding="utf-8")
+
+    serato.append(NEW_TRACKS, library)
+
+    tracks = serato.load(library)
+    assert [t.location for t in tracks] == ["/music/b.mp3", "file:///music/new.mp3", "file:///music/other.mp3"]
+
+
+def test_ingest_downloads_appends_metadata(tmp_path: Path) -> None:
+    library = tmp_path / "library.json"
+    shutil.copy(DATA / "sample_engine.json", library)
+    audio = tmp_path / "01 - Mix.mp3"
+    audio.write_bytes(b"")
+    info = {
+        "title": "Mix",
+        "uploader": "DJ Uploader",
+        "artists": ["DJ Artist"],
+        "genres": ["House"],
+        "duration": 3600.5,
+        "upload_date": "20230809",
+        "playlist_title": "Sesiones",
+    }
+
+    ingest_downloads([(audio, info)], library)
+
+    payload = json.loads(library.read_text(encoding="utf-8"))
+    added = payload["tracks"][-1]
+    assert len(payload["tracks"]) == 3
+    assert added["artist"] == "DJ Artist"
+    assert added["genre"] == "House"
+    assert added["album"] == "Sesiones"
+    assert added["year"] == 2023
+    assert added["location"] == audio.resolve().as_uri()
+
+
+def test_track_from_info_plain_path(tmp_path: Path) -> None:
+    track = track_from_info(tmp_path / "a.mp3", {"title": "A", "uploader": "U"}, as_uri=False)
+    assert track.artist == "U"
+    assert track.location == str((tmp_path / "a.mp3").resolve())
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.audio_cli import main
+
+# Presupuesto de arranque en frío del CLI sin interfaz (medido ~30 ms).
+IMPORT_BUDGET_SECONDS = 0.25
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_cold_import_is_fast_and_headless() -> None:
+    probe = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import conversor_rekordbox.audio_cli as cli\n"
+        "cli.build_parser()\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = [m for m in ('PyQt6', 'yt_dlp') if m in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    timings = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-c", probe],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={"PYTHONPATH": str(SRC), "HOME": str(Path.home())},
+        ).stdout.split()
+        assert len(output) == 1, f"Módulos pesados importados: {output[1:]}"
+        timings.append(float(output[0]))
+
+    assert min(timings) < IMPORT_BUDGET_SECONDS
+
+
+def test_convert_reports_json_lines(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], fake_ffmpeg
+) -> None:
+    fake_ffmpeg()
+    missing = tmp_path / "missing.wav"
+
+    code = main(["convert", str(missing), "-o", str(tmp_path / "out"), "-f", "mp3"])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 1
+    assert [event["event"] for event in events] == ["start", "file", "done"]
+    assert events[1]["success"] is False
+    assert events[2] == {**events[2], "total": 1, "failed": 1}
+
+
+def test_convert_aborts_when_ffmpeg_missing(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path))
+
+    code = main(["convert", str(tmp_path / "a.wav"), "-o", str(tmp_path / "out")])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 1
+    assert [event["event"] for event in events] == ["start", "error"]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+
+from conversor_rekordbox.converter import convert_library
+from conversor_rekordbox.formats import rekordbox
+from conversor_rekordbox.models import BeatGrid, CuePoint, Track
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<DJ_PLAYLISTS Version="1.0.0">
+  <PRODUCT Name="rekordbox" Version="6.7.4" Company="AlphaTheta"/>
+  <COLLECTION Entries="2">
+    <TRACK TrackID="1" Name="Con rejilla" Artist="DJ" TotalTime="300" AverageBpm="128.00"
+           Location="file://localhost/music/uno.mp3">
+      <TEMPO Inizio="0.025" Bpm="128.00" Metro="4/4" Battito="1"/>
+      <TEMPO Inizio="120.025" Bpm="130.00" Metro="3/4" Battito="2"/>
+      <POSITION_MARK Name="" Type="0" Start="0.025" Num="-1"/>
+      <POSITION_MARK Name="Drop" Type="0" Start="60.025" Num="0" Red="40" Green="226" Blue="20"/>
+      <POSITION_MARK Name="Loop" Type="4" Start="90.025" End="97.525" Num="1"/>
+    </TRACK>
+    <TRACK TrackID="2" Name="Sin marcas" Artist="DJ"/>
+  </COLLECTION>
+  <PLAYLISTS>
+    <NODE Type="0" Name="ROOT" Count="1">
+      <NODE Name="Set" Type="1" KeyType="0" Entries="1"><TRACK Key="1"/></NODE>
+    </NODE>
+  </PLAYLISTS>
+</DJ_PLAYLISTS>
+"""
+
+
+def test_load_reads_tempo_and_position_marks(tmp_path: Path) -> None:
+    source = tmp_path / "rekordbox.xml"
+    source.write_text(XML, encoding="utf-8")
+
+    first, second = rekordbox.load(source)
+
+    grid = first.beatgrid
+    assert isinstance(grid.positions, array) and grid.positions.typecode == "d"
+    assert list(grid) == [(0.025, 128.0, 4, 1), (120.025, 130.0, 3, 2)]
+    assert first.cues == (
+        CuePoint(start=0.025),
+        CuePoint(start=60.025, num=0, name="Drop", color=(40, 226, 20)),
+        CuePoint(start=90.025, num=1, kind=4, end=97.525, name="Loop"),
+    )
+    # Los TRACK de las playlists no son pistas de la colección.
+    assert second.title == "Sin marcas"
+    assert second.beatgrid is None and second.cues is None
+
+
+def test_round_trip_through_dump_and_append(tmp_path: Path) -> None:
+    source = tmp_path / "rekordbox.xml"
+    source.write_text(XML, encoding="utf-8")
+    output = tmp_path / "salida.xml"
+
+    convert_library(source, output)
+    grid = BeatGrid()
+    grid.append(0.5, 174.0)
+    rekordbox.append([Track(title="Nueva", artist="DJ", beatgrid=grid, cues=(CuePoint(start=1.5, num=2),))], output)
+
+    original = rekordbox.load(source)
+    tracks = rekordbox.load(output)
+    assert tracks[:2] == original
+    assert tracks[2].beatgrid == grid
+    assert tracks[2].cues == (CuePoint(start=1.5, num=2),)
+    assert 'Entries="3"' in output.read_text(encoding="utf-8")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.audio import capabilities
+from conversor_rekordbox.audio.capabilities import probe_ffmpeg, select_encoder
+from conversor_rekordbox.audio.conversion import ConversionError, bulk_convert
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    capabilities.clear_cache()
+    yield
+    capabilities.clear_cache()
+
+
+def test_probe_parses_and_caches(fake_ffmpeg, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    binary = fake_ffmpeg("mp3_mf  MP3 via MediaFoundation (codec mp3)")
+    cache = tmp_path / "caps.json"
+
+    caps = probe_ffmpeg(str(binary), cache_path=cache)
+
+    assert caps.version == "6.1-test"
+    assert caps.encoders == {"mp3_mf"}
+    assert "aresample" in caps.filters
+    assert caps.hwaccels == {"vaapi"}
+    assert select_encoder("mp3", caps) == "mp3_mf"
+
+    # Segunda consulta desde disco sin ejecutar el binario.
+    capabilities.clear_cache()
+    monkeypatch.setattr(capabilities, "_run_probe", lambda _: pytest.fail("no debería ejecutar ffmpeg"))
+    assert probe_ffmpeg(str(binary), cache_path=cache) == caps
+
+
+def test_probe_invalidated_when_binary_changes(fake_ffmpeg, tmp_path: Path) -> None:
+    binary = fake_ffmpeg("mp3_mf  MP3 (codec mp3)")
+    cache = tmp_path / "caps.json"
+    assert probe_ffmpeg(str(binary), cache_path=cache).encoders == {"mp3_mf"}
+
+    fake_ffmpeg("libmp3lame  LAME (codec mp3)")
+    stat = binary.stat()
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert probe_ffmpeg(str(binary), cache_path=cache).encoders == {"libmp3lame"}
+
+
+def test_bulk_convert_fails_fast_without_encoder(fake_ffmpeg, tmp_path: Path) -> None:
+    fake_ffmpeg("aac  AAC (codec aac)")
+    sources = [tmp_path / f"{i}.wav" for i in range(5)]
+    seen = []
+
+    with pytest.raises(ConversionError, match="libmp3lame"):
+        bulk_convert(sources, tmp_path / "out", "mp3", on_result=seen.append)
+
+    assert seen == []
+
+
+def test_missing_source_is_not_reported_as_missing_ffmpeg(fake_ffmpeg, tmp_path: Path) -> None:
+    fake_ffmpeg()
+    (tmp_path / "b.wav").write_bytes(b"RIFF")
+
+    results = bulk_convert([tmp_path / "a.wav", tmp_path / "b.wav"], tmp_path / "out", "mp3")
+
+    assert "origen" in results[0].error and "FFmpeg" not in results[0].error
+    assert results[1].error.strip() == "conversion failed"
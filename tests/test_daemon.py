@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from conversor_rekordbox import converter
+from conversor_rekordbox.api.soundcloud import SoundCloudDownloader
+from conversor_rekordbox.audio import conversion
+from conversor_rekordbox import daemon as daemon_module
+from conversor_rekordbox.daemon import FINISHED, JobManager, create_server
+from conversor_rekordbox.formats import enginedj, serato
+
+DATA = Path(__file__).parent / "data"
+TOKEN = "secreto"
+
+
+@pytest.fixture()
+def daemon():
+    """Arranca servicios en un puerto libre; devuelve una función ``start(**opciones)``."""
+
+    servers = []
+
+    def start(**options: Any):
+        server = create_server(port=0, **{"token": TOKEN, **options})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _call(server, method: str, path: str, body: Any = None, headers: dict[str, str] | None = None):
+    data = json.dumps(body).encode() if body is not None else None
+    headers = {"X-Conversor-Token": TOKEN, "Content-Type": "application/json", **(headers or {})}
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def _wait(server, job_id: str) -> dict[str, Any]:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        _, job = _call(server, "GET", f"/jobs/{job_id}")
+        if job["status"] in FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"El trabajo {job_id} no terminó")
+
+
+def test_library_job_round_trip(daemon, tmp_path: Path) -> None:
+    server = daemon()
+    params = {
+        "input": str(DATA / "sample_rekordbox.xml"),
+        "output": str(tmp_path / "salida.m3u8"),
+        "also": [str(tmp_path / "salida.json")],
+        "sort": "title",
+    }
+
+    status, job = _call(server, "POST", "/jobs", {"kind": "library", "params": params})
+
+    assert status == 202 and job["kind"] == "library"
+    finished = _wait(server, job["id"])
+    assert finished["status"] == "done"
+    assert finished["result"] == {"outputs": [params["output"], *params["also"]]}
+    assert len(serato.load(tmp_path / "salida.m3u8")) == len(enginedj.load(tmp_path / "salida.json")) == 2
+    _, health = _call(server, "GET", "/health")
+    assert health["jobs"]["done"] == 1
+    _, listing = _call(server, "GET", "/jobs?status=done")
+    assert [item["id"] for item in listing["jobs"]] == [job["id"]]
+
+
+def test_invalid_requests_are_rejected(daemon, tmp_path: Path) -> None:
+    server = daemon()
+    library = {"input": "a.xml", "output": "b.m3u8"}
+
+    assert _call(server, "POST", "/jobs", {"kind": "video", "params": {}})[0] == 400
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {"input": "a.xml"}})[0] == 400
+    status, body = _call(server, "POST", "/jobs", {"kind": "library", "params": {**library, "sort": "tempo"}})
+    assert status == 400 and "tempo" in body["error"]
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {**library, "extra": 1}})[0] == 400
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {**library, "dedup": "false"}})[0] == 400
+    merge = {**library, "merge": ["c.json"]}
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {**merge, "prefer": "mejor"}})[0] == 400
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {**library, "query": "bpm:abc"}})[0] == 400
+    assert _call(server, "POST", "/jobs", {"kind": "library", "params": {**library, "group_by": "tempo"}})[0] == 400
+    assert _call(server, "POST", "/jobs", {"kind": "audio", "params": {"sources": "a.wav", "output_dir": "x"}})[0] == 400
+    assert _call(server, "GET", "/jobs/desconocido")[0] == 404
+    assert _call(server, "DELETE", "/jobs/desconocido")[0] == 404
+    assert _call(server, "GET", "/otra")[0] == 404
+    assert server.manager.jobs() == []
+
+
+def test_failed_library_job_reports_error(daemon, tmp_path: Path) -> None:
+    server = daemon()
+    params = {"input": str(tmp_path / "no_existe.xml"), "output": str(tmp_path / "b.m3u8")}
+
+    _, job = _call(server, "POST", "/jobs", {"kind": "library", "params": params})
+
+    finished = _wait(server, job["id"])
+    assert finished["status"] == "failed" and finished["error"]
+
+
+def test_cancel_queued_and_running_jobs(daemon, tmp_path: Path, monkeypatch) -> None:
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_convert(*args: Any, **kwargs: Any) -> Path:
+        started.set()
+        release.wait(5)
+        return Path(args[1])
+
+    monkeypatch.setattr(converter, "convert_library", blocking_convert)
+    server = daemon(workers={"library": 1})
+    params = {"input": "a.xml", "output": str(tmp_path / "b.m3u8")}
+    _, running = _call(server, "POST", "/jobs", {"kind": "library", "params": params})
+    _, queued = _call(server, "POST", "/jobs", {"kind": "library", "params": params})
+    assert started.wait(5)
+
+    status, cancelled = _call(server, "DELETE", f"/jobs/{queued['id']}")
+    assert status == 200 and cancelled["status"] == "cancelled"
+    # Una conversión de biblioteca en curso no se interrumpe.
+    assert _call(server, "DELETE", f"/jobs/{running['id']}")[0] == 409
+    release.set()
+    assert _wait(server, running["id"])["status"] == "done"
+    assert _call(server, "DELETE", f"/jobs/{running['id']}")[0] == 409
+
+
+def test_audio_job_stops_between_files(daemon, tmp_path: Path, monkeypatch) -> None:
+    release = threading.Event()
+    converted: list[Path] = []
+
+    def slow_convert(source: Path, destination_dir: Path, fmt: str, **kwargs: Any):
+        converted.append(source)
+        release.wait(5)
+        return conversion.ConversionResult(source, destination_dir / f"{source.stem}.{fmt}", fmt, True)
+
+    monkeypatch.setattr(conversion, "resolve_encoder", lambda fmt: ("ffmpeg", "libmp3lame"))
+    monkeypatch.setattr(conversion, "convert_file", slow_convert)
+    server = daemon()
+    sources = [str(tmp_path / f"{index}.wav") for index in range(3)]
+    _, job = _call(server, "POST", "/jobs", {"kind": "audio", "params": {"sources": sources, "output_dir": str(tmp_path)}})
+    while not converted:
+        time.sleep(0.01)
+
+    status, cancelling = _call(server, "DELETE", f"/jobs/{job['id']}")
+    release.set()
+
+    assert status == 200 and cancelling["cancel_requested"] is True
+    finished = _wait(server, job["id"])
+    assert finished["status"] == "cancelled"
+    assert finished["progress"] == {"done": 1, "total": 3, "failed": 0}
+    assert converted == [Path(sources[0])]
+
+
+def test_audio_job_with_fake_ffmpeg(daemon, tmp_path: Path, fake_ffmpeg) -> None:
+    fake_ffmpeg()
+    server = daemon()
+    (tmp_path / "a.wav").write_bytes(b"RIFF")
+    params = {"sources": [str(tmp_path / "a.wav")], "output_dir": str(tmp_path / "out")}
+
+    _, job = _call(server, "POST", "/jobs", {"kind": "audio", "params": params})
+
+    finished = _wait(server, job["id"])
+    assert finished["status"] == "done"
+    assert finished["result"]["failed"] == 1
+    assert "conversion failed" in finished["result"]["files"][0]["error"]
+
+
+def test_download_jobs_share_one_session(daemon, fake_ydl, tmp_path: Path) -> None:
+    manager = JobManager({"download": 1}, downloader=SoundCloudDownloader(ydl_factory=fake_ydl))
+    server = daemon(manager=manager)
+    library = tmp_path / "biblioteca.json"
+    enginedj.dump([], library)
+
+    ids = []
+    for name in ("uno", "dos"):
+        params = {"urls": [f"https://soundcloud.com/a/{name}"], "output_dir": str(tmp_path), "library": str(library)}
+        ids.append(_call(server, "POST", "/jobs", {"kind": "download", "params": params})[1]["id"])
+
+    results = [_wait(server, job_id) for job_id in ids]
+    assert [job["status"] for job in results] == ["done", "done"]
+    assert results[0]["result"]["files"] == [
+        {"url": "https://soundcloud.com/a/uno", "path": str(tmp_path / "Mix.mp3"), "title": "Mix"}
+    ]
+    assert results[1]["progress"]["phase"] == "downloaded"
+    assert len(fake_ydl.instances) == 1  # yt-dlp caliente entre trabajos
+    assert len(enginedj.load(library)) == 2
+
+
+def test_requests_must_carry_token_local_host_and_json(daemon, tmp_path: Path) -> None:
+    server = daemon()
+    body = {"kind": "library", "params": {"input": "a.xml", "output": str(tmp_path / "b.m3u8")}}
+
+    assert _call(server, "GET", "/health", headers={"X-Conversor-Token": "otro"})[0] == 401
+    assert _call(server, "GET", "/health")[0] == 200
+    # Lo que puede enviar una página web: texto plano, otro Host u otro Origin.
+    assert _call(server, "POST", "/jobs", body, headers={"Content-Type": "text/plain"})[0] == 415
+    assert _call(server, "POST", "/jobs", body, headers={"Host": "evil.example"})[0] == 403
+    assert _call(server, "POST", "/jobs", body, headers={"Origin": "http://evil.example"})[0] == 403
+    assert _call(server, "GET", "/health", headers={"Origin": "http://localhost:3000"})[0] == 200
+    assert server.manager.jobs() == []
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_invalid_content_length(daemon, length: str) -> None:
+    server = daemon()
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.putrequest("POST", "/jobs")
+    connection.putheader("X-Conversor-Token", TOKEN)
+    connection.putheader("Content-Type", "application/json")
+    connection.putheader("Content-Length", length)
+    connection.endheaders()
+
+    response = connection.getresponse()
+
+    assert response.status == 400
+    connection.close()
+
+
+def test_default_token_is_generated_once(daemon, tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(daemon_module, "TOKEN_PATH", tmp_path / "conf" / "daemon_token")
+
+    server = daemon(token=None)
+
+    token = (tmp_path / "conf" / "daemon_token").read_text().strip()
+    assert server.token == token and len(token) >= 32
+    assert (tmp_path / "conf" / "daemon_token").stat().st_mode & 0o077 == 0
+    assert daemon_module.load_token() == token
+    assert _call(server, "GET", "/health", headers={"X-Conversor-Token": token})[0] == 200
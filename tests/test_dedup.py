@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from conversor_rekordbox.library.dedup import drop_duplicates, find_duplicates, normalize_location
+from conversor_rekordbox.models import Track
+
+
+def test_normalize_location_matches_uri_and_plain_path() -> None:
+    assert normalize_location("file:///C:/Music/Caf%C3%A9.mp3") == normalize_location("c:\\music\\café.mp3")
+
+
+def test_clusters_near_duplicates_and_keeps_most_complete() -> None:
+    tracks = [
+        Track(title="Latch", artist="Disclosure feat. Sam Smith", duration=255.0),
+        Track(title="Strobe", artist="deadmau5", duration=634.0, location="/music/strobe.mp3"),
+        Track(title="LATCH", artist="Disclosure ft Sam Smith", duration=256.2, bpm=122.0),
+        Track(title="Strobe (Radio Edit)", artist="deadmau5", duration=200.0),
+        Track(title="Otro", artist="Otro", location="file:///MUSIC/Strobe.mp3"),
+        Track(title="Latch", artist="Disclosure featuring Sam Smith", duration=300.0),
+    ]
+
+    clusters = find_duplicates(tracks)
+
+    assert [cluster.rows for cluster in clusters] == [(2, 0), (1, 4)]
+    assert [track.title for track in drop_duplicates(tracks)] == ["Strobe", "LATCH", "Strobe (Radio Edit)", "Latch"]
+
+
+def test_lsh_finds_variants_in_large_library() -> None:
+    tracks = [Track(title=f"Tema {index} noche", artist=f"Artista {index}", duration=200.0) for index in range(5_000)]
+    tracks.append(Track(title="Tema 1234 Noche (Original Mix)", artist="ARTISTA 1234", duration=201.0))
+
+    clusters = find_duplicates(tracks)
+
+    assert [cluster.rows for cluster in clusters] == [(1234, 5_000)]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import platform
+import tarfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.utils import deps
+from conversor_rekordbox.utils.config import AppConfig
+from conversor_rekordbox.utils.deps import ChecksumError, DependencyBootstrap
+
+FAKE_FFMPEG = b"#!/bin/sh\necho ffmpeg version test\n"
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture()
+def file_server(tmp_path: Path):
+    root = tmp_path / "www"
+    root.mkdir()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield root, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _build_archive(root: Path) -> Path:
+    archive = root / "ffmpeg-release-amd64-static.tar.xz"
+    with tarfile.open(archive, "w:xz") as tar:
+        for name, payload in [
+            ("ffmpeg-6.1-static/readme.txt", b"docs" * 1000),
+            ("ffmpeg-6.1-static/ffprobe", b"probe"),
+            ("ffmpeg-6.1-static/ffmpeg", FAKE_FFMPEG),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            tar.addfile(info, io.BytesIO(payload))
+    return archive
+
+
+def _publish_md5(archive: Path) -> None:
+    (archive.parent / f"{archive.name}.md5").write_text(
+        f"{hashlib.md5(archive.read_bytes()).hexdigest()}  {archive.name}\n"
+    )
+
+
+@pytest.fixture()
+def linux_build(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    monkeypatch.setattr(deps.os, "name", "posix")
+    # El bootstrap antepone bin_dir al PATH; se restaura al terminar.
+    monkeypatch.setenv("PATH", deps.os.environ.get("PATH", ""))
+
+
+def _bootstrap(tmp_path: Path, url: str) -> DependencyBootstrap:
+    return DependencyBootstrap(
+        AppConfig(),
+        bin_dir=tmp_path / "bin",
+        urls={"linux": url},
+        config_path=tmp_path / "config.json",
+    )
+
+
+def test_install_streams_only_ffmpeg_member(file_server, tmp_path: Path, linux_build) -> None:
+    root, base = file_server
+    archive = _build_archive(root)
+    _publish_md5(archive)
+    progress: list[tuple[int, int | None]] = []
+
+    bootstrap = _bootstrap(tmp_path, f"{base}/{archive.name}")
+    installed = bootstrap.install_ffmpeg(progress=lambda done, total: progress.append((done, total)))
+
+    assert installed.read_bytes() == FAKE_FFMPEG
+    assert sorted(p.name for p in (tmp_path / "bin").iterdir()) == ["ffmpeg"]
+    assert progress[-1] == (archive.stat().st_size, archive.stat().st_size)
+
+
+def test_checksum_mismatch_leaves_nothing(file_server, tmp_path: Path, linux_build) -> None:
+    root, base = file_server
+    archive = _build_archive(root)
+    (root / f"{archive.name}.md5").write_text("0" * 32)
+
+    bootstrap = _bootstrap(tmp_path, f"{base}/{archive.name}")
+    with pytest.raises(ChecksumError):
+        bootstrap.install_ffmpeg()
+
+    assert list((tmp_path / "bin").iterdir()) == []
+
+
+@pytest.mark.parametrize("sidecar", [None, "<html>Not Found</html>"])
+def test_missing_checksum_refuses_install(file_server, tmp_path: Path, linux_build, sidecar) -> None:
+    root, base = file_server
+    archive = _build_archive(root)
+    if sidecar is not None:
+        (root / f"{archive.name}.md5").write_text(sidecar)
+
+    bootstrap = _bootstrap(tmp_path, f"{base}/{archive.name}")
+    with pytest.raises(ChecksumError, match="sin verificar"):
+        bootstrap.install_ffmpeg()
+    assert not (tmp_path / "bin" / "ffmpeg").exists()
+
+    # Solo con la opción explícita se instala sin verificar.
+    bootstrap.allow_unverified = True
+    assert bootstrap.install_ffmpeg().read_bytes() == FAKE_FFMPEG
+
+
+def test_async_bootstrap_caches_fingerprint(file_server, tmp_path: Path, linux_build, monkeypatch) -> None:
+    root, base = file_server
+    archive = _build_archive(root)
+    _publish_md5(archive)
+    monkeypatch.setattr(deps.shutil, "which", lambda _: None)
+    monkeypatch.delenv("FFMPEG_PATH", raising=False)
+    bootstrap = _bootstrap(tmp_path, f"{base}/{archive.name}")
+    results: list[tuple[bool, str]] = []
+
+    bootstrap.ensure_ffmpeg_async(lambda ok, msg: results.append((ok, msg))).join(timeout=10)
+
+    assert results and results[0][0] is True
+    config = AppConfig.load(tmp_path / "config.json")
+    assert config.ffmpeg_size == len(FAKE_FFMPEG)
+
+    # Siguiente arranque: el binario sin cambios se acepta sin detección.
+    again = DependencyBootstrap(config, bin_dir=tmp_path / "bin", config_path=tmp_path / "config.json")
+    monkeypatch.setattr(again, "_find_ffmpeg", lambda: pytest.fail("no debería detectar"))
+    assert again.ensure_ffmpeg()[0] is True
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from conversor_rekordbox.converter import Format, append_library, convert_library
+from conversor_rekordbox.formats import enginedb
+from conversor_rekordbox.models import Track
+
+DATA = Path(__file__).parent / "data"
+
+
+def _tracks(count: int) -> list[Track]:
+    return [
+        Track(
+            title=f"Tema {index}",
+            artist="Artista",
+            genre="House",
+            duration=200.0 + index,
+            bpm=124.5,
+            location=f"file://localhost/Music/Tema%20{index}.mp3",
+            year=2020,
+            rating=80,
+        )
+        for index in range(count)
+    ]
+
+
+def test_dump_and_load_round_trip_with_playlists(tmp_path: Path) -> None:
+    database = tmp_path / "m.db"
+    tracks = _tracks(5)
+
+    enginedb.dump(tracks, database, playlists={"Warm up": [tracks[3], tracks[0]], "Vacía": []})
+
+    loaded = enginedb.load(database)
+    assert [track.title for track in loaded] == [track.title for track in tracks]
+    assert loaded[1].location == "/Music/Tema 1.mp3"
+    assert (loaded[1].bpm, loaded[1].duration, loaded[1].rating) == (124.5, 201.0, 80)
+
+    playlists = enginedb.load_playlists(database)
+    assert [track.title for track in playlists["Warm up"]] == ["Tema 3", "Tema 0"]
+    assert playlists["Vacía"] == []
+
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("SELECT filename, fileType, bpm FROM Track WHERE id = 2").fetchone() == (
+            "Tema 1.mp3",
+            "mp3",
+            124,
+        )
+
+
+def test_append_and_streaming_read_of_large_database(tmp_path: Path) -> None:
+    database = tmp_path / "m.db"
+    enginedb.dump(_tracks(10_000), database)
+    append_library(_tracks(2), database)
+
+    assert Format.from_extension(database) is Format.ENGINE_DB
+    titles = [track.title for track in enginedb.iter_tracks(database)]
+    assert len(titles) == 10_002
+    assert titles[-2:] == ["Tema 0", "Tema 1"]
+
+
+def test_convert_rekordbox_to_engine_database(tmp_path: Path) -> None:
+    output = convert_library(DATA / "sample_rekordbox.xml", tmp_path / "m.db")
+
+    assert [track.title for track in enginedb.load(output)] == ["Track One", "Track Two"]
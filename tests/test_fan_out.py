@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.cli import main
+from conversor_rekordbox.converter import convert_library, fan_out_library
+from conversor_rekordbox.formats import enginedj, rekordbox, serato
+from test_scanner import _flac
+
+DATA = Path(__file__).parent / "data"
+
+
+def test_single_parse_feeds_every_writer(tmp_path: Path, monkeypatch) -> None:
+    loads: list[Path] = []
+    original_load = rekordbox.load
+    original_iter = rekordbox.iter_load
+    monkeypatch.setattr(rekordbox, "iter_load", lambda path: loads.append(path) or original_iter(path))
+    outputs = [tmp_path / "serato.m3u8", tmp_path / "engine.json", tmp_path / "rekordbox.xml"]
+
+    result = fan_out_library(DATA / "sample_rekordbox.xml", outputs, order_by=("title",), batch_size=1)
+
+    assert result == outputs
+    assert loads == [DATA / "sample_rekordbox.xml"]
+    source = original_load(DATA / "sample_rekordbox.xml")
+    expected = [track.location for track in sorted(source, key=lambda track: track.title)]
+    assert [t.location for t in serato.load(outputs[0])] == expected
+    assert [t.location for t in enginedj.load(outputs[1])] == expected
+    assert [t.location for t in original_load(outputs[2])] == expected
+
+
+def test_writers_run_concurrently(tmp_path: Path, monkeypatch) -> None:
+    # Dos escritores que solo terminan si el otro también está escribiendo.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def slow_dump(original):
+        def dump(tracks, path):
+            tracks = list(tracks)
+            barrier.wait()
+            original(tracks, path)
+
+        return dump
+
+    monkeypatch.setattr(serato, "dump", slow_dump(serato.dump))
+    monkeypatch.setattr(enginedj, "dump", slow_dump(enginedj.dump))
+
+    fan_out_library(DATA / "sample_rekordbox.xml", [tmp_path / "a.m3u8", tmp_path / "b.json"])
+
+    assert (tmp_path / "a.m3u8").exists() and (tmp_path / "b.json").exists()
+
+
+def test_failing_writer_does_not_block_others(tmp_path: Path, monkeypatch) -> None:
+    def broken(tracks, path):
+        next(iter(tracks))
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(enginedj, "dump", broken)
+    started = time.perf_counter()
+
+    with pytest.raises(OSError, match="disco lleno"):
+        fan_out_library(
+            DATA / "sample_rekordbox.xml", [tmp_path / "a.m3u8", tmp_path / "b.json"], batch_size=1, queue_size=1
+        )
+
+    assert time.perf_counter() - started < 5
+    assert len(serato.load(tmp_path / "a.m3u8")) == 2
+
+
+def test_cli_also(tmp_path: Path) -> None:
+    code = main([str(DATA / "sample_rekordbox.xml"), str(tmp_path / "a.m3u8"), "--also", str(tmp_path / "b.json")])
+
+    assert code == 0
+    assert len(enginedj.load(tmp_path / "b.json")) == 2
+
+    with pytest.raises(SystemExit):
+        main([str(DATA / "sample_rekordbox.xml"), str(tmp_path / "c"), "--also", str(tmp_path / "d.json"),
+              "--group-by", "genre"])
+
+
+def test_folder_input_uses_uri_locations_only_for_rekordbox(tmp_path: Path) -> None:
+    music = tmp_path / "música"
+    music.mkdir()
+    (music / "a.flac").write_bytes(_flac({"TITLE": "A"}))
+    outputs = [tmp_path / "r.xml", tmp_path / "s.m3u8"]
+
+    fan_out_library(music, outputs)
+
+    alone = rekordbox.load(convert_library(music, tmp_path / "solo.xml"))
+    assert alone[0].location.startswith("file://localhost/")
+    assert [track.location for track in rekordbox.load(outputs[0])] == [track.location for track in alone]
+    assert [track.location for track in serato.load(outputs[1])] == [(music / "a.flac").as_posix()]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.converter import convert_library
+from conversor_rekordbox.formats import serato
+from conversor_rekordbox.library.index import LibraryIndex, QueryError, parse_query
+from conversor_rekordbox.models import Track
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def index() -> LibraryIndex:
+    return LibraryIndex(
+        [
+            Track(title="Latch", artist="Disclosure", genre="House", bpm=122.0, year=2012, rating=80),
+            Track(title="One More Time", artist="Daft Punk", genre="French House", bpm=123.0, year=2000),
+            Track(title="Strobe", artist="deadmau5", genre="Progressive", bpm=128.0, year=2009),
+            Track(title="Música Ligera", artist="Soda Stereo", genre="Rock", bpm=None, year=1990),
+        ]
+    )
+
+
+def _titles(tracks: list[Track]) -> list[str]:
+    return [track.title for track in tracks]
+
+
+def test_text_and_numeric_terms_are_intersected(index: LibraryIndex) -> None:
+    assert _titles(index.search("genre:house bpm:120..128")) == ["Latch", "One More Time"]
+    assert _titles(index.search("genre:house bpm:123")) == ["One More Time"]
+    assert _titles(index.search("bpm:125..")) == ["Strobe"]
+    assert _titles(index.search("year:..2000")) == ["One More Time", "Música Ligera"]
+
+
+def test_quoted_phrases_bare_words_negation_and_accents(index: LibraryIndex) -> None:
+    assert _titles(index.search('artist:"daft punk"')) == ["One More Time"]
+    assert _titles(index.search("musica")) == ["Música Ligera"]
+    assert _titles(index.search("genre:house -genre:french")) == ["Latch"]
+    assert index.search("genre:techno") == []
+
+
+@pytest.mark.parametrize("query", ["label:x", "bpm:abc", "bpm:130..120", "bpm:..", 'title:"abierta'])
+def test_invalid_queries_raise(query: str) -> None:
+    with pytest.raises(QueryError):
+        parse_query(query)
+
+
+def test_convert_library_applies_query(tmp_path: Path) -> None:
+    output = tmp_path / "house.m3u8"
+    convert_library(DATA / "sample_rekordbox.xml", output, query="genre:house bpm:120..128")
+
+    assert _titles(serato.load(output)) == ["Track One"]
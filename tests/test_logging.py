@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.utils.logger import LOGGER_NAME, configure_logging, get_logger, shutdown_logging
+
+
+@pytest.fixture(autouse=True)
+def _restore_logging(tmp_path: Path):
+    yield
+    # Nunca el log real de ~/.conversor_audio.
+    configure_logging(path=tmp_path / "restored.log", console_level=logging.CRITICAL)
+
+
+def test_json_lines_keep_extra_fields(tmp_path: Path) -> None:
+    log_path = tmp_path / "logs" / "app.log"
+    logger = configure_logging(path=log_path, json_lines=True, console_level=logging.CRITICAL)
+
+    logger.debug("Ejecutando comando ffmpeg", extra={"command": "ffmpeg -i a.wav a.mp3"})
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Falló %s", "algo", extra={"url": "https://soundcloud.com/x"})
+    shutdown_logging()
+
+    lines = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert lines[0]["message"] == "Ejecutando comando ffmpeg"
+    assert lines[0]["command"] == "ffmpeg -i a.wav a.mp3"
+    assert lines[1]["message"] == "Falló algo"
+    assert lines[1]["url"] == "https://soundcloud.com/x"
+    assert "RuntimeError: boom" in lines[1]["exc"]
+
+
+def test_text_format_and_rotation(tmp_path: Path) -> None:
+    log_path = tmp_path / "app.log"
+    logger = configure_logging(
+        path=log_path, json_lines=False, max_bytes=2_000, backup_count=2, console_level=logging.CRITICAL
+    )
+
+    for index in range(200):
+        logger.info("Descargando audio", extra={"index": index})
+    shutdown_logging()
+
+    assert (tmp_path / "app.log.1").exists()
+    assert not (tmp_path / "app.log.3").exists()
+    assert "| index=199" in log_path.read_text(encoding="utf-8").splitlines()[-1]
+
+
+def test_logging_after_shutdown_reconfigures(tmp_path: Path, monkeypatch) -> None:
+    from conversor_rekordbox.utils import logger as logger_module
+
+    configure_logging(path=tmp_path / "first.log", console_level=logging.CRITICAL)
+    shutdown_logging()
+    assert logging.getLogger(LOGGER_NAME).handlers == []
+    shutdown_logging()  # idempotente, como el de atexit
+
+    monkeypatch.setattr(logger_module, "LOG_PATH", tmp_path / "second.log")
+    get_logger().info("Después del cierre")
+    shutdown_logging()
+
+    assert "Después del cierre" in (tmp_path / "second.log").read_text(encoding="utf-8")
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox import cli
+from conversor_rekordbox.converter import merge_libraries
+from conversor_rekordbox.formats import enginedj, rekordbox, serato
+from conversor_rekordbox.library.merge import MergePolicy, merge_tracks
+from conversor_rekordbox.models import Track
+
+
+def test_joins_on_location_or_metadata_and_resolves_conflicts() -> None:
+    first = [
+        Track(title="Latch", artist="Disclosure", bpm=None, rating=60, genre="House",
+              location="file://localhost/Music/Latch.mp3"),
+        Track(title="Strobe", artist="deadmau5", duration=634.0),
+    ]
+    second = [
+        Track(title="Latch (Original Mix)", artist="Disclosure", bpm=122.0, rating=80, genre="UK Garage",
+              location="/music/latch.mp3"),
+        Track(title="STROBE", artist="Deadmau5", duration=635.0, year=2009),
+        Track(title="Strobe", artist="deadmau5", duration=200.0),
+    ]
+
+    merged = merge_tracks([first, second])
+
+    assert len(merged) == 3
+    latch, strobe, edit = merged
+    assert (latch.title, latch.bpm, latch.rating, latch.genre) == ("Latch", 122.0, 80, "House")
+    assert (strobe.title, strobe.year) == ("Strobe", 2009)
+    assert edit.duration == 200.0
+
+    last = merge_tracks([first, second], MergePolicy(default="last"))
+    assert (last[0].title, last[0].genre, last[0].rating) == ("Latch (Original Mix)", "UK Garage", 80)
+
+
+def test_unknown_rule_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        merge_tracks([], MergePolicy(fields={"bpm": "average"}))
+
+
+def test_cli_merges_mixed_formats(tmp_path: Path) -> None:
+    rekordbox.dump([Track(title="Uno", artist="A", location="file://localhost/m/uno.mp3", bpm=120.0)],
+                   tmp_path / "a.xml")
+    serato.dump([Track(title="Uno", artist="A", location="/m/uno.mp3"), Track(title="Dos", artist="B")],
+                tmp_path / "b.m3u8")
+    enginedj.dump([Track(title="Dos", artist="B", rating=100)], tmp_path / "c.json")
+
+    cli.main([str(tmp_path / "a.xml"), str(tmp_path / "out.json"),
+              "--merge", str(tmp_path / "b.m3u8"), "--merge", str(tmp_path / "c.json")])
+
+    tracks = enginedj.load(tmp_path / "out.json")
+    assert [(track.title, track.bpm, track.rating) for track in tracks] == [("Uno", 120.0, None), ("Dos", None, 100)]
+
+
+def test_cli_input_format_applies_to_primary_merge_input(tmp_path: Path) -> None:
+    primary = tmp_path / "lista.txt"
+    primary.write_text("/m/uno.mp3\n", encoding="utf-8")  # sin cabecera ni extensión reconocible
+    enginedj.dump([Track(title="Dos", artist="B", location="/m/dos.mp3")], tmp_path / "b.json")
+    argv = [str(primary), str(tmp_path / "out.json"), "--merge", str(tmp_path / "b.json")]
+
+    with pytest.raises(SystemExit):
+        cli.main(argv)
+    assert cli.main([*argv, "--input-format", "serato"]) == 0
+
+    assert [track.location for track in enginedj.load(tmp_path / "out.json")] == ["/m/uno.mp3", "/m/dos.mp3"]
+
+
+def test_merge_streams_each_input(tmp_path: Path, monkeypatch) -> None:
+    rekordbox.dump([Track(title="Uno", artist="A", location="/m/uno.mp3")], tmp_path / "a.xml")
+    serato.dump([Track(title="Uno", artist="A", location="/m/uno.mp3"),
+                 Track(title="Dos", artist="B", location="/m/dos.mp3")], tmp_path / "b.m3u8")
+    consumed: list[str] = []
+
+    def streaming(module):
+        original = module.iter_load
+
+        def iter_load(path):
+            for track in original(path):
+                consumed.append(track.title)
+                yield track
+
+        monkeypatch.setattr(module, "iter_load", iter_load)
+        monkeypatch.setattr(module, "load", lambda path: pytest.fail("la entrada se cargó entera"))
+
+    streaming(rekordbox)
+    streaming(serato)
+
+    merge_libraries([tmp_path / "a.xml", tmp_path / "b.m3u8"], tmp_path / "out.json")
+
+    assert consumed == ["Uno", "Uno", "Dos"]
+    assert [track.location for track in enginedj.load(tmp_path / "out.json")] == ["/m/uno.mp3", "/m/dos.mp3"]
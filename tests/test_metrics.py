@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import pstats
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox import cli
+from conversor_rekordbox.converter import convert_library
+from conversor_rekordbox.utils import metrics
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+    metrics.disable()
+
+
+def test_disabled_registry_records_nothing(tmp_path: Path) -> None:
+    convert_library(DATA / "sample_rekordbox.xml", tmp_path / "out.m3u8")
+
+    assert metrics.registry.snapshot() == {}
+    assert metrics.stage("convert_library") is metrics.stage("otra")
+
+
+def test_cli_exports_json_prometheus_and_profile(tmp_path: Path) -> None:
+    output = tmp_path / "out.json"
+    summary = tmp_path / "metrics.json"
+    prom = tmp_path / "metrics.prom"
+    profile = tmp_path / "run.prof"
+
+    cli.main([
+        str(DATA / "sample_rekordbox.xml"),
+        str(output),
+        "--metrics-json", str(summary),
+        "--metrics-prom", str(prom),
+        "--profile", str(profile),
+    ])
+
+    stages = json.loads(summary.read_text(encoding="utf-8"))["stages"]
+    loaded = stages["rekordbox.load"]["tracks"]
+    assert loaded > 0
+    assert stages["enginedj.dump"]["tracks"] == loaded
+    assert stages["enginedj.dump"]["bytes"] == output.stat().st_size
+    assert stages["convert_library"]["calls"] == 1
+    assert stages["convert_library"]["wall_seconds"] >= stages["rekordbox.load"]["wall_seconds"]
+
+    text = prom.read_text(encoding="utf-8")
+    assert "# TYPE conversor_stage_calls_total counter" in text
+    assert 'conversor_stage_tracks_total{stage="rekordbox.load"}' in text
+
+    assert pstats.Stats(str(profile)).total_calls > 0
+    assert not metrics.registry.enabled
+
+
+def test_failed_stage_counts_error() -> None:
+    metrics.enable()
+    with pytest.raises(ValueError):
+        with metrics.stage("falla"):
+            raise ValueError("boom")
+
+    assert metrics.registry.snapshot()["falla"]["errors"] == 1
+
+
+def test_span_prefers_its_own_subprocess_cpu() -> None:
+    metrics.enable()
+    with metrics.stage("hijo") as span:
+        span.add_subprocess_cpu(0.25)
+        span.add_subprocess_cpu(0.5)
+
+    # No se mezcla con la CPU de hijos de otros hilos (os.times() es global).
+    assert metrics.registry.snapshot()["hijo"]["subprocess_seconds"] == 0.75
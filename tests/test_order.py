@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.cli import main
+from conversor_rekordbox.converter import convert_library, merge_libraries
+from conversor_rekordbox.formats import enginedb, enginedj, rekordbox, serato
+from conversor_rekordbox.library import order
+from conversor_rekordbox.models import Track
+
+
+def _tracks(count: int) -> list[Track]:
+    rng = random.Random(7)
+    artists = ["Bicep", "bicep", "Ádam", "Zed", None]
+    return [
+        Track(
+            title=f"Tema {rng.randrange(50)}",
+            artist=rng.choice(artists) or "",
+            album=rng.choice(["Isles", None, "Alpha"]),
+            genre=rng.choice(["House", "Techno", None]),
+            location=f"/music/{index}.mp3",
+        )
+        for index in range(count)
+    ]
+
+
+def test_external_sort_matches_stable_in_memory_sort(tmp_path: Path, monkeypatch) -> None:
+    tracks = _tracks(2_500)
+    spilled: list[Path] = []
+    original = order._write_run
+    monkeypatch.setattr(order, "_write_run", lambda *args: spilled.append(original(*args)) or spilled[-1])
+
+    result = list(order.sort_tracks(iter(tracks), run_size=300, tmp_dir=tmp_path))
+
+    assert result == sorted(tracks, key=order.sort_key(order.DEFAULT_ORDER))
+    assert len(spilled) == 9
+    assert not any(path.exists() for path in spilled)  # temporales eliminados
+    # Sin distinguir mayúsculas ni acentos, y los vacíos al final.
+    artists = list(dict.fromkeys(track.artist.casefold() for track in result))
+    assert artists == ["ádam", "bicep", "zed", ""]
+
+
+def test_small_inputs_are_sorted_in_memory(monkeypatch) -> None:
+    monkeypatch.setattr(order, "_write_run", lambda *args: pytest.fail("no debería volcar a disco"))
+    tracks = _tracks(50)
+    assert list(order.sort_tracks(tracks, ("title",))) == sorted(tracks, key=order.sort_key(("title",)))
+
+
+def test_iter_groups_and_filenames() -> None:
+    groups = list(order.iter_groups(_tracks(500), "genre", run_size=64))
+
+    assert [value for value, _ in groups] == ["House", "Techno", None]
+    assert sum(len(members) for _, members in groups) == 500
+    used: set[str] = set()
+    assert order.group_filename("Drum & Bass/Jungle", used, ".m3u8") == "Drum & Bass_Jungle.m3u8"
+    assert order.group_filename("drum & bass/jungle", used, ".m3u8") == "drum & bass_jungle (2).m3u8"
+    assert order.group_filename(None, used) == "Sin valor"
+
+
+def test_convert_library_sorted_and_grouped(tmp_path: Path) -> None:
+    source = tmp_path / "entrada.json"
+    enginedj.dump(_tracks(200), source)
+
+    sorted_output = tmp_path / "ordenada.m3u8"
+    convert_library(source, sorted_output, order_by=("artist", "album", "title"))
+    loaded = serato.load(sorted_output)
+    assert [track.location for track in loaded] == [
+        track.location for track in sorted(enginedj.load(source), key=order.sort_key(order.DEFAULT_ORDER))
+    ]
+
+    folder = tmp_path / "por_genero"
+    convert_library(source, folder, output_format="serato", group_by="genre")
+    assert sorted(path.name for path in folder.iterdir()) == ["House.m3u8", "Sin valor.m3u8", "Techno.m3u8"]
+    house = {track.location for track in serato.load(folder / "House.m3u8")}
+    assert house == {track.location for track in enginedj.load(source) if track.genre == "House"}
+
+
+def test_group_by_playlist(tmp_path: Path) -> None:
+    tracks = _tracks(10)
+    database = tmp_path / "m.db"
+    enginedb.dump(tracks, database, playlists={"Warm up": tracks[:3], "Pico/Hora": tracks[3:5]})
+
+    folder = tmp_path / "listas"
+    convert_library(database, folder, output_format="engine_dj", group_by="playlist", order_by=("location",))
+
+    assert sorted(path.name for path in folder.iterdir()) == ["Pico_Hora.json", "Warm up.json"]
+    assert [track.location for track in enginedj.load(folder / "Warm up.json")] == sorted(
+        track.location for track in tracks[:3]
+    )
+
+
+@pytest.mark.parametrize("output_name", ["ordenada.xml", "ordenada.db", "ordenada.json"])
+def test_sorted_conversion_streams_from_reader(tmp_path: Path, monkeypatch, output_name: str) -> None:
+    source = tmp_path / "entrada.xml"
+    rekordbox.dump(_tracks(200), source)
+    expected = sorted(rekordbox.load(source), key=order.sort_key(("title",)))
+    received: list[object] = []
+    original = order.sort_tracks
+
+    def spilling_sort(tracks, fields, **kwargs):
+        received.append(tracks)
+        return original(tracks, fields, run_size=32, tmp_dir=tmp_path)
+
+    monkeypatch.setattr(order, "sort_tracks", spilling_sort)
+    monkeypatch.setattr(rekordbox, "load", lambda path: pytest.fail("no debería cargar la lista entera"))
+    output = tmp_path / output_name
+
+    convert_library(source, output, order_by=("title",), relocate={"/music": "/nas/music"})
+
+    assert not isinstance(received[0], list)
+    reader = {".xml": rekordbox.iter_load, ".db": enginedb.iter_load, ".json": enginedj.load}[output.suffix]
+    loaded = list(reader(output))
+    assert [track.title for track in loaded] == [track.title for track in expected]
+    assert all(track.location.startswith("/nas/music/") for track in loaded)
+    if output.suffix == ".xml":
+        assert b'<COLLECTION Entries="200">' in output.read_bytes()
+
+
+def test_merge_rejects_playlist_groups_before_loading(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="playlist"):
+        merge_libraries([tmp_path / "no_existe.xml", tmp_path / "tampoco.json"], tmp_path / "out", group_by="playlist")
+
+
+def test_cli_validates_sort_fields(tmp_path: Path, capsys) -> None:
+    source = tmp_path / "entrada.json"
+    enginedj.dump(_tracks(5), source)
+    with pytest.raises(SystemExit):
+        main([str(source), str(tmp_path / "salida.m3u8"), "--sort", "artist,tempo"])
+    assert "tempo" in capsys.readouterr().err
+
+    assert main([str(source), str(tmp_path / "salida.m3u8"), "--sort"]) == 0
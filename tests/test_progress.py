@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from conversor_rekordbox.api.progress import (
+    PHASE_DOWNLOADING,
+    PHASE_FINISHED,
+    ProgressEvent,
+    ProgressThrottle,
+    ProgressTracker,
+)
+
+
+def _info(entry_id: str, index: int) -> dict:
+    return {"id": entry_id, "title": f"Pista {index}", "playlist_index": index, "n_entries": 2}
+
+
+def test_tracker_builds_events_and_totals() -> None:
+    events: list[ProgressEvent] = []
+    tracker = ProgressTracker(events.append)
+
+    tracker.progress_hook(
+        {"status": "downloading", "info_dict": _info("a", 1), "downloaded_bytes": 50,
+         "total_bytes": 100, "speed": 10.0, "eta": 5}
+    )
+    tracker.progress_hook(
+        {"status": "downloading", "info_dict": _info("b", 2), "downloaded_bytes": 10,
+         "total_bytes_estimate": 200, "speed": 5.0}
+    )
+    tracker.progress_hook({"status": "finished", "info_dict": _info("a", 1), "downloaded_bytes": 100,
+                           "total_bytes": 100})
+    tracker.postprocessor_hook({"status": "started", "postprocessor": "ExtractAudio",
+                                "info_dict": _info("a", 1)})
+    tracker.postprocessor_hook({"status": "finished", "postprocessor": "ExtractAudio",
+                                "info_dict": _info("a", 1)})
+
+    assert events[0].phase == PHASE_DOWNLOADING
+    assert events[0].fraction == 0.5
+    assert events[1].totals.speed == 15.0
+    last = events[-1]
+    assert last.phase == PHASE_FINISHED
+    assert last.postprocessor == "ExtractAudio"
+    assert last.totals.entries_done == 1
+    assert last.totals.entries_total == 2
+    assert last.totals.downloaded_bytes == 110
+    assert last.totals.total_bytes == 300
+    assert last.totals.speed == 5.0
+
+
+def test_throttle_coalesces_per_entry() -> None:
+    now = [0.0]
+    batches: list[list[ProgressEvent]] = []
+    throttle = ProgressThrottle(batches.append, max_rate=2, clock=lambda: now[0])
+
+    for step in range(100):
+        now[0] = step * 0.01  # 100 eventos en un segundo
+        throttle(ProgressEvent(entry_id=str(step % 3), title=None, phase=PHASE_DOWNLOADING,
+                               downloaded_bytes=step))
+    throttle.flush()
+
+    # Entrega inmediata, otra tras 0,5 s y el resto al vaciar.
+    assert len(batches) == 3
+    assert all(len({e.entry_id for e in batch}) == len(batch) for batch in batches)
+    assert max(e.downloaded_bytes for e in batches[-1]) == 99
+
+
+def test_throttle_delivers_trailing_event_without_more_calls() -> None:
+    delivered = threading.Event()
+    batches: list[list[ProgressEvent]] = []
+
+    def deliver(batch: list[ProgressEvent]) -> None:
+        batches.append(batch)
+        if len(batches) == 2:
+            delivered.set()
+
+    throttle = ProgressThrottle(deliver, max_rate=20)
+    throttle(ProgressEvent(entry_id="a", title=None, phase=PHASE_DOWNLOADING, downloaded_bytes=1))
+    throttle(ProgressEvent(entry_id="a", title=None, phase=PHASE_FINISHED, downloaded_bytes=2))
+
+    assert len(batches) == 1
+    assert delivered.wait(2)  # el último evento llega sin llamar a flush
+    assert [event.phase for event in batches[1]] == [PHASE_FINISHED]
+    throttle.flush()
+    assert len(batches) == 2
+
+
+def test_throttle_delivers_batches_in_order() -> None:
+    first_started = threading.Event()
+    phases: list[list[str]] = []
+
+    def deliver(batch: list[ProgressEvent]) -> None:
+        if not first_started.is_set():
+            first_started.set()
+            time.sleep(0.2)  # un lote lento no debe dejar pasar al siguiente
+        phases.append([event.phase for event in batch])
+
+    throttle = ProgressThrottle(deliver, max_rate=0)
+    slow = threading.Thread(
+        target=throttle,
+        args=(ProgressEvent(entry_id="a", title=None, phase=PHASE_DOWNLOADING, downloaded_bytes=1),),
+    )
+    slow.start()
+    assert first_started.wait(2)
+    throttle(ProgressEvent(entry_id="a", title=None, phase=PHASE_FINISHED, downloaded_bytes=2))
+    slow.join()
+
+    assert phases == [[PHASE_DOWNLOADING], [PHASE_FINISHED]]
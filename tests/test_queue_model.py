@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from conversor_rekordbox.api.progress import PHASE_DOWNLOADING, PHASE_FINISHED, ProgressEvent  # noqa: E402
+from conversor_rekordbox.ui.queue_model import QueueTableModel, _contiguous_ranges  # noqa: E402
+
+
+@pytest.fixture()
+def model():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    model = QueueTableModel(flush_interval_ms=10_000)
+    inserted: list[tuple[int, int]] = []
+    changed: list[tuple[int, int]] = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.dataChanged.connect(lambda top, bottom, roles: changed.append((top.row(), bottom.row())))
+    model.signals = (inserted, changed)
+    yield model
+
+
+def _cell(model: QueueTableModel, row: int, column: int):
+    return model.data(model.index(row, column))
+
+
+def test_contiguous_ranges() -> None:
+    assert _contiguous_ranges([]) == []
+    assert _contiguous_ranges([4]) == [(4, 4)]
+    assert _contiguous_ranges([1, 2, 3, 7, 9, 10]) == [(1, 3), (7, 7), (9, 10)]
+
+
+def test_updates_are_published_in_batches(model: QueueTableModel) -> None:
+    inserted, changed = model.signals
+    for index in range(3):
+        model.upsert(f"id{index}", title=f"Pista {index}")
+    model.upsert("id1", progress=0.5)  # aún sin publicar: no genera dataChanged
+
+    assert model.rowCount() == 0
+    model.flush()
+    assert model.rowCount() == 3 and inserted == [(0, 2)] and changed == []
+    assert _cell(model, 1, 2) == "50%"
+
+    for key in ("id2", "id0", "id1"):
+        model.upsert(key, status=PHASE_DOWNLOADING)
+    model.upsert("id3", title="Nueva")
+    model.flush()
+
+    assert inserted == [(0, 2), (3, 3)]
+    assert changed == [(0, 2)]
+    assert _cell(model, 0, 1) == "Descargando"
+    model.flush()  # sin cambios no se emite nada
+    assert changed == [(0, 2)]
+
+
+def test_apply_progress_and_failures(model: QueueTableModel) -> None:
+    model.apply_progress(
+        [
+            ProgressEvent(entry_id="a", title="Uno", phase=PHASE_FINISHED),
+            ProgressEvent(entry_id="b", title="Dos", phase=PHASE_DOWNLOADING, downloaded_bytes=5, total_bytes=10),
+        ]
+    )
+
+    model.fail_unfinished(["a", "b"], "HTTP Error 404")
+    model.flush()
+
+    assert [_cell(model, row, 1) for row in range(2)] == ["Completado", "Error"]
+    assert _cell(model, 0, 2) == "100%"
+    assert _cell(model, 1, 4) == "HTTP Error 404"
+    assert model.data(model.index(1, 0), QtCore.Qt.ItemDataRole.ToolTipRole) == "HTTP Error 404"
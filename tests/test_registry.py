@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from conversor_rekordbox import cli
+from conversor_rekordbox.converter import convert_library, detect_format
+from conversor_rekordbox.formats import enginedb, rekordbox, registry as registry_module, seratodb
+from conversor_rekordbox.formats.registry import BUILTIN_FORMATS, FormatRegistry
+from conversor_rekordbox.models import Track
+
+DATA = Path(__file__).parent / "data"
+
+PLUGIN = '''
+from pathlib import Path
+
+EXTENSIONS = (".nml",)
+
+
+def sniff(header: bytes) -> bool:
+    return header.lstrip().startswith(b"<NML")
+
+
+def load(path: Path):
+    from conversor_rekordbox.models import Track
+    return [Track(title=line, artist="nml") for line in path.read_text().splitlines()[1:]]
+
+
+def dump(tracks, path: Path) -> None:
+    path.write_text("<NML>\\n" + "\\n".join(track.title for track in tracks))
+
+
+def append(tracks, path: Path) -> None:
+    dump([*load(path), *tracks], path)
+'''
+
+
+def test_detects_by_content_regardless_of_extension(tmp_path: Path) -> None:
+    xml = tmp_path / "export.txt"
+    xml.write_bytes(b"\xef\xbb\xbf" + (DATA / "sample_rekordbox.xml").read_bytes())
+    database = tmp_path / "library.bin"
+    enginedb.dump([Track(title="Uno", artist="A")], database)
+    crate = tmp_path / "sin_extension"
+    seratodb.dump([Track(title="Uno", artist="A")], crate)
+    m3u = tmp_path / "lista.txt"
+    m3u.write_text("#EXTM3U\n/music/a.mp3\n", encoding="utf-8")
+    other_json = tmp_path / "otra.json"
+    other_json.write_text('{"items": []}', encoding="utf-8")
+    foreign = tmp_path / "otra.txt"
+    foreign.write_text('{"tracks": [{"title": "Uno"}]}', encoding="utf-8")
+
+    assert detect_format(xml) == "rekordbox"
+    assert detect_format(database) == "engine_db"
+    assert detect_format(crate) == "serato_db"
+    assert detect_format(m3u) == "serato"
+    assert detect_format(DATA / "sample_engine.json") == "engine_dj"
+    # Sin claves reconocibles se recurre a la extensión.
+    assert detect_format(other_json) == "engine_dj"
+    assert detect_format(foreign) is None  # "tracks" solo no basta para ser Engine DJ
+    assert detect_format(tmp_path / "nueva.crate") == "serato_db"
+
+    output = convert_library(xml, tmp_path / "out.m3u8")
+    assert len(Path(output).read_text(encoding="utf-8").splitlines()) > 1
+
+
+def test_plugins_load_lazily_from_entry_points(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "nml_plugin.py").write_text(PLUGIN, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    lookups: list[str] = []
+
+    def fake_entry_points(group: str) -> list[SimpleNamespace]:
+        lookups.append(group)
+        return [SimpleNamespace(name="traktor", value="nml_plugin")]
+
+    monkeypatch.setattr(registry_module, "_entry_points", fake_entry_points)
+    registry = FormatRegistry(BUILTIN_FORMATS)
+    monkeypatch.setattr(registry_module, "registry", registry)
+    monkeypatch.setattr(cli, "registry", registry)
+    monkeypatch.setattr("conversor_rekordbox.converter.registry", registry)
+
+    rekordbox_xml = DATA / "sample_rekordbox.xml"
+    assert registry.detect(rekordbox_xml) == "rekordbox"
+    assert lookups == [] and "nml_plugin" not in sys.modules
+
+    nml = tmp_path / "collection.nml"
+    nml.write_text("<NML>\nUno\nDos", encoding="utf-8")
+    assert registry.detect(nml) == "traktor"
+    assert lookups == [registry_module.ENTRY_POINT_GROUP]
+
+    cli.main([str(nml), str(tmp_path / "out.xml")])
+    assert [track.title for track in rekordbox.load(tmp_path / "out.xml")] == ["Uno", "Dos"]
+
+
+def test_cli_rejects_unknown_format(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(registry_module, "_entry_points", lambda group: [])
+    monkeypatch.setattr(cli, "registry", FormatRegistry(BUILTIN_FORMATS))
+
+    with pytest.raises(SystemExit):
+        cli.main([str(DATA / "sample_rekordbox.xml"), str(tmp_path / "out"), "--output-format", "traktor"])
+
+
+def test_cli_separates_usage_errors_from_data_errors(tmp_path: Path, capsys) -> None:
+    broken = tmp_path / "roto.xml"
+    broken.write_text("<?xml version='1.0'?><DJ_PLAYLISTS></DJ_PLAYLISTS>", encoding="utf-8")
+
+    # Un archivo sin colección es un error de los datos: código 1, sin el uso.
+    assert cli.main([str(broken), str(tmp_path / "out.m3u8")]) == 1
+    err = capsys.readouterr().err
+    assert "colección" in err and "usage:" not in err
+
+    for argv in (
+        [str(DATA / "sample_rekordbox.xml"), str(tmp_path / "out.desconocida")],
+        [str(DATA / "sample_rekordbox.xml"), str(tmp_path / "out.m3u8"), "--query", "bpm:abc"],
+    ):
+        with pytest.raises(SystemExit) as exited:
+            cli.main(argv)
+        assert exited.value.code == 2
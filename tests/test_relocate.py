@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from conversor_rekordbox import cli
+from conversor_rekordbox.formats import rekordbox, serato
+from conversor_rekordbox.library.relocate import PrefixTrie, existing_paths, relocate_tracks
+from conversor_rekordbox.models import Track
+
+
+def test_trie_uses_longest_matching_prefix() -> None:
+    trie = PrefixTrie({"/Users/dj/Music": "/Volumes/A", "/Users/dj/Music/Edits": "/Volumes/B/"})
+
+    assert trie.rewrite("/Users/dj/Music/House/a.mp3") == "/Volumes/A/House/a.mp3"
+    assert trie.rewrite("/Users/dj/Music/Edits/b.mp3") == "/Volumes/B/b.mp3"
+    assert trie.rewrite("/Users/dj/MusicOld/c.mp3") is None
+    assert PrefixTrie({"C:\\Music": "/srv/music"}, ignore_case=True).rewrite("c:/MUSIC/x.mp3") == "/srv/music/x.mp3"
+
+
+def test_relocate_rewrites_uris_and_plain_paths_and_reports_missing(tmp_path: Path) -> None:
+    (tmp_path / "House").mkdir()
+    (tmp_path / "House" / "Café Tacvba.mp3").write_bytes(b"")
+    tracks = [
+        Track(title="Uno", artist="A", location="file://localhost/C:/Music/House/Caf%C3%A9%20Tacvba.mp3"),
+        Track(title="Dos", artist="B", location="C:\\Music\\House\\perdida.mp3"),
+        Track(title="Tres", artist="C"),
+    ]
+
+    report = relocate_tracks(tracks, {"C:/Music": str(tmp_path)})
+
+    expected = (tmp_path / "House" / "Café Tacvba.mp3").as_posix()
+    assert report.tracks[0].location == "file://localhost" + expected.replace(" ", "%20").replace("é", "%C3%A9")
+    assert report.tracks[1].location == str(tmp_path / "House" / "perdida.mp3").replace("/", "\\")
+    assert report.tracks[2] is tracks[2]
+    assert report.relocated == 2
+    assert report.missing == [1]
+
+
+def test_existing_paths_scans_each_directory_once(tmp_path: Path) -> None:
+    present = []
+    for folder in range(20):
+        directory = tmp_path / str(folder)
+        directory.mkdir()
+        for index in range(50):
+            (directory / f"{index}.mp3").write_bytes(b"")
+            present.append((directory / f"{index}.mp3").as_posix())
+    wanted = present + [(tmp_path / "0" / "no.mp3").as_posix(), (tmp_path / "nada" / "x.mp3").as_posix()]
+
+    assert existing_paths(wanted, workers=4) == set(present)
+
+
+def test_cli_relocates_and_writes_missing_report(tmp_path: Path) -> None:
+    source = tmp_path / "in.xml"
+    rekordbox.dump([Track(title="Uno", artist="A", location="file://localhost/old/uno.mp3")], source)
+    (tmp_path / "new").mkdir()
+    report = tmp_path / "missing.txt"
+
+    cli.main([str(source), str(tmp_path / "out.xml"), "--relocate", f"/old={tmp_path / 'new'}",
+              "--missing-report", str(report)])
+
+    location = rekordbox.load(tmp_path / "out.xml")[0].location
+    assert location == f"file://localhost{(tmp_path / 'new').as_posix()}/uno.mp3"
+    assert report.read_text(encoding="utf-8") == location + "\n"
+
+
+def test_unmatched_uris_are_left_untouched() -> None:
+    tracks = [Track(title="Uno", artist="A", location="file:///Music/Caf%C3%A9.mp3")]
+
+    report = relocate_tracks(tracks, {"/Otra": "/srv"}, check_exists=False)
+
+    assert report.tracks[0] is tracks[0] and report.relocated == 0
+
+
+def test_relative_paths_resolve_against_library_folder(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "listas" / "Audio").mkdir(parents=True)
+    (tmp_path / "listas" / "Audio" / "uno.mp3").write_bytes(b"")
+    (tmp_path / "listas" / "dos.mp3").write_bytes(b"")
+    monkeypatch.chdir(tmp_path)  # el directorio actual no tiene esos archivos
+    wanted = ["Audio/uno.mp3", "dos.mp3", "tres.mp3"]
+
+    assert existing_paths(wanted, base_dir=tmp_path / "listas") == {"Audio/uno.mp3", "dos.mp3"}
+
+    playlist = tmp_path / "listas" / "set.m3u8"
+    serato.dump([Track(title=name, artist="", location=name) for name in wanted], playlist)
+    report = tmp_path / "missing.txt"
+    cli.main([str(playlist), str(tmp_path / "out.m3u8"), "--missing-report", str(report)])
+    assert report.read_text(encoding="utf-8") == "tres.mp3\n"
+
+
+def test_case_insensitive_rules_check_existence_ignoring_case(tmp_path: Path) -> None:
+    (tmp_path / "Music" / "House").mkdir(parents=True)
+    (tmp_path / "Music" / "House" / "Uno.MP3").write_bytes(b"")
+    tracks = [
+        Track(title="Uno", artist="A", location="C:\\MUSIC\\house\\uno.mp3"),
+        Track(title="Dos", artist="B", location="C:\\MUSIC\\house\\dos.mp3"),
+    ]
+
+    report = relocate_tracks(tracks, {"c:/music": str(tmp_path / "music")}, ignore_case=True)
+
+    assert report.relocated == 2
+    assert report.missing == [1]
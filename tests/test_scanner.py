@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+
+from conversor_rekordbox.converter import convert_library
+from conversor_rekordbox.formats import rekordbox
+from conversor_rekordbox.library import scanner
+
+
+def _id3_frame(frame_id: bytes, text: str) -> bytes:
+    payload = b"\x01" + text.encode("utf-16")  # UTF-16 con BOM
+    return frame_id + struct.pack(">I", len(payload)) + b"\x00\x00" + payload
+
+
+def _mp3(title: str, artist: str) -> bytes:
+    frames = (
+        _id3_frame(b"TIT2", title)
+        + _id3_frame(b"TPE1", artist)
+        + _id3_frame(b"TBPM", "124")
+        + _id3_frame(b"TYER", "2019")
+        + b"COMM" + struct.pack(">I", 9) + b"\x00\x00" + b"\x00spa\x00nota"
+    )
+    padding = b"\x00" * 32
+    size = len(frames) + len(padding)
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    tag = b"ID3\x03\x00\x00" + syncsafe + frames + padding
+    # Trama MPEG-1 Layer III, 128 kbps, 44.1 kHz, estéreo, con cabecera Xing.
+    frame = bytearray(417)
+    frame[0:4] = b"\xff\xfb\x90\x00"
+    frame[36:40] = b"Xing"
+    frame[40:44] = struct.pack(">I", 1)
+    frame[44:48] = struct.pack(">I", 7656)  # 7656 * 1152 / 44100 ≈ 200 s
+    return tag + bytes(frame) * 3
+
+
+def _flac(comments: dict[str, str], sample_rate: int = 48000, samples: int = 48000 * 90) -> bytes:
+    info = bytearray(34)
+    info[10] = (sample_rate >> 12) & 0xFF
+    info[11] = (sample_rate >> 4) & 0xFF
+    info[12] = (sample_rate & 0x0F) << 4
+    info[13] = (samples >> 32) & 0x0F
+    info[14:18] = struct.pack(">I", samples & 0xFFFFFFFF)
+    vendor = b"test"
+    entries = [f"{key}={value}".encode() for key, value in comments.items()]
+    vorbis = struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", len(entries))
+    vorbis += b"".join(struct.pack("<I", len(entry)) + entry for entry in entries)
+    picture = b"\x00" * 5000
+    return (
+        b"fLaC"
+        + b"\x00" + len(info).to_bytes(3, "big") + bytes(info)
+        + b"\x06" + len(picture).to_bytes(3, "big") + picture
+        + b"\x84" + len(vorbis).to_bytes(3, "big") + vorbis
+        + b"\xff\xf8" * 100
+    )
+
+
+def _atom(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload) + 8) + kind + payload
+
+
+def _mp4() -> bytes:
+    def item(kind: bytes, value: bytes, data_type: int = 1) -> bytes:
+        return _atom(kind, _atom(b"data", struct.pack(">II", data_type, 0) + value))
+
+    ilst = _atom(
+        b"ilst",
+        item(b"\xa9nam", "Título".encode())
+        + item(b"\xa9ART", b"Artista")
+        + item(b"\xa9day", b"2021-03-01")
+        + item(b"tmpo", struct.pack(">H", 128), 21),
+    )
+    mvhd = _atom(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, 185_500) + b"\x00" * 80)
+    moov = _atom(b"moov", mvhd + _atom(b"udta", _atom(b"meta", b"\x00" * 4 + ilst)))
+    # "mdat" antes de "moov": se salta sin leer el audio.
+    return _atom(b"ftyp", b"M4A \x00\x00\x00\x00") + _atom(b"mdat", b"\x00" * 10_000) + moov
+
+
+def _library(tmp_path: Path) -> Path:
+    root = tmp_path / "Música"
+    (root / "House").mkdir(parents=True)
+    (root / "Techno" / "Sub").mkdir(parents=True)
+    (root / "House" / "uno.mp3").write_bytes(_mp3("Uno", "Ñandú"))
+    (root / "Techno" / "Sub" / "dos.flac").write_bytes(
+        _flac({"TITLE": "Dos", "ARTIST": "Otro", "GENRE": "Techno", "DATE": "2020-01-02", "BPM": "131.5"})
+    )
+    (root / "Techno" / "tres.m4a").write_bytes(_mp4())
+    (root / "Techno" / "portada.jpg").write_bytes(b"\xff\xd8")
+    return root
+
+
+def test_reads_header_tags(tmp_path: Path) -> None:
+    root = _library(tmp_path)
+
+    result = scanner.scan_library([root], workers=2)
+
+    tracks = {Path(track.location).name: track for track in result.tracks}
+    assert sorted(tracks) == ["dos.flac", "tres.m4a", "uno.mp3"]
+    assert result.scanned == 3 and not result.failed
+
+    mp3 = tracks["uno.mp3"]
+    assert (mp3.title, mp3.artist, mp3.bpm, mp3.year, mp3.comment) == ("Uno", "Ñandú", 124.0, 2019, "nota")
+    assert mp3.duration == round(7656 * 1152 / 44100, 3)
+
+    flac = tracks["dos.flac"]
+    assert (flac.title, flac.artist, flac.genre, flac.year, flac.bpm, flac.duration) == (
+        "Dos", "Otro", "Techno", 2020, 131.5, 90.0
+    )
+
+    mp4 = tracks["tres.m4a"]
+    assert (mp4.title, mp4.artist, mp4.year, mp4.bpm, mp4.duration) == ("Título", "Artista", 2021, 128.0, 185.5)
+
+
+def test_cache_only_rereads_changed_files(tmp_path: Path, monkeypatch) -> None:
+    root = _library(tmp_path)
+    cache = tmp_path / "scan.json"
+    scanner.scan_library([root], cache_path=cache)
+
+    read: list[str] = []
+    original = scanner.read_tags
+    monkeypatch.setattr(scanner, "read_tags", lambda path: read.append(Path(path).name) or original(path))
+
+    result = scanner.scan_library([root], cache_path=cache)
+    assert read == [] and result.cached == 3
+
+    changed = root / "House" / "uno.mp3"
+    changed.write_bytes(_mp3("Uno (Edit)", "Ñandú"))
+    os.utime(changed, ns=(changed.stat().st_atime_ns, changed.stat().st_mtime_ns + 1_000_000))
+    (root / "Techno" / "tres.m4a").unlink()
+
+    result = scanner.scan_library([root], cache_path=cache)
+    assert read == ["uno.mp3"]
+    assert (result.scanned, result.cached) == (1, 1)
+    assert sorted(track.title for track in result.tracks) == ["Dos", "Uno (Edit)"]
+
+
+def test_unreadable_file_falls_back_to_filename(tmp_path: Path) -> None:
+    (tmp_path / "roto.flac").write_bytes(b"no es flac")
+
+    result = scanner.scan_library([tmp_path])
+
+    assert result.failed == [str(tmp_path / "roto.flac")]
+    assert result.tracks[0].title == "roto"
+
+
+def test_failed_reads_are_retried_from_cache(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "uno.flac").write_bytes(_flac({"TITLE": "Uno"}))
+    cache = tmp_path / "scan.json"
+    original = scanner.read_tags
+    monkeypatch.setattr(scanner, "read_tags", lambda path: (_ for _ in ()).throw(OSError("bloqueado")))
+
+    assert scanner.scan_library([tmp_path], cache_path=cache).failed  # p. ej. archivo aún bloqueado
+    monkeypatch.setattr(scanner, "read_tags", original)
+    result = scanner.scan_library([tmp_path], cache_path=cache)
+
+    assert (result.scanned, result.cached, result.failed) == (1, 0, [])
+    assert result.tracks[0].title == "Uno"
+    assert scanner.scan_library([tmp_path], cache_path=cache).cached == 1
+
+
+def test_invalid_files_are_cached_until_they_change(tmp_path: Path, monkeypatch) -> None:
+    broken = tmp_path / "roto.flac"
+    broken.write_bytes(b"no es flac")
+    (tmp_path / "crudo.aac").write_bytes(b"\xff\xf1")  # ADTS sin contenedor: no se escanea
+    cache = tmp_path / "scan.json"
+    assert scanner.scan_library([tmp_path], cache_path=cache).failed == [str(broken)]
+
+    read: list[str] = []
+    original = scanner.read_tags
+    monkeypatch.setattr(scanner, "read_tags", lambda path: read.append(Path(path).name) or original(path))
+    result = scanner.scan_library([tmp_path], cache_path=cache)
+
+    assert read == [] and (result.cached, result.failed) == (1, [])
+    assert [track.title for track in result.tracks] == ["roto"]
+
+    broken.write_bytes(_flac({"TITLE": "Arreglado"}))
+    assert scanner.scan_library([tmp_path], cache_path=cache).tracks[0].title == "Arreglado"
+    assert read == ["roto.flac"]
+
+
+def test_folder_input_feeds_any_dump(tmp_path: Path) -> None:
+    root = _library(tmp_path)
+    output = tmp_path / "rekordbox.xml"
+
+    convert_library(root, output, scan_cache=tmp_path / "scan.json")
+
+    tracks = rekordbox.load(output)
+    assert len(tracks) == 3
+    assert all(track.location.startswith("file://localhost/") for track in tracks)
+    assert (tmp_path / "scan.json").exists()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.converter import Format, append_library, convert_library
+from conversor_rekordbox.formats import seratodb
+from conversor_rekordbox.models import Track
+
+DATA = Path(__file__).parent / "data"
+
+
+def _record(tag: bytes, payload: bytes) -> bytes:
+    return tag + struct.pack(">I", len(payload)) + payload
+
+
+def test_reads_handcrafted_crate(tmp_path: Path) -> None:
+    crate = tmp_path / "House.crate"
+    crate.write_bytes(
+        _record(b"vrsn", "1.0/Serato ScratchLive Crate".encode("utf-16-be"))
+        + _record(b"osrt", _record(b"tvcn", "song".encode("utf-16-be")) + _record(b"brev", b"\x00"))
+        + _record(b"otrk", _record(b"ptrk", "Users/dj/Music/Tema Uno.mp3".encode("utf-16-be")))
+    )
+
+    with seratodb.SeratoLibrary(crate) as library:
+        assert library.version == "1.0/Serato ScratchLive Crate"
+        assert len(library) == 1
+        assert library[0].location == "/Users/dj/Music/Tema Uno.mp3"
+        assert library[0].title == "Tema Uno"
+
+
+def test_database_round_trip_and_append(tmp_path: Path) -> None:
+    database = tmp_path / "database V2"
+    tracks = [
+        Track(title="Latch", artist="Disclosure", album="Settle", genre="House", duration=252.34,
+              bpm=122.0, comment="Ñ", location="file://localhost/Music/Latch.mp3", year=2012),
+        Track(title="Strobe", artist="deadmau5", location="/Music/Strobe.mp3"),
+    ]
+
+    seratodb.dump(tracks, database)
+    append_library([Track(title="Nuevo", artist="X", location="/Music/Nuevo.mp3")], database)
+
+    assert Format.from_extension(database) is Format.SERATO_DB
+    loaded = seratodb.load(database)
+    assert loaded[0] == Track(title="Latch", artist="Disclosure", album="Settle", genre="House",
+                              duration=252.34, bpm=122.0, comment="Ñ", location="/Music/Latch.mp3", year=2012)
+    assert [track.title for track in loaded] == ["Latch", "Strobe", "Nuevo"]
+
+
+def test_convert_to_crate_and_reject_truncated_files(tmp_path: Path) -> None:
+    crate = convert_library(DATA / "sample_rekordbox.xml", tmp_path / "Sample.crate")
+    assert [track.location for track in seratodb.load(crate)] == ["/music/track1.mp3", "/music/track2.mp3"]
+
+    crate.write_bytes(crate.read_bytes()[:-3])
+    with pytest.raises(seratodb.SeratoFormatError):
+        seratodb.load(crate)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.api.soundcloud import SoundCloudDownloader
+
+
+def test_session_reuses_one_instance(fake_ydl, tmp_path: Path) -> None:
+    downloader = SoundCloudDownloader(ydl_factory=fake_ydl)
+    events = []
+
+    with downloader.session() as session:
+        first = session.download("https://soundcloud.com/a/uno", tmp_path / "a")
+        second = session.download("https://soundcloud.com/a/dos", tmp_path / "b", progress=events.append)
+
+    assert len(fake_ydl.instances) == 1
+    ydl = fake_ydl.instances[0]
+    assert ydl.calls == ["https://soundcloud.com/a/uno", "https://soundcloud.com/a/dos"]
+    assert first == [tmp_path / "a" / "Mix.mp3"]
+    assert second == [tmp_path / "b" / "Mix.mp3"]
+    assert [event.entry_id for event in events] == ["dos"]
+    assert session.stats.created == 1 and session.stats.reused == 1
+    assert ydl.closed
+
+
+def test_refresh_replaces_instance(fake_ydl, tmp_path: Path) -> None:
+    session = SoundCloudDownloader(ydl_factory=fake_ydl).session()
+    session.download("https://soundcloud.com/a/uno", tmp_path)
+    session.refresh()
+    session.download("https://soundcloud.com/a/dos", tmp_path)
+
+    assert len(fake_ydl.instances) == 2
+    assert fake_ydl.instances[0].closed
+    session.close()
+    with pytest.raises(RuntimeError):
+        session.download("https://soundcloud.com/a/tres", tmp_path)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Presupuesto de importación del CLI de bibliotecas (medido ~25 ms).
+IMPORT_BUDGET_SECONDS = 0.25
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import conversor_rekordbox.cli as cli
+cli.build_parser()
+elapsed = time.perf_counter() - start
+import conversor_rekordbox.api.soundcloud, conversor_rekordbox.utils.deps
+loaded = [m for m in ('PyQt6', 'yt_dlp', 'conversor_rekordbox.formats.rekordbox',
+                      'conversor_rekordbox.formats.serato', 'conversor_rekordbox.formats.enginedj')
+          if m in sys.modules]
+print(elapsed, *loaded)
+"""
+
+
+def _run_probe(home: Path) -> list[str]:
+    return subprocess.run(
+        [sys.executable, "-c", PROBE],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": str(SRC), "HOME": str(home)},
+    ).stdout.split()
+
+
+def test_library_cli_imports_lazily_without_side_effects(tmp_path: Path) -> None:
+    timings = []
+    for _ in range(3):
+        output = _run_probe(tmp_path)
+        assert output[1:] == [], f"Módulos cargados al arrancar: {output[1:]}"
+        timings.append(float(output[0]))
+
+    assert min(timings) < IMPORT_BUDGET_SECONDS
+    # Importar no debe crear ~/.conversor_audio ni abrir el log.
+    assert not (tmp_path / ".conversor_audio").exists()
+
+
+def test_formats_package_loads_on_attribute_access() -> None:
+    import conversor_rekordbox.formats as formats
+
+    assert formats.serato.__name__ == "conversor_rekordbox.formats.serato"
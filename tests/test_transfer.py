@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from conversor_rekordbox.api.soundcloud import SoundCloudDownloader
+from conversor_rekordbox.utils.transfer import RetryPolicy
+
+PAYLOAD = bytes(range(256)) * 1024  # 256 KiB
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Servidor de pruebas con soporte de Range que puede cortar o ralentizar respuestas."""
+
+    protocol_version = "HTTP/1.1"
+    # Acciones para las peticiones con Range: "cut" corta a mitad, "slow" tarda más que el timeout.
+    script: list[str] = []
+    ranges: list[str | None] = []
+
+    def do_HEAD(self) -> None:  # noqa: N802 - API de http.server
+        self._respond(send_body=False)
+
+    def do_GET(self) -> None:  # noqa: N802 - API de http.server
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool) -> None:
+        header = self.headers.get("Range")
+        action = "ok"
+        if send_body:
+            self.ranges.append(header)
+            if header and self.script:
+                action = self.script.pop(0)
+
+        start, end = 0, len(PAYLOAD) - 1
+        if header:
+            first, _, last = header.removeprefix("bytes=").partition("-")
+            start = int(first)
+            end = min(int(last), end) if last else end
+        body = PAYLOAD[start : end + 1]
+
+        if action == "slow":
+            time.sleep(1.0)
+        try:
+            self.send_response(206 if header else 200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Accept-Ranges", "bytes")
+            if header:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not send_body:
+                return
+            if action == "cut":
+                self.wfile.write(body[: len(body) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            self.wfile.write(body)
+        except OSError:
+            self.close_connection = True  # El cliente ya abandonó la petición lenta.
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture()
+def server():
+    FlakyHandler.script = []
+    FlakyHandler.ranges = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/mix.mp3"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_part_file_resumes_from_its_offset_after_slow_and_cut_responses(server: str, tmp_path: Path) -> None:
+    yt_dlp = pytest.importorskip("yt_dlp")
+
+    def factory(options: dict[str, Any]):
+        # Sin postprocesado: solo interesa la transferencia, no hace falta ffmpeg.
+        return yt_dlp.YoutubeDL({**options, "postprocessors": [], "quiet": True, "noprogress": True})
+
+    (tmp_path / "mix.mp3.part").write_bytes(PAYLOAD[:1000])
+    FlakyHandler.script = ["slow", "cut"]
+    policy = RetryPolicy(max_retries=3, backoff_base=0, chunk_size=None, timeout=0.3)
+    downloader = SoundCloudDownloader(retry_policy=policy, ydl_factory=factory)
+
+    [target] = downloader.download(server, tmp_path)
+
+    assert target.read_bytes() == PAYLOAD
+    assert not (tmp_path / "mix.mp3.part").exists()
+    cut = 1000 + (len(PAYLOAD) - 1000) // 2
+    # La primera petición sin Range es la comprobación del extractor genérico.
+    assert FlakyHandler.ranges[1:] == ["bytes=1000-", "bytes=1000-", f"bytes={cut}-"]
+    assert downloader.retry_stats.as_dict() == {"attempts": 1, "retries": 2}
+
+
+def test_policy_backoff_is_capped() -> None:
+    policy = RetryPolicy(backoff_base=1, backoff_factor=3, backoff_max=5)
+
+    assert [policy.delay(attempt) for attempt in range(4)] == [1, 3, 5, 5]
+
+
+def test_policy_configures_resumable_downloads(tmp_path: Path) -> None:
+    policy = RetryPolicy(max_retries=3, chunk_size=64 * 1024, timeout=2)
+
+    options = SoundCloudDownloader(retry_policy=policy).build_options(tmp_path)
+
+    assert options["continuedl"] is True and options["nopart"] is False
+    assert options["retries"] == options["fragment_retries"] == 3
+    assert options["http_chunk_size"] == 64 * 1024
+    assert options["socket_timeout"] == 2
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.cli import main
+from conversor_rekordbox.formats import rekordbox, serato
+from conversor_rekordbox.library.watcher import LibraryWatcher
+from conversor_rekordbox.models import Track
+from test_scanner import _flac
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _write(path: Path, title: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_flac({"TITLE": title, "ARTIST": "DJ"}))
+
+
+def _touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_applies_deltas_after_debounce(tmp_path: Path, monkeypatch) -> None:
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    _write(music / "b.flac", "B")
+    library = tmp_path / "lista.m3u8"
+    clock = FakeClock()
+    watcher = LibraryWatcher([music], library, debounce=2.0, clock=clock)
+
+    assert not watcher.poll()  # cambio reciente: se espera
+    clock.now = 3.0
+    delta = watcher.poll()
+    assert [Path(path).name for path in delta.added] == ["a.flac", "b.flac"]
+    assert [track.title for track in serato.load(library)] == ["A", "B"]
+
+    # Solo altas: se usa append, sin reescribir la biblioteca.
+    dumps: list[int] = []
+    original_dump = serato.dump
+    monkeypatch.setattr(serato, "dump", lambda tracks, path: dumps.append(1) or original_dump(tracks, path))
+    _write(music / "sub" / "c.flac", "C")
+    watcher.poll()
+    clock.now = 6.0
+    assert [Path(path).name for path in watcher.poll().added] == ["c.flac"]
+    assert dumps == []
+    assert [track.title for track in serato.load(library)] == ["A", "B", "C"]
+
+    # Bajas y cambios: se sustituyen solo esas pistas.
+    (music / "a.flac").unlink()
+    _write(music / "b.flac", "B2")
+    _touch_later(music / "b.flac")
+    watcher.poll()
+    clock.now = 9.0
+    delta = watcher.poll()
+    assert ([Path(p).name for p in delta.removed], [Path(p).name for p in delta.changed]) == (["a.flac"], ["b.flac"])
+    assert sorted(track.title for track in serato.load(library)) == ["B2", "C"]
+
+    clock.now = 20.0
+    assert not watcher.poll()
+
+
+def test_index_persists_between_runs(tmp_path: Path) -> None:
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    library = tmp_path / "rekordbox.xml"
+    LibraryWatcher([music], library, debounce=0).poll()
+    assert (tmp_path / ".rekordbox.xml.watch.json").exists()
+
+    restarted = LibraryWatcher([music], library, debounce=0)
+    assert not restarted.poll()
+    _write(music / "b.flac", "B")
+    assert [Path(path).name for path in restarted.poll().added] == ["b.flac"]
+
+    tracks = rekordbox.load(library)
+    assert [track.title for track in tracks] == ["A", "B"]
+    assert all(track.location.startswith("file://localhost/") for track in tracks)
+
+
+def test_first_run_replaces_tracks_already_in_library(tmp_path: Path) -> None:
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    library = tmp_path / "lista.m3u8"
+    serato.dump(
+        [Track(title="Viejo", artist="", location=(music / "a.flac").as_posix()),
+         Track(title="Otra", artist="", location="/otra/ruta.mp3")],
+        library,
+    )
+
+    LibraryWatcher([music], library, debounce=0).poll()
+
+    assert sorted(track.title for track in serato.load(library)) == ["A", "Otra"]
+
+
+def test_failed_write_keeps_delta_pending(tmp_path: Path, monkeypatch) -> None:
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    library = tmp_path / "lista.m3u8"
+    watcher = LibraryWatcher([music], library, debounce=0)
+    watcher.poll()
+    _write(music / "b.flac", "B")
+
+    def full_disk(tracks, path):
+        raise OSError("disco lleno")
+
+    original_append = serato.append
+    monkeypatch.setattr(serato, "append", full_disk)
+    with pytest.raises(OSError):
+        watcher.poll()
+    monkeypatch.setattr(serato, "append", original_append)
+
+    assert [Path(path).name for path in watcher.poll().added] == ["b.flac"]
+    assert [track.title for track in serato.load(library)] == ["A", "B"]
+    assert not LibraryWatcher([music], library, debounce=0).poll()
+
+
+def test_failed_reads_are_retried_without_rewriting(tmp_path: Path, monkeypatch) -> None:
+    from conversor_rekordbox.library import scanner
+
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    (music / "roto.flac").write_bytes(b"no es flac")
+    library = tmp_path / "lista.xml"
+    watcher = LibraryWatcher([music], library, debounce=0)
+    original = scanner.read_tags
+
+    def locked(path: str):
+        if path.endswith("a.flac"):
+            raise OSError("bloqueado")  # p. ej. aún se está copiando
+        return original(path)
+
+    monkeypatch.setattr(scanner, "read_tags", locked)
+
+    watcher.poll()
+    assert sorted(track.title for track in rekordbox.load(library)) == ["a", "roto"]
+
+    # Un archivo que sigue roto no reescribe la biblioteca en cada sondeo.
+    monkeypatch.setattr(scanner, "read_tags", original)
+    monkeypatch.setattr(serato, "append", lambda *args: pytest.fail("no hay altas"))
+    delta = watcher.poll()
+    assert delta.changed == [str(music / "a.flac")]
+    assert sorted(track.title for track in rekordbox.load(library)) == ["A", "roto"]
+    monkeypatch.setattr(serato, "dump", lambda *args: pytest.fail("nada cambió"))
+    assert not watcher.poll()
+
+
+def test_retried_file_is_read_once_per_poll(tmp_path: Path, monkeypatch) -> None:
+    from conversor_rekordbox.library import scanner
+
+    music = tmp_path / "music"
+    _write(music / "a.flac", "A")
+    library = tmp_path / "lista.xml"
+    watcher = LibraryWatcher([music], library, debounce=0)
+    original = scanner.read_tags
+    monkeypatch.setattr(scanner, "read_tags", lambda path: (_ for _ in ()).throw(OSError("bloqueado")))
+    watcher.poll()
+
+    reads: list[str] = []
+    monkeypatch.setattr(scanner, "read_tags", lambda path: reads.append(Path(path).name) or original(path))
+
+    assert watcher.poll().changed == [str(music / "a.flac")]
+    assert reads == ["a.flac"]
+    assert [track.title for track in rekordbox.load(library)] == ["A"]
+
+
+def test_run_stops_and_limits_cpu(tmp_path: Path) -> None:
+    watcher = LibraryWatcher([tmp_path], tmp_path / "lista.m3u8", interval=0.01, max_cpu=0.25)
+    assert watcher._pause(1.0) == 3.0
+    assert watcher._pause(0.0) == 0.01
+
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    stop.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_cli_rejects_watch_on_file(tmp_path: Path, capsys) -> None:
+    source = tmp_path / "entrada.xml"
+    source.write_text("<DJ_PLAYLISTS/>", encoding="utf-8")
+    with pytest.raises(SystemExit) as exc:
+        main([str(source), str(tmp_path / "salida.m3u8"), "--watch"])
+    assert exc.value.code == 2
+    assert "--watch" in capsys.readouterr().err
+
+
+def test_cli_rejects_watch_with_stages(tmp_path: Path, capsys) -> None:
+    (tmp_path / "music").mkdir()
+    with pytest.raises(SystemExit) as exc:
+        main([str(tmp_path / "music"), str(tmp_path / "salida.m3u8"), "--watch", "--dedup", "--sort"])
+    assert exc.value.code == 2
+    assert "--dedup, --sort" in capsys.readouterr().err
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+import sys
+from array import array
+from pathlib import Path
+
+import pytest
+
+from conversor_rekordbox.audio import capabilities, waveform
+from conversor_rekordbox.audio.waveform import Waveform, WaveformCache, WaveformError
+from conversor_rekordbox.audio_cli import main
+from conversor_rekordbox.utils import metrics
+
+# Emite 200 hops de PCM mono a 22050 Hz (220 muestras por hop): la primera
+# mitad a medio volumen (cuadrada ±16384) y la segunda en silencio, más un
+# byte suelto al final. Cuenta sus ejecuciones en un archivo.
+FAKE_FFMPEG = """#!{python}
+import sys
+with open({counter!r}, "a") as counter:
+    counter.write("x")
+if "roto" in " ".join(sys.argv):
+    sys.stderr.write("Invalid data found when processing input\\n")
+    sys.exit(1)
+half = 22000
+loud = (b"\\x00\\x40" + b"\\x00\\xc0") * (half // 2)
+out = sys.stdout.buffer
+for start in range(0, len(loud), 3001):
+    out.write(loud[start:start + 3001])
+out.write(b"\\x00\\x00" * half + b"\\x00")
+"""
+
+
+@pytest.fixture()
+def fake_pcm_ffmpeg(tmp_path: Path) -> tuple[str, Path]:
+    counter = tmp_path / "runs.txt"
+    binary = tmp_path / "ffmpeg"
+    binary.write_text(FAKE_FFMPEG.format(python=sys.executable, counter=str(counter)), encoding="utf-8")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return str(binary), counter
+
+
+def test_binary_round_trip_without_numpy() -> None:
+    original = Waveform(12.5, array("b", [-3, -127]), array("b", [4, 127]), array("B", [10, 255]))
+
+    restored = Waveform.from_bytes(original.to_bytes())
+
+    assert restored == original
+    with pytest.raises(ValueError):
+        Waveform.from_bytes(original.to_bytes()[:-1])
+
+
+def test_cache_is_keyed_by_content(tmp_path: Path) -> None:
+    cache = WaveformCache(tmp_path / "cache")
+    first = tmp_path / "a.mp3"
+    first.write_bytes(b"audio" * 1000)
+    wave = Waveform(1.0, array("b", [0]), array("b", [1]), array("B", [2]))
+
+    assert cache.get(first, 1) is None
+    cache.put(first, wave)
+    moved = tmp_path / "otra carpeta" / "a.mp3"
+    moved.parent.mkdir()
+    first.rename(moved)
+
+    assert cache.get(moved, 1) == wave
+    assert cache.get(moved, 2) is None  # otra resolución
+    moved.write_bytes(b"otro audio")
+    assert cache.get(moved, 1) is None
+
+
+def test_compute_reduces_pcm_per_column(tmp_path: Path, fake_pcm_ffmpeg) -> None:
+    pytest.importorskip("numpy")
+    binary, _ = fake_pcm_ffmpeg
+
+    result = waveform.compute_waveform(tmp_path / "tema.mp3", columns=4, binary=binary)
+
+    assert result.duration == pytest.approx(44000 / 22050)
+    assert list(result.maximum) == [64, 64, 0, 0]
+    assert list(result.minimum) == [-64, -64, 0, 0]
+    assert list(result.rms) == [128, 128, 0, 0]
+
+
+def test_compute_reports_ffmpeg_errors(tmp_path: Path, fake_pcm_ffmpeg) -> None:
+    pytest.importorskip("numpy")
+    binary, _ = fake_pcm_ffmpeg
+
+    with pytest.raises(WaveformError, match="Invalid data"):
+        waveform.compute_waveform(tmp_path / "roto.mp3", binary=binary)
+
+
+def test_generate_uses_pool_and_cache(tmp_path: Path, fake_pcm_ffmpeg) -> None:
+    pytest.importorskip("numpy")
+    binary, counter = fake_pcm_ffmpeg
+    sources = []
+    for name in ("uno.mp3", "dos.flac", "roto.wav"):
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 100)
+        sources.append(path)
+    cache = WaveformCache(tmp_path / "cache")
+
+    results = waveform.generate_waveforms(sources, columns=8, cache=cache, binary=binary, workers=2)
+
+    assert results[sources[2]] is None
+    assert len(results[sources[0]]) == 8 and results[sources[0]] == results[sources[1]]
+    assert len(counter.read_text()) == 3
+
+    again = waveform.generate_waveforms(sources[:2], columns=8, cache=cache, binary=binary)
+    assert again == {source: results[source] for source in sources[:2]}
+    assert len(counter.read_text()) == 3  # todo desde la caché
+
+
+def test_generate_records_worker_timings(tmp_path: Path, fake_pcm_ffmpeg, monkeypatch) -> None:
+    pytest.importorskip("numpy")
+    binary, _ = fake_pcm_ffmpeg
+    sources = []
+    for name in ("uno.mp3", "roto.wav"):
+        sources.append(tmp_path / name)
+        sources[-1].write_bytes(name.encode() * 100)
+    monkeypatch.setattr(metrics, "registry", metrics.MetricsRegistry(enabled=True))
+
+    waveform.generate_waveforms(sources, columns=8, cache=WaveformCache(tmp_path / "cache"), binary=binary)
+
+    stats = metrics.registry.snapshot()["waveform"]
+    assert (stats["calls"], stats["errors"], stats["files"]) == (2, 1, 1)
+    assert stats["wall_seconds"] > 0 and stats["subprocess_seconds"] > 0  # medido en el trabajador
+
+
+def test_long_tracks_fold_into_fixed_bins() -> None:
+    np = pytest.importorskip("numpy")
+    bins = waveform._Bins(np, 16)
+    hops = 1024
+    amplitude = np.where(np.arange(hops) < hops // 2, 0.5, 0.0).astype(np.float32)
+    for start in range(0, hops, 100):  # bloques que no coinciden con los tramos
+        part = amplitude[start : start + 100]
+        bins.add(-part, part, (part.astype(np.float64) ** 2) * 220, 220)
+        assert bins.size <= 16
+
+    result = waveform._fold(np, bins, 4, hops / 100)
+
+    assert (bins.size, bins.span) == (8, 128)
+    assert list(result.maximum) == [64, 64, 0, 0]
+    assert list(result.minimum) == [-64, -64, 0, 0]
+    assert list(result.rms) == [128, 128, 0, 0]
+
+
+def test_audio_cli_waveform(tmp_path: Path, fake_pcm_ffmpeg, monkeypatch, capsys) -> None:
+    pytest.importorskip("numpy")
+    binary, _ = fake_pcm_ffmpeg
+    monkeypatch.setenv("PATH", f"{Path(binary).parent}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setattr(capabilities, "CACHE_PATH", tmp_path / "capabilities.json")
+    source = tmp_path / "tema.mp3"
+    source.write_bytes(b"audio")
+
+    code = main(["waveform", str(source), "--columns", "16", "--cache-dir", str(tmp_path / "cache")])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 0
+    assert [event["event"] for event in events] == ["start", "file", "done"]
+    assert events[1]["success"] is True
+    assert WaveformCache(tmp_path / "cache").get(source, 16) is not None